@@ -0,0 +1,152 @@
+"""
+asv benchmarks of pySankey2(see https://asv.readthedocs.io).
+
+    asv run                        # benchmark the current commit
+    asv continuous master HEAD     # compare two commits, report regressions
+    asv dev -b Rows                # quick run on the working tree
+
+Every stage of drawing a Sankey diagram is timed(time_*) and tracked for the peak
+memory of the process(peakmem_*):
+    Sankey.__init__, aggregation(row scan), _setboxPos, _setStripWidth, strip geometry,
+    _plotStrip, plot and savefig.
+The stages are swept over the number of rows, layers, labels per layer and the density
+of the flows(fraction of the possible label pairs that actually occur), and the aggregation
+over the number of processes(n_jobs).
+"""
+import os
+import tempfile
+
+from pysankey2 import Sankey
+from pysankey2 import core
+from pysankey2 import parallel
+from pysankey2.datasets import make_flows
+
+def makeFrame(nrows,nlayers,nlabels,density=1.0,seed=0):
+    """Heavy-tailed frame with <nlayers> columns and <nlabels> labels per layer, see make_flows."""
+    return make_flows(nrows,n_layers=nlayers,labels_per_layer=nlabels,density=density,seed=seed)
+
+
+class _Stages:
+    """Benchmarks of the layout stages, subclasses sweep the makeFrame() arguments named by param_names."""
+    timeout = 600
+    params = []
+    param_names = []
+    # makeFrame() arguments of the parameters not swept.
+    frame = dict(nrows=100000,nlayers=3,nlabels=20)
+
+    def frameArgs(self,*params):
+        args = dict(self.frame)
+        args.update(zip(self.param_names,params))
+        return args
+
+    def setup(self,*params):
+        self.df = makeFrame(**self.frameArgs(*params))
+        self.sky = Sankey(self.df)
+        self.labelCounts,self.flows = self.sky._aggregate()
+        self.layerLabels = self.sky.layerLabels
+        self.boxPos = self.sky._setboxPos(self.labelCounts,self.layerLabels,boxInterv=0.02)
+        self.layerPos = self.sky._setLayerPos(self.layerLabels,boxWidth=2,stripLen=10)
+
+    def time_init(self,*params):
+        Sankey(self.df)
+
+    def peakmem_init(self,*params):
+        Sankey(self.df)
+
+    def time_aggregate(self,*params):
+        self.sky._labelCounts = None
+        self.sky._aggregate()
+
+    def peakmem_aggregate(self,*params):
+        self.sky._labelCounts = None
+        self.sky._aggregate()
+
+    def time_setboxPos(self,*params):
+        self.sky._setboxPos(self.labelCounts,self.layerLabels,boxInterv=0.02)
+
+    def time_setStripWidth(self,*params):
+        self.sky._setStripWidth(self.layerLabels,self.flows)
+
+    def time_stripGeometry(self,*params):
+        core.setStripGeometry(self.layerLabels,self.boxPos,self.layerPos,self.flows)
+
+    def peakmem_stripGeometry(self,*params):
+        core.setStripGeometry(self.layerLabels,self.boxPos,self.layerPos,self.flows)
+
+
+class Rows(_Stages):
+    params = [[1000,10000,100000,1000000,10000000]]
+    param_names = ['nrows']
+
+
+class Layers(_Stages):
+    params = [[2,5,10,20]]
+    param_names = ['nlayers']
+
+
+class Labels(_Stages):
+    params = [[5,50,500,5000,10000]]
+    param_names = ['nlabels']
+
+
+class Density(_Stages):
+    params = [[0.01,0.1,1.0]]
+    param_names = ['density']
+    frame = dict(nrows=100000,nlayers=3,nlabels=500)
+
+
+class Jobs:
+    """Scaling of the aggregation with the number of processes(n_jobs)."""
+    timeout = 600
+    params = [[1,2,4,8]]
+    param_names = ['n_jobs']
+
+    def setup(self,n_jobs):
+        self.df = makeFrame(nrows=4000000,nlayers=5,nlabels=50)
+        self.layerLabels = core.getLayerLabels(self.df)
+
+    def time_aggregate(self,n_jobs):
+        parallel.aggregate(self.df,self.layerLabels,n_jobs=n_jobs)
+
+
+class Render:
+    """Benchmarks of drawing, the cost depends on the number of boxes and strips rather than rows."""
+    timeout = 600
+    params = [[5,50,500],[2,5]]
+    param_names = ['labels','layers']
+
+    def setup(self,labels,layers):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        self.sky = Sankey(makeFrame(nrows=10000,nlayers=layers,nlabels=labels,density=0.1))
+        self.sky.plot()
+        plt.close('all')
+        self.tmpdir = tempfile.mkdtemp()
+
+    def teardown(self,labels,layers):
+        self.plt.close('all')
+        for name in os.listdir(self.tmpdir):
+            os.remove(os.path.join(self.tmpdir,name))
+        os.rmdir(self.tmpdir)
+
+    # figures are closed in each call, asv runs a benchmark many times between setup and teardown.
+    def time_plotStrip(self,labels,layers):
+        fig = self.plt.figure()
+        self.sky._plotStrip(fig.subplots(),self.sky.layerLabels,self.sky._strips,self.sky.stripColor,{})
+        self.plt.close(fig)
+
+    def time_plot(self,labels,layers):
+        fig,ax = self.sky.plot()
+        fig.canvas.draw()
+        self.plt.close(fig)
+
+    def peakmem_plot(self,labels,layers):
+        fig,ax = self.sky.plot()
+        fig.canvas.draw()
+        self.plt.close(fig)
+
+    def time_savefig(self,labels,layers):
+        fig,ax = self.sky.plot(savePath=os.path.join(self.tmpdir,'sankey.png'))
+        self.plt.close(fig)
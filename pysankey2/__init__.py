@@ -1,4 +1,7 @@
 from .datasets import load_fruits
 from .datasets import load_countrys
+from .datasets import make_flows
 from .pysankey2 import Sankey
-from .pysankey2 import LabelMismatchError
\ No newline at end of file
+from .pysankey2 import LabelMismatchError
+from .counts import FlowCounts
+from .streaming import StreamCounts
\ No newline at end of file
@@ -0,0 +1,811 @@
+"""
+Plotting-free core of pySankey2.
+
+Label handling, flow aggregation and layout geometry of Sankey diagrams.
+Only numpy and pandas are required, so the functions here can be used(e.g. to serve
+layout JSON to d3 or dashboards) where matplotlib is not installed.
+
+Layers are identified by the column names of the dataFrame, labels of a layer are
+ordered by layerLabels, and aggregated results are kept as plain arrays aligned to
+that order:
+    labelCounts[layer]         : np.ndarray, number of entities of each label in layer.
+    flows[leftLayer]['left']   : np.ndarray, index of the left label of each strip.
+    flows[leftLayer]['right']  : np.ndarray, index of the right label(in the next layer).
+    flows[leftLayer]['width']  : np.ndarray, number of entities of each strip.
+"""
+from collections import defaultdict
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from .utils import listRemoveNAN
+
+__all__ = ['SankeyException','LabelMismatchError',
+           'getColnamesMapping','getAllLabels','getLayerLabels','checkLayerLabelsMatchDF',
+           'encodeLayers','countLabels','countFlows','countPaths','mergeFlows','aggregate','mapLabels','remapCounts',
+           'countCrossings','barycenterOrder',
+           'setBoxPos','setLayerPos','setStripWidth','setStripPos','setStripGeometry',
+           'boxRecords','stripRecords','layout']
+
+class SankeyException(Exception):
+    pass
+
+class LabelMismatchError(SankeyException):
+    """LabelMismatchError is thrown when the provided labels are different from the labels in the dataframe."""
+    pass
+
+# Above this number of cells, flows of a layer pair are counted sparsely(np.unique)
+# instead of with a dense bincount over all (leftLabel,rightLabel) combinations.
+DENSE_FLOW_CELLS = 1 << 22
+
+def getColnamesMapping(dataFrame):
+    """
+    Returns:
+    -------
+    dict: mapping relationship between old and new names.
+    """
+    return dict(zip(dataFrame.columns,['layer%d'%(i+1) for i in range(dataFrame.shape[1])]))
+
+def getAllLabels(dataFrame,layerLabels=None):
+    """
+    Parameters:
+    ----------
+    layerLabels:dict, optional.
+        If passing, labels are merged from the layer-specific labels instead of
+        being collected from the dataFrame.
+
+    Returns:
+    -------
+    allLabels:list
+        a global unique label list, in order of appearance in the layers.
+    """
+    if layerLabels is None:
+        layerLabels = getLayerLabels(dataFrame)
+    return listRemoveNAN(OrderedDict.fromkeys(label for labels in layerLabels.values() for label in labels))
+
+def _uniqueLabels(column):
+    """unique labels of a column(in order of appearance), without NaN."""
+    uniques = column.unique()
+    return list(uniques[~pd.isna(uniques)])
+
+def getLayerLabels(dataFrame):
+    """
+    Returns:
+    -------
+    layerLabels:dict
+        a layer-specific unique label dict(same labels in different layers would be treated as independent labels).
+    """
+    layerLabels = OrderedDict()
+    for layer_label in dataFrame.columns:
+        layerLabels[layer_label] = _uniqueLabels(dataFrame.loc[:,layer_label])
+    return layerLabels
+
+def checkLayerLabelsMatchDF(dataFrame,layerLabels,colnameMaps,dfLayerLabels=None):
+    """
+    check whether the provided layer-specific labels match dataframe column names.
+
+    dfLayerLabels:dict, optional.
+        labels of the dataFrame(see getLayerLabels), if already discovered.
+    """
+    for oldname,newname in colnameMaps.items():
+        df_list = dfLayerLabels[newname] if dfLayerLabels is not None else _uniqueLabels(dataFrame.loc[:,newname])
+        df_set = set(df_list)
+        provided_set = set(listRemoveNAN(layerLabels[oldname]))
+
+        if df_set != provided_set:
+            msg_df = "dataFrame Labels:" + ",".join([str(i) for i in df_set]) + "\n"
+            msg_provided = "Provided Labels:" + ",".join([str(i) for i in provided_set]) + "\n"
+            raise LabelMismatchError('{0} do not match with {1}'.format(msg_provided, msg_df))
+
+def encodeLayers(dataFrame,layerLabels):
+    """
+    Encode each layer of the dataFrame as integer codes.
+    Returns:
+    -------
+    codes:dict, codes[layer] is an int64 array holding the index of each row's label in layerLabels[layer],
+        and -1 for NaN.
+    """
+    codes = OrderedDict()
+    for layer,labels in layerLabels.items():
+        cat = pd.Categorical(dataFrame.loc[:,layer],categories=labels)
+        codes[layer] = np.asarray(cat.codes,dtype=np.int64)
+    return codes
+
+def countLabels(codes,layerLabels):
+    """
+    Returns:
+    -------
+    labelCounts:dict, labelCounts[layer][i] is the number of rows labeled layerLabels[layer][i].
+    """
+    labelCounts = OrderedDict()
+    for layer,labels in layerLabels.items():
+        layer_codes = codes[layer]
+        labelCounts[layer] = np.bincount(layer_codes[layer_codes >= 0],minlength=len(labels)).astype(np.int64)
+    return labelCounts
+
+def _countPairs(leftCodes,rightCodes,nLeft,nRight,sparse=None):
+    """
+    Count (left,right) code pairs of rows that are labeled in both layers.
+    Returns (left,right,width) arrays sorted by (left,right), only for width > 0.
+    """
+    valid = (leftCodes >= 0) & (rightCodes >= 0)
+    # int64 keys, codes may be narrower(e.g. the int32 shared codes of parallel.aggregate).
+    keys = leftCodes[valid].astype(np.int64,copy=False) * nRight + rightCodes[valid]
+    if sparse is None:
+        sparse = nLeft * nRight > max(DENSE_FLOW_CELLS,len(keys))
+    if not sparse:
+        counts = np.bincount(keys,minlength=nLeft * nRight)
+        keys = np.flatnonzero(counts)
+        width = counts[keys]
+    else:
+        keys,width = np.unique(keys,return_counts=True)
+    return {'left':keys // nRight,'right':keys % nRight,'width':width.astype(np.int64)}
+
+def countFlows(codes,layerLabels,sparse=None):
+    """
+    Parameters:
+    ----------
+    sparse:bool, optional.
+        If True, count the pairs of labels with np.unique(O(rows) memory),
+        if False, with a dense bincount(O(left labels x right labels) memory),
+        if not passing, dense unless it exceeds max(DENSE_FLOW_CELLS,rows) cells.
+
+    Returns:
+    -------
+    flows:dict, flows[leftLayer] holds the strips between leftLayer and the next layer,
+        as arrays 'left','right'(label indices) and 'width', sorted by (left,right).
+    """
+    layers = list(layerLabels.keys())
+    flows = OrderedDict()
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        flows[leftLayer] = _countPairs(codes[leftLayer],codes[rightLayer],
+                                       len(layerLabels[leftLayer]),len(layerLabels[rightLayer]),
+                                       sparse=sparse)
+    return flows
+
+def countPaths(codes):
+    """
+    Count the distinct paths of the rows through all layers.
+
+    Parameters:
+    ----------
+    codes:dict, see encodeLayers().
+
+    Returns:
+    -------
+    paths:2-d int64 array(paths x layers), label index of each path in each layer(-1 for NaN),
+        sorted by the labels of the layers in order.
+
+    counts:int64 array, number of rows of each path.
+    """
+    layerCodes = list(codes.values())
+    nrows = len(layerCodes[0]) if layerCodes else 0
+    key = np.zeros(nrows,dtype=np.int64)
+    for code in layerCodes:
+        # dense rank of the path so far, so that keys stay below rows * labels.
+        key = np.unique(key * (int(code.max(initial=-1)) + 2) + code + 1,return_inverse=True)[1].ravel()
+    keys,first,counts = np.unique(key,return_index=True,return_counts=True)
+    paths = np.stack([code[first] for code in layerCodes],axis=1) if layerCodes else np.empty((0,0),dtype=np.int64)
+    return paths.astype(np.int64),counts.astype(np.int64)
+
+def _sumStrips(keys,width,nRight,dtype=np.int64):
+    """Sum up the widths of strips with equal keys(left * nRight + right)."""
+    keys,inverse = np.unique(keys,return_inverse=True)
+    width = np.bincount(inverse.ravel(),weights=width,minlength=len(keys))
+    return {'left':keys // nRight,'right':keys % nRight,'width':width.astype(dtype)}
+
+def mergeFlows(flows,otherFlows,layerLabels):
+    """
+    Sum two flows(of the same layerLabels) strip by strip.
+    Returns:
+    -------
+    flows:dict, see countFlows().
+    """
+    merged = OrderedDict()
+    layers = list(layerLabels.keys())
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        nRight = len(layerLabels[rightLayer])
+        a,b = flows[leftLayer],otherFlows[leftLayer]
+        keys = np.concatenate([a['left'] * nRight + a['right'],b['left'] * nRight + b['right']])
+        merged[leftLayer] = _sumStrips(keys,np.concatenate([a['width'],b['width']]),nRight)
+    return merged
+
+def aggregate(dataFrame,layerLabels,chunkSize=None,sparse=None):
+    """
+    Count labels and flows of the dataFrame.
+
+    Parameters:
+    ----------
+    chunkSize:int, optional.
+        If passing, rows are encoded and counted in chunks of <chunkSize> rows, and the counts are merged,
+        bounding the temporary memory to that of one chunk.
+
+    sparse:bool, optional.
+        see countFlows().
+
+    Returns:
+    -------
+    labelCounts,flows: see countLabels() and countFlows().
+    """
+    nrows = len(dataFrame)
+    if chunkSize is None or chunkSize >= nrows:
+        codes = encodeLayers(dataFrame,layerLabels)
+        return countLabels(codes,layerLabels),countFlows(codes,layerLabels,sparse=sparse)
+
+    labelCounts = flows = None
+    for start in range(0,nrows,chunkSize):
+        codes = encodeLayers(dataFrame.iloc[start:start + chunkSize],layerLabels)
+        chunkCounts = countLabels(codes,layerLabels)
+        chunkFlows = countFlows(codes,layerLabels,sparse=sparse)
+        del codes
+        if labelCounts is None:
+            labelCounts,flows = chunkCounts,chunkFlows
+        else:
+            for layer in labelCounts:
+                labelCounts[layer] += chunkCounts[layer]
+            flows = mergeFlows(flows,chunkFlows,layerLabels)
+    return labelCounts,flows
+
+def aggregateGroups(dataFrame,layerLabels,groups,nGroups,sparse=None):
+    """
+    Count labels and flows of each group of rows in one pass, counting (group,label) codes.
+
+    Parameters:
+    ----------
+    groups:array of int, the group(in [0,nGroups)) of each row, negative(or NaN) for rows of no group.
+
+    sparse:bool, optional.
+        see countFlows().
+
+    Returns:
+    -------
+    list of (labelCounts,flows), one per group, see aggregate().
+    """
+    groups = np.asarray(groups)
+    if groups.dtype.kind == 'f':
+        groups = np.where(np.isnan(groups),-1,groups)
+    groups = groups.astype(np.int64)
+    codes = encodeLayers(dataFrame,layerLabels)
+    results = [(OrderedDict(),OrderedDict()) for group in range(nGroups)]
+    for layer,labels in layerLabels.items():
+        n = len(labels)
+        valid = (groups >= 0) & (codes[layer] >= 0)
+        counts = np.bincount(groups[valid] * n + codes[layer][valid],minlength=nGroups * n).reshape(nGroups,n)
+        for group in range(nGroups):
+            results[group][0][layer] = counts[group]
+    layers = list(layerLabels.keys())
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        nLeft,nRight = len(layerLabels[leftLayer]),len(layerLabels[rightLayer])
+        left = np.where(groups >= 0,groups * nLeft + codes[leftLayer],-1)
+        left[codes[leftLayer] < 0] = -1
+        flow = _countPairs(left,codes[rightLayer],nGroups * nLeft,nRight,sparse=sparse)
+        # strips are sorted by (group,left,right).
+        bounds = np.searchsorted(flow['left'],np.arange(nGroups + 1) * nLeft)
+        for group in range(nGroups):
+            part = slice(bounds[group],bounds[group + 1])
+            results[group][1][leftLayer] = {'left':flow['left'][part] - group * nLeft,
+                                            'right':flow['right'][part],'width':flow['width'][part]}
+    return results
+
+def aggregateWindows(dataFrame,layerLabels,bounds):
+    """
+    Count labels and flows of successive windows of rows incrementally: rows entering a window are
+    added to the counts of the previous window and rows leaving it are subtracted, so each row is
+    counted at most twice over all windows.
+
+    Parameters:
+    ----------
+    bounds:list of (start,stop), the rows[start:stop] of each window, both non-decreasing.
+
+    Returns:
+    -------
+    generator of (labelCounts,flows), one per window, see aggregate().
+    """
+    codes = encodeLayers(dataFrame,layerLabels)
+    layers = list(layerLabels.keys())
+    labelCounts = OrderedDict((layer,np.zeros(len(labels),dtype=np.int64)) for layer,labels in layerLabels.items())
+    # flows are counted over the strips present in any row, pairs[leftLayer] is the strip of each row(-1 for none).
+    pairs,strips,widths = OrderedDict(),OrderedDict(),OrderedDict()
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        nRight = len(layerLabels[rightLayer])
+        left,right = codes[leftLayer],codes[rightLayer]
+        keys = np.where((left >= 0) & (right >= 0),left * nRight + right,-1)
+        valid = keys >= 0
+        strips[leftLayer],inverse = np.unique(keys[valid],return_inverse=True)
+        pairs[leftLayer] = np.full(len(keys),-1,dtype=np.int64)
+        pairs[leftLayer][valid] = inverse.ravel()
+        widths[leftLayer] = np.zeros(len(strips[leftLayer]),dtype=np.int64)
+
+    def update(start,stop,sign):
+        if stop <= start:
+            return
+        for layer,counts in labelCounts.items():
+            part = codes[layer][start:stop]
+            np.add.at(counts,part[part >= 0],sign)
+        for layer,width in widths.items():
+            part = pairs[layer][start:stop]
+            np.add.at(width,part[part >= 0],sign)
+
+    prevStart,prevStop = 0,0
+    for start,stop in bounds:
+        update(max(prevStop,start),stop,1)
+        update(prevStart,min(start,prevStop),-1)
+        prevStart,prevStop = start,stop
+        flows = OrderedDict()
+        for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+            nRight = len(layerLabels[rightLayer])
+            present = np.flatnonzero(widths[leftLayer])
+            keys = strips[leftLayer][present]
+            flows[leftLayer] = {'left':keys // nRight,'right':keys % nRight,'width':widths[leftLayer][present]}
+        yield OrderedDict((layer,counts.copy()) for layer,counts in labelCounts.items()),flows
+
+def aggregateEvents(dataFrame,entity,step,label,maxSteps=None,sparse=None):
+    """
+    Count labels and flows of a long-format event log(one row per entity and step), as if it was pivoted
+    to one column per step, without building the pivoted frame: events are sorted by (entity,step), and
+    an entity's labels at two adjacent steps form a flow. Entities without event(or with a NaN label)
+    at a step are NaN there.
+
+    Parameters:
+    ----------
+    entity,step,label:str
+        Column names of the entity, the step and the label of each event.
+
+    maxSteps:int, optional.
+        If passing, only the first <maxSteps> steps(in sorted order) are counted.
+
+    sparse:bool, optional.
+        see countFlows().
+
+    Returns:
+    -------
+    layerLabels:dict, labels of each step(layers are the sorted steps), in order of appearance.
+
+    labelCounts,flows: see aggregate().
+    """
+    stepCodes,steps = pd.factorize(dataFrame.loc[:,step],sort=True)
+    entityCodes,entities = pd.factorize(dataFrame.loc[:,entity])
+    labelCodes,labels = pd.factorize(dataFrame.loc[:,label])
+    nsteps = len(steps) if maxSteps is None else min(maxSteps,len(steps))
+    steps = steps.tolist()
+    keep = (stepCodes >= 0) & (stepCodes < nsteps) & (entityCodes >= 0) & (labelCodes >= 0)
+    stepCodes,entityCodes,labelCodes = stepCodes[keep],entityCodes[keep],labelCodes[keep]
+
+    order = np.argsort(entityCodes.astype(np.int64) * nsteps + stepCodes)
+    stepCodes,entityCodes,labelCodes = stepCodes[order],entityCodes[order],labelCodes[order]
+    sameEntity = entityCodes[1:] == entityCodes[:-1]
+    if (sameEntity & (stepCodes[1:] == stepCodes[:-1])).any():
+        raise ValueError("Duplicate events for an {0} and {1}.".format(entity,step))
+
+    # labels of each step, coded in order of appearance in the event log.
+    layerLabels,labelCounts,layerCodes = OrderedDict(),OrderedDict(),np.empty_like(labelCodes)
+    firstSeen = np.empty(len(labelCodes),dtype=np.int64)
+    firstSeen[order] = np.arange(len(labelCodes))
+    for i in range(nsteps):
+        rows = np.flatnonzero(stepCodes == i)
+        present,first = np.unique(labelCodes[rows],return_index=True)
+        present = present[np.argsort(firstSeen[rows[first]],kind='stable')]
+        codeMap = np.full(len(labels),-1,dtype=np.int64)
+        codeMap[present] = np.arange(len(present))
+        layerCodes[rows] = codeMap[labelCodes[rows]]
+        layerLabels[steps[i]] = labels.take(present).tolist()
+        labelCounts[steps[i]] = np.bincount(layerCodes[rows],minlength=len(present)).astype(np.int64)
+
+    flows = OrderedDict()
+    adjacent = np.flatnonzero(sameEntity & (stepCodes[1:] == stepCodes[:-1] + 1))
+    for i in range(nsteps - 1):
+        pairs = adjacent[stepCodes[adjacent] == i]
+        flows[steps[i]] = _countPairs(layerCodes[pairs],layerCodes[pairs + 1],
+                                      len(layerLabels[steps[i]]),len(layerLabels[steps[i + 1]]),sparse=sparse)
+    return layerLabels,labelCounts,flows
+
+def mapLabels(labels,mapping):
+    """
+    Rename labels by mapping({old label:new label}, labels not in mapping are kept).
+    Returns:
+    -------
+    newLabels:list, the distinct new labels in order of appearance.
+
+    indexMap:int64 array, index of the new label of each label in newLabels, see remapCounts().
+    """
+    renamed = [mapping.get(label,label) for label in labels]
+    newLabels = list(OrderedDict.fromkeys(renamed))
+    position = {label:i for i,label in enumerate(newLabels)}
+    return newLabels,np.array([position[label] for label in renamed],dtype=np.int64)
+
+def remapCounts(layerLabels,labelCounts,flows,newLayerLabels,indexMaps,dtype=np.int64):
+    """
+    Move aggregated counts to new labels, without the rows: reorders labels, and sums up the counts
+    of labels merged into one.
+
+    Parameters:
+    ----------
+    layerLabels,labelCounts,flows:
+        the current labels and counts.
+
+    newLayerLabels:dict
+        the new labels of each layer.
+
+    indexMaps:dict, indexMaps[layer][i] is the index in newLayerLabels[layer] of layerLabels[layer][i].
+
+    dtype:numpy dtype, default=np.int64.
+        dtype of the counts, e.g. float for the variances of estimated counts.
+
+    Returns:
+    -------
+    labelCounts,flows: counts of newLayerLabels.
+    """
+    newCounts = OrderedDict()
+    for layer,labels in newLayerLabels.items():
+        newCounts[layer] = np.bincount(indexMaps[layer],weights=labelCounts[layer],
+                                       minlength=len(labels)).astype(dtype)
+    newFlows = OrderedDict()
+    layers = list(newLayerLabels.keys())
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        nRight = len(newLayerLabels[rightLayer])
+        flow = flows[leftLayer]
+        keys = indexMaps[leftLayer][flow['left']] * nRight + indexMaps[rightLayer][flow['right']]
+        newFlows[leftLayer] = _sumStrips(keys,flow['width'],nRight,dtype=dtype)
+    return newCounts,newFlows
+
+def countCrossings(layerLabels,flows,orders=None):
+    """
+    Weighted number of strip crossings: two strips between the same layers cross if their left labels
+    and their right labels are stacked in opposite orders, weighing width * width. Counted by cumulative
+    sums of the (left,right) matrix of widths, or by a radix partition of the strips if the matrix would
+    be larger than max(DENSE_FLOW_CELLS,strips) cells, as in countFlows().
+
+    Parameters:
+    ----------
+    orders:dict, optional.
+        orders[layer] is the drawing order of the labels(indices in layerLabels[layer]),
+        default to the order of layerLabels.
+
+    Returns:
+    -------
+    crossings:int
+    """
+    layers = list(layerLabels.keys())
+    ranks = OrderedDict()
+    for layer,labels in layerLabels.items():
+        ranks[layer] = np.arange(len(labels))
+        if orders is not None and layer in orders:
+            ranks[layer][np.asarray(orders[layer],dtype=np.int64)] = np.arange(len(labels))
+    crossings = 0
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        flow = flows[leftLayer]
+        left,right = ranks[leftLayer][flow['left']],ranks[rightLayer][flow['right']]
+        nLeft,nRight = len(layerLabels[leftLayer]),len(layerLabels[rightLayer])
+        # dense as in _countPairs.
+        if nLeft * nRight <= max(DENSE_FLOW_CELLS,len(left)):
+            crossings += _denseCrossings(left,right,flow['width'],nLeft,nRight)
+        else:
+            order = np.lexsort((right,left))
+            crossings += _weightedInversions(right[order],flow['width'][order])
+    return crossings
+
+def _denseCrossings(left,right,width,nLeft,nRight):
+    """crossings of the strips from a (nLeft,nRight) matrix of widths, by cumulative sums."""
+    widths = np.bincount(left * nRight + right,weights=width,minlength=nLeft * nRight).reshape(nLeft,nRight)
+    if np.issubdtype(np.asarray(width).dtype,np.integer):
+        widths = widths.astype(np.int64)
+    # widths of the strips from the labels above, to the labels below.
+    above = np.cumsum(widths,axis=0) - widths
+    crossing = np.cumsum(above[:,::-1],axis=1)[:,::-1] - above
+    return (widths * crossing).sum().item()
+
+def _weightedInversions(values,weights):
+    """
+    Sum of weights[i] * weights[j] over i < j with values[i] > values[j](values are non-negative ints),
+    by a radix partition from the highest bit down: a pair is counted at the highest bit their values
+    differ, within the group of elements sharing the bits above it. Each bit takes O(n).
+    """
+    n = len(values)
+    if n < 2:
+        return 0
+    values = np.array(values,dtype=np.int64)
+    weights = np.array(weights)
+    positions = np.arange(n)
+    start = np.empty(n,dtype=bool)
+    total = 0
+    for b in range(int(values.max()).bit_length() - 1,-1,-1):
+        # elements are grouped by their bits above b, in their original order within a group.
+        prefix = values >> (b + 1)
+        start[0] = True
+        np.not_equal(prefix[1:],prefix[:-1],out=start[1:])
+        groupStart = np.maximum.accumulate(np.where(start,positions,0))
+        zero = ((values >> b) & 1) == 0
+        # weights of the earlier elements of the group with bit b set.
+        onesBefore = np.cumsum(np.where(zero,0,weights))
+        onesBefore -= np.where(zero,0,weights)
+        onesBefore -= onesBefore[groupStart]
+        total += np.dot(weights[zero],onesBefore[zero]).item()
+        # stable partition of each group: bit b unset first.
+        zerosBefore = np.cumsum(zero) - zero
+        zerosBefore -= zerosBefore[groupStart]
+        groupId = np.cumsum(start) - 1
+        zerosInGroup = np.bincount(groupId,weights=zero).astype(np.int64)
+        moved = np.where(zero,groupStart + zerosBefore,positions + zerosInGroup[groupId] - zerosBefore)
+        values[moved],weights[moved] = values.copy(),weights.copy()
+    return total
+
+def _stackCenters(order,counts):
+    """center(in [0,1]) of each label(by index) stacked in <order>, by its count."""
+    sizes = counts[order].astype(float)
+    tops = np.cumsum(sizes)
+    centers = np.empty(len(order))
+    centers[order] = (tops - sizes / 2) / max(tops[-1] if len(tops) else 0,1)
+    return centers
+
+def barycenterOrder(layerLabels,labelCounts,flows,layers=None,iterations=4):
+    """
+    Order the labels to reduce strip crossings by the barycenter heuristic, from the aggregated flows only.
+    Sweeping the layers forward then backward, the labels of each layer are sorted by the mean height
+    of the boxes they flow with in the previous(next) layer, weighted by the widths of the strips.
+    The order of the fewest crossings(see countCrossings) is kept. A sweep takes O(strips log strips).
+
+    Parameters:
+    ----------
+    layers:list, optional.
+        Layers whose labels may move, default to all.
+
+    iterations:int, default=4.
+        Number of forward and backward sweeps.
+
+    Returns:
+    -------
+    orders:dict, orders[layer] is the new order of the labels(indices in layerLabels[layer]).
+    """
+    names = list(layerLabels.keys())
+    movable = set(names if layers is None else layers)
+    orders = OrderedDict((layer,np.arange(len(labels))) for layer,labels in layerLabels.items())
+    best,bestCrossings = OrderedDict(orders),countCrossings(layerLabels,flows,orders)
+
+    def sort(layer,neighbor,own,other,width):
+        centers = _stackCenters(orders[neighbor],labelCounts[neighbor])
+        current = _stackCenters(orders[layer],labelCounts[layer])
+        weights = np.bincount(own,weights=width,minlength=len(current))
+        sums = np.bincount(own,weights=width * centers[other],minlength=len(current))
+        # labels without strips keep their height.
+        barycenters = np.where(weights > 0,sums / np.maximum(weights,1e-300),current)
+        orders[layer] = np.lexsort((current,barycenters))
+
+    for iteration in range(iterations):
+        for position in range(1,len(names)):
+            layer,flow = names[position],flows[names[position - 1]]
+            if layer in movable:
+                sort(layer,names[position - 1],flow['right'],flow['left'],flow['width'].astype(float))
+        for position in range(len(names) - 2,-1,-1):
+            layer,flow = names[position],flows[names[position]]
+            if layer in movable:
+                sort(layer,names[position + 1],flow['left'],flow['right'],flow['width'].astype(float))
+        crossings = countCrossings(layerLabels,flows,orders)
+        if crossings < bestCrossings:
+            best,bestCrossings = OrderedDict(orders),crossings
+    return best
+
+def setBoxPos(layerLabels,labelCounts,boxInterv,boxScale=None):
+    """
+    Set y-axis coordinate position for each box.
+
+    Parameters:
+    ----------
+    boxScale:number, optional.
+        The gap between boxes is boxInterv * boxScale, default to boxInterv * the total of each layer.
+
+    Returns:
+    -------
+    boxPos:dict, contain y-axis position of each box.
+    """
+    boxPos = OrderedDict()
+    for layer,labels in layerLabels.items():
+        heights = labelCounts[layer].tolist()
+        interv = boxInterv * (sum(heights) if boxScale is None else boxScale)
+        layerPos = defaultdict(dict)
+        prevLabelTop = None
+        for label,labelHeight in zip(labels,heights):
+            if prevLabelTop is None:
+                layerPos[label]['bottom'] = 0
+            else:
+                layerPos[label]['bottom'] = prevLabelTop + interv
+            layerPos[label]['top'] = layerPos[label]['bottom'] + labelHeight
+            prevLabelTop = layerPos[label]['top']
+        boxPos[layer] = layerPos
+    return boxPos
+
+def setLayerPos(layers,boxWidth,stripLen):
+    """
+    Set x-axis coordinate position for each layer.
+    Returns:
+    --------
+    layerPos:dict, contain x-axis position of each layer.
+    """
+    layerPos = defaultdict(dict)
+    layerStart = 0
+    layerEnd = 0 + boxWidth
+
+    for layer in layers:
+        layerPos[layer]['layerStart'] = layerStart
+        layerPos[layer]['layerEnd'] = layerEnd
+
+        layerStart = (layerEnd + stripLen)
+        layerEnd = (layerStart + boxWidth)
+    return layerPos
+
+def setStripWidth(layerLabels,flows):
+    """
+    Returns:
+    -------
+    stripWidths:nested dict, stripWidths['layer'][leftLabel][rightLabel] = width:
+       <leftLabel> in 'layer' has a link with <rightLabel>(in the next layer) , where the size/width of link equals <width>.
+    """
+    layers = list(layerLabels.keys())
+    stripWidths = defaultdict(lambda: defaultdict(dict))
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        leftLabels = layerLabels[leftLayer]
+        rightLabels = layerLabels[rightLayer]
+        flow = flows[leftLayer]
+        for li,ri,width in zip(flow['left'].tolist(),flow['right'].tolist(),flow['width'].tolist()):
+            stripWidths[leftLayer][leftLabels[li]][rightLabels[ri]] = width
+    return stripWidths
+
+def setStripPos(leftBottom,rightBottom,leftTop,rightTop,kernelSize,stripShrink):
+    """
+    Smooth the strip by convolution, and create array of y values for each strip.
+    """
+    ys_bottom = np.array(50 * [leftBottom] + 50 * [rightBottom])
+    ys_bottom = np.convolve(ys_bottom + stripShrink, (1/kernelSize) * np.ones(kernelSize), mode='valid')
+    ys_bottom = np.convolve(ys_bottom + stripShrink, (1/kernelSize) * np.ones(kernelSize), mode='valid')
+
+    ys_top = np.array(50 * [leftTop] + 50 * [rightTop])
+    ys_top = np.convolve(ys_top - stripShrink, (1/kernelSize) * np.ones(kernelSize), mode='valid')
+    ys_top = np.convolve(ys_top - stripShrink,(1/kernelSize) * np.ones(kernelSize), mode='valid')
+
+    return ys_bottom,ys_top
+
+def _stripProfile(kernelSize):
+    """
+    Smoothed unit step shared by all strips: setStripPos(0,1,0,1,kernelSize,0)[0].
+    As the kernel sums to 1, a strip is leftY + (rightY - leftY) * profile.
+    """
+    step = np.array(50 * [0.] + 50 * [1.])
+    kernel = (1/kernelSize) * np.ones(kernelSize)
+    return np.convolve(np.convolve(step,kernel,mode='valid'),kernel,mode='valid')
+
+def _exclusiveGroupCumsum(groups,values):
+    """For each element, the sum of values of the previous elements in the same group."""
+    if len(values) == 0:
+        return values.copy()
+    order = np.argsort(groups,kind='stable')
+    sorted_values = values[order]
+    csum = np.cumsum(sorted_values) - sorted_values
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True,sorted_groups[1:] != sorted_groups[:-1]])
+    group_offset = np.repeat(csum[starts],np.diff(np.r_[starts,len(values)]))
+    out = np.empty_like(csum)
+    out[order] = csum - group_offset
+    return out
+
+def setStripGeometry(layerLabels,boxPos,layerPos,flows,kernelSize=25,stripShrink=0):
+    """
+    Compute the geometry of all strips, vectorized over the strips of each layer pair.
+    Strips leave a box in the order of the right labels, and enter a box in the order of the left labels.
+    Returns:
+    -------
+    strips:dict, strips[leftLayer] holds the arrays of flows[leftLayer] and
+        'rightLayer':name of the next layer.
+        'leftBottom','leftTop','rightBottom','rightTop':y-axis position of both ends of each strip.
+        'x':x-axis values shared by the strips(from the end of leftLayer to the start of the next layer).
+        'ysBottom','ysTop':2-d arrays(strips x points), smoothed lower/upper edge of each strip.
+    """
+    layers = list(layerLabels.keys())
+    profile = _stripProfile(kernelSize)
+    strips = OrderedDict()
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        flow = flows[leftLayer]
+        left,right = flow['left'],flow['right']
+        width = flow['width'].astype(float)
+        leftBoxBottom = np.array([boxPos[leftLayer][label]['bottom'] for label in layerLabels[leftLayer]],dtype=float)
+        rightBoxBottom = np.array([boxPos[rightLayer][label]['bottom'] for label in layerLabels[rightLayer]],dtype=float)
+
+        leftBottom = leftBoxBottom[left] + _exclusiveGroupCumsum(left,width)
+        rightBottom = rightBoxBottom[right] + _exclusiveGroupCumsum(right,width)
+        leftTop = leftBottom + width
+        rightTop = rightBottom + width
+
+        ysBottom = leftBottom[:,None] + (rightBottom - leftBottom)[:,None] * profile + 2 * stripShrink
+        ysTop = leftTop[:,None] + (rightTop - leftTop)[:,None] * profile - 2 * stripShrink
+
+        strip = dict(flow)
+        strip.update({
+            'rightLayer':rightLayer,
+            'leftBottom':leftBottom,'leftTop':leftTop,
+            'rightBottom':rightBottom,'rightTop':rightTop,
+            'x':np.linspace(layerPos[leftLayer]['layerEnd'],layerPos[rightLayer]['layerStart'],len(profile)),
+            'ysBottom':ysBottom,'ysTop':ysTop})
+        strips[leftLayer] = strip
+    return strips
+
+def boxRecords(layerLabels,labelCounts,boxPos,layerPos):
+    """
+    Returns:
+    -------
+    records:list of dict, one per box, with keys 'layer','label','count','bottom','top','layerStart','layerEnd'.
+    """
+    records = []
+    for layer,labels in layerLabels.items():
+        for label,count in zip(labels,labelCounts[layer].tolist()):
+            records.append({'layer':layer,'label':label,'count':count,
+                            'bottom':boxPos[layer][label]['bottom'],'top':boxPos[layer][label]['top'],
+                            'layerStart':layerPos[layer]['layerStart'],'layerEnd':layerPos[layer]['layerEnd']})
+    return records
+
+def stripRecords(layerLabels,strips,geometry=False):
+    """
+    Returns:
+    -------
+    records:list of dict, one per strip, with keys 'leftLayer','rightLayer','source','target','width',
+        'leftBottom','leftTop','rightBottom','rightTop',
+        and 'x','ysBottom','ysTop'(lists of floats) if geometry is True.
+    """
+    records = []
+    for leftLayer,strip in strips.items():
+        rightLayer = strip['rightLayer']
+        leftLabels = layerLabels[leftLayer]
+        rightLabels = layerLabels[rightLayer]
+        columns = [strip[key].tolist() for key in ('left','right','width','leftBottom','leftTop','rightBottom','rightTop')]
+        x = strip['x'].tolist() if geometry else None
+        for i,(li,ri,width,lb,lt,rb,rt) in enumerate(zip(*columns)):
+            record = {'leftLayer':leftLayer,'rightLayer':rightLayer,
+                      'source':leftLabels[li],'target':rightLabels[ri],'width':width,
+                      'leftBottom':lb,'leftTop':lt,'rightBottom':rb,'rightTop':rt}
+            if geometry:
+                record['x'] = x
+                record['ysBottom'] = strip['ysBottom'][i].tolist()
+                record['ysTop'] = strip['ysTop'][i].tolist()
+            records.append(record)
+    return records
+
+def layout(dataFrame,layerLabels=None,
+           boxInterv=0.02,boxWidth=2,stripLen=10,
+           kernelSize=25,stripShrink=0,geometry=False):
+    """
+    Compute the full layout of a Sankey diagram without plotting.
+
+    Parameters:
+    ----------
+    dataFrame:pd.DataFrame
+        Each row of the dataFrame represents a trans-entity, each column a layer.
+
+    layerLabels:dict
+        Drawing order of the labels in each layer(keys are column names of dataFrame).
+        If not passing, layerLabels would be extracted from the dataFrame.
+
+    boxInterv,boxWidth,stripLen,kernelSize,stripShrink:
+        see Sankey.plot().
+
+    geometry:bool, default=False.
+        If True, the smoothed strip edges are included in the strip records.
+
+    Returns:
+    --------
+    layout:dict, JSON-serializable, with keys
+        'layerLabels':dict of label lists.
+        'boxes':list of box records, see boxRecords().
+        'strips':list of strip records, see stripRecords().
+    """
+    if layerLabels is None:
+        layerLabels = getLayerLabels(dataFrame)
+    else:
+        checkLayerLabelsMatchDF(dataFrame,layerLabels,{layer:layer for layer in dataFrame.columns})
+        layerLabels = OrderedDict((layer,list(layerLabels[layer])) for layer in dataFrame.columns)
+    codes = encodeLayers(dataFrame,layerLabels)
+    labelCounts = countLabels(codes,layerLabels)
+    flows = countFlows(codes,layerLabels)
+
+    boxPos = setBoxPos(layerLabels,labelCounts,boxInterv)
+    layerPos = setLayerPos(layerLabels.keys(),boxWidth,stripLen)
+    strips = setStripGeometry(layerLabels,boxPos,layerPos,flows,kernelSize,stripShrink)
+    return {'layerLabels':OrderedDict((layer,list(labels)) for layer,labels in layerLabels.items()),
+            'boxes':boxRecords(layerLabels,labelCounts,boxPos,layerPos),
+            'strips':stripRecords(layerLabels,strips,geometry=geometry)}
@@ -0,0 +1,174 @@
+"""
+Mergeable aggregated counts of a Sankey diagram, e.g. for map-reduce over partitioned data:
+
+    # on each node
+    counts = FlowCounts.from_frame(partition)
+    payload = json.dumps(counts.to_dict())
+    # centrally
+    total = sum(FlowCounts.from_dict(json.loads(payload)) for payload in payloads)
+    Sankey.from_counts(total).plot()
+"""
+from collections import OrderedDict
+
+import numpy as np
+from . import core
+from . import parallel
+from .core import LabelMismatchError
+
+__all__ = ['FlowCounts']
+
+def _labelKey(label):
+    """Sort key of labels of mixed types."""
+    return (type(label).__name__,label)
+
+def _plain(label):
+    """Python scalar of a numpy label(e.g. np.int64), for serialization."""
+    return label.item() if isinstance(label,np.generic) else label
+
+class FlowCounts:
+    """
+    Label counts of each layer and flows between adjacent layers, without the rows.
+
+    merge() is associative and commutative: labels of both operands are unified, keeping the label
+    order if both have the same labels in the same order, else sorting the labels. So partitions can be
+    counted anywhere and reduced in any order with the same result.
+
+    Parameters:
+    -----------
+    layerLabels:dict
+        Labels of each layer, in the order of layers, e.g. {'First':['a','b'],'Last':['b','c']}.
+
+    labelCounts:dict
+        labelCounts[layer][i] is the number of rows labeled layerLabels[layer][i].
+
+    flows:dict
+        flows[leftLayer] holds the strips between leftLayer and the next layer, as arrays 'left','right'
+        (label indices) and 'width', see pysankey2.core.countFlows.
+    """
+    def __init__(self,layerLabels,labelCounts,flows):
+        self.layerLabels = OrderedDict((layer,list(labels)) for layer,labels in layerLabels.items())
+        self.labelCounts = OrderedDict()
+        for layer,labels in self.layerLabels.items():
+            counts = np.asarray(labelCounts[layer],dtype=np.int64)
+            if counts.shape != (len(labels),):
+                raise ValueError("labelCounts of {0} do not match its {1} labels.".format(layer,len(labels)))
+            self.labelCounts[layer] = counts
+        layers = self.layers
+        self.flows = OrderedDict()
+        for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+            nRight = len(self.layerLabels[rightLayer])
+            flow = {key:np.asarray(flows[leftLayer][key],dtype=np.int64) for key in ('left','right','width')}
+            # sorted by (left,right) with unique strips.
+            self.flows[leftLayer] = core._sumStrips(flow['left'] * nRight + flow['right'],flow['width'],nRight)
+
+    @classmethod
+    def from_frame(cls,dataFrame,layerLabels=None,n_jobs=None):
+        """
+        Count a dataFrame(each row represents a trans-entity, each column a layer).
+
+        Parameters:
+        ----------
+        layerLabels:dict, optional.
+            Labels of each column, extracted from the dataFrame if not passing.
+
+        n_jobs:int, optional.
+            Number of processes, see pysankey2.parallel.aggregate.
+        """
+        if layerLabels is None:
+            layerLabels = core.getLayerLabels(dataFrame)
+        else:
+            core.checkLayerLabelsMatchDF(dataFrame,layerLabels,{layer:layer for layer in dataFrame.columns})
+            layerLabels = OrderedDict((layer,list(layerLabels[layer])) for layer in dataFrame.columns)
+        labelCounts,flows = parallel.aggregate(dataFrame,layerLabels,n_jobs=n_jobs)
+        return cls(layerLabels,labelCounts,flows)
+
+    @property
+    def layers(self):
+        """list, names of the layers."""
+        return list(self.layerLabels.keys())
+
+    def merge(self,other):
+        """
+        Sum up two counts of the same layers.
+        Returns:
+        -------
+        FlowCounts, with the union of the labels of each layer.
+        """
+        if self.layers != other.layers:
+            raise LabelMismatchError("Layers {0} do not match with {1}".format(self.layers,other.layers))
+        layerLabels = OrderedDict()
+        for layer in self.layers:
+            labels,otherLabels = self.layerLabels[layer],other.layerLabels[layer]
+            if labels != otherLabels:
+                labels = sorted(set(labels) | set(otherLabels),key=_labelKey)
+            layerLabels[layer] = labels
+
+        merged = []
+        for counts in (self,other):
+            indexMaps = OrderedDict()
+            for layer,labels in layerLabels.items():
+                position = {label:i for i,label in enumerate(labels)}
+                indexMaps[layer] = np.array([position[label] for label in counts.layerLabels[layer]],dtype=np.int64)
+            merged.append(core.remapCounts(counts.layerLabels,counts.labelCounts,counts.flows,layerLabels,indexMaps))
+        (labelCounts,flows),(otherCounts,otherFlows) = merged
+        labelCounts = OrderedDict((layer,labelCounts[layer] + otherCounts[layer]) for layer in layerLabels)
+        return FlowCounts(layerLabels,labelCounts,core.mergeFlows(flows,otherFlows,layerLabels))
+
+    def _compact(self):
+        """FlowCounts without the labels of no rows, keeping the order of the other labels."""
+        layerLabels,labelCounts,indexMaps = OrderedDict(),OrderedDict(),OrderedDict()
+        for layer,labels in self.layerLabels.items():
+            keep = self.labelCounts[layer] > 0
+            layerLabels[layer] = [label for label,kept in zip(labels,keep.tolist()) if kept]
+            labelCounts[layer] = self.labelCounts[layer][keep]
+            indexMaps[layer] = np.cumsum(keep) - 1
+        layers = self.layers
+        flows = OrderedDict()
+        for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+            flow = self.flows[leftLayer]
+            flows[leftLayer] = {'left':indexMaps[leftLayer][flow['left']],'right':indexMaps[rightLayer][flow['right']],
+                                'width':flow['width']}
+        return FlowCounts(layerLabels,labelCounts,flows)
+
+    def __add__(self,other):
+        return self.merge(other)
+
+    def __radd__(self,other):
+        # sum() starts from 0.
+        if isinstance(other,int) and other == 0:
+            return self
+        return NotImplemented
+
+    def __eq__(self,other):
+        if not isinstance(other,FlowCounts):
+            return NotImplemented
+        return (self.layerLabels == other.layerLabels
+                and all(np.array_equal(self.labelCounts[layer],other.labelCounts[layer]) for layer in self.layers)
+                and all(np.array_equal(self.flows[layer][key],other.flows[layer][key])
+                        for layer in self.flows for key in ('left','right','width')))
+
+    def to_dict(self):
+        """
+        Returns:
+        -------
+        dict of lists and python scalars(JSON-ready):
+            {'layers':[{'name':layer,'labels':[...],'counts':[...]},...],
+             'flows':[{'left':[...],'right':[...],'width':[...]},...](one per pair of adjacent layers)}
+        """
+        return {'layers':[{'name':_plain(layer),'labels':[_plain(label) for label in labels],
+                           'counts':self.labelCounts[layer].tolist()}
+                          for layer,labels in self.layerLabels.items()],
+                'flows':[{key:flow[key].tolist() for key in ('left','right','width')}
+                         for flow in self.flows.values()]}
+
+    @classmethod
+    def from_dict(cls,data):
+        """Inverse of to_dict()."""
+        layers = [layer['name'] for layer in data['layers']]
+        layerLabels = OrderedDict((layer['name'],layer['labels']) for layer in data['layers'])
+        labelCounts = {layer['name']:layer['counts'] for layer in data['layers']}
+        return cls(layerLabels,labelCounts,dict(zip(layers[:-1],data['flows'])))
+
+    def __repr__(self):
+        return "FlowCounts({0})".format(", ".join("%s:%d labels,%d rows"%(layer,len(labels),self.labelCounts[layer].sum())
+                                                  for layer,labels in self.layerLabels.items()))
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from os.path import dirname
 def load_fruits():
@@ -5,3 +6,88 @@ def load_fruits():
 def load_countrys():
     return pd.read_csv(dirname(__file__) + "/test/data/countrys.txt",sep="\t",header=None,names=['layer1', 'layer2','layer3'])
 
+# resolution of the inverse-cdf lookup table used for sampling.
+_ZIPF_TABLE_SIZE = 1 << 20
+
+def _zipfSample(rng,n,size,skew):
+    """
+    Draw <size> int32 codes in [0,n), code k with probability proportional to (k + 1) ** -skew.
+    Sampling goes through an inverse-cdf lookup table, exact up to 1/_ZIPF_TABLE_SIZE, which is
+    much faster than a binary search per draw.
+    """
+    cdf = np.cumsum(1.0 / np.arange(1,n + 1) ** skew)
+    cdf /= cdf[-1]
+    table = np.searchsorted(cdf,np.arange(_ZIPF_TABLE_SIZE) / _ZIPF_TABLE_SIZE,side='right').astype(np.int32)
+    np.minimum(table,n - 1,out=table)
+    return table[rng.integers(0,_ZIPF_TABLE_SIZE,size)]
+
+def make_flows(n_rows,n_layers=3,labels_per_layer=10,skew=1.0,nan_rate=0.0,dtype="object",density=1.0,seed=0):
+    """
+    Generate a synthetic multi-layer dataFrame with heavy-tailed flows, e.g. for benchmarks and bug reports.
+
+    Parameters:
+    ----------
+    n_rows:int
+        Number of entities(rows).
+
+    n_layers:int, default=3.
+        Number of layers(columns), named 'layer1','layer2',...
+
+    labels_per_layer:int or list of int, default=10.
+        Number of labels in each layer. Labels are named 'label0','label1',... and shared across layers.
+
+    skew:float, default=1.0.
+        Zipf exponent of label popularity and of transitions, 0 means uniform.
+
+    nan_rate:float, default=0.
+        Probability that an entity drops out between two layers,
+        dropped entities are NaN in all following layers.
+
+    dtype:str, default="object".
+        "object": columns of python str.
+        "category": pd.Categorical columns, much cheaper to build and to hold for large n_rows.
+
+    density:float, default=1.0.
+        Fraction of the labels of the next layer that each label flows to(sparsity of the flows).
+
+    seed:int, default=0.
+        Seed of the random generator, the same arguments always give the same dataFrame.
+
+    Returns:
+    --------
+    pd.DataFrame of shape (n_rows,n_layers).
+    """
+    if dtype not in ("object","category"):
+        raise ValueError("dtype must be one of:object,category")
+    if not 0 <= nan_rate < 1:
+        raise ValueError("nan_rate must be in [0,1).")
+    if not 0 < density <= 1:
+        raise ValueError("density must be in (0,1].")
+    if isinstance(labels_per_layer,int):
+        labels_per_layer = [labels_per_layer] * n_layers
+    if len(labels_per_layer) != n_layers:
+        raise ValueError("labels_per_layer must be an int or a list of n_layers ints.")
+
+    rng = np.random.default_rng(seed)
+    nlabels = labels_per_layer[0]
+    codes = _zipfSample(rng,nlabels,n_rows,skew)
+    alive = np.ones(n_rows,dtype=bool)
+
+    columns = {}
+    for i in range(n_layers):
+        if i > 0:
+            # each label flows to <fanout> labels of the next layer, starting at a random offset,
+            # the nearest ones being the most frequent.
+            prev_nlabels,nlabels = nlabels,labels_per_layer[i]
+            fanout = max(1,int(round(density * nlabels)))
+            shift = rng.integers(0,nlabels,prev_nlabels).astype(np.int32)
+            step = _zipfSample(rng,fanout,n_rows,skew)
+            codes = (shift[codes] + step) % nlabels
+            if nan_rate > 0:
+                alive &= rng.random(n_rows) >= nan_rate
+        layer_codes = np.where(alive,codes,-1)
+        layer = pd.Categorical.from_codes(layer_codes,categories=['label%d'%j for j in range(nlabels)])
+        if dtype == "object":
+            layer = np.asarray(layer,dtype=object)
+        columns['layer%d'%(i+1)] = layer
+    return pd.DataFrame(columns)
@@ -0,0 +1,101 @@
+"""
+Adjacency index of the flows of a Sankey diagram, for "which flows pass through label X" queries.
+
+The strips of each pair of layers are sorted by (left,right), so the out-edges of a label are a
+contiguous run of strips, found from offsets(as in a CSR matrix). In-edges are indexed the same
+way through the strips sorted by right label. Flows further away from the label depend on the rows
+that pass through it, which are given by the distinct paths of the rows through all layers
+(see pysankey2.core.countPaths), counted once; without them only the adjacent strips are known.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from . import core
+
+__all__ = ['FlowIndex']
+
+class FlowIndex:
+    """
+    Parameters:
+    -----------
+    layerLabels,flows:
+        see pysankey2.core.aggregate().
+
+    paths,pathCounts:arrays, optional.
+        The distinct paths of the rows and their number of rows, see pysankey2.core.countPaths().
+    """
+    def __init__(self,layerLabels,flows,paths=None,pathCounts=None):
+        self.layers = list(layerLabels.keys())
+        self._layerLabels = layerLabels
+        self._flows = flows
+        self._paths = paths
+        self._pathCounts = pathCounts
+        self._out,self._in = OrderedDict(),OrderedDict()
+        for leftLayer,rightLayer in zip(self.layers[:-1],self.layers[1:]):
+            flow = flows[leftLayer]
+            self._out[leftLayer] = np.searchsorted(flow['left'],np.arange(len(layerLabels[leftLayer]) + 1))
+            order = np.argsort(flow['right'],kind='stable')
+            self._in[rightLayer] = (order,np.searchsorted(flow['right'][order],np.arange(len(layerLabels[rightLayer]) + 1)))
+
+    @property
+    def hasPaths(self):
+        """bool, whether flows that are not adjacent to a label are known."""
+        return self._paths is not None
+
+    def outEdges(self,layer,label):
+        """indices of the strips of flows[layer] leaving label(its index in layerLabels[layer])."""
+        if layer not in self._out:
+            return np.empty(0,dtype=np.int64)
+        offsets = self._out[layer]
+        return np.arange(offsets[label],offsets[label + 1])
+
+    def inEdges(self,layer,label):
+        """indices of the strips of flows[previous layer] entering label(its index in layerLabels[layer])."""
+        if layer not in self._in:
+            return np.empty(0,dtype=np.int64)
+        order,offsets = self._in[layer]
+        return order[offsets[label]:offsets[label + 1]]
+
+    def through(self,selection):
+        """
+        Flows of the rows passing through any of the selected labels.
+
+        Parameters:
+        ----------
+        selection:dict, {layer:indices of labels in layerLabels[layer]}.
+
+        Returns:
+        -------
+        dict, {leftLayer:(strips,widths)}, indices of the strips of flows[leftLayer] and the number of their rows
+            passing through the selection. Without paths, only the strips adjacent to the labels are given(whole).
+        """
+        if self._paths is None:
+            strips = OrderedDict((layer,[]) for layer in self.layers[:-1])
+            for layer,labels in selection.items():
+                position = self.layers.index(layer)
+                for label in np.asarray(labels,dtype=np.int64).tolist():
+                    if layer in self._out:
+                        strips[layer].append(self.outEdges(layer,label))
+                    if position > 0:
+                        strips[self.layers[position - 1]].append(self.inEdges(layer,label))
+            result = OrderedDict()
+            for layer,parts in strips.items():
+                indices = np.unique(np.concatenate(parts)).astype(np.int64) if parts else np.empty(0,dtype=np.int64)
+                result[layer] = (indices,self._flows[layer]['width'][indices])
+            return result
+
+        mask = np.zeros(len(self._paths),dtype=bool)
+        for layer,labels in selection.items():
+            mask |= np.isin(self._paths[:,self.layers.index(layer)],labels)
+        paths,counts = self._paths[mask],self._pathCounts[mask]
+        result = OrderedDict()
+        for position,(leftLayer,rightLayer) in enumerate(zip(self.layers[:-1],self.layers[1:])):
+            left,right = paths[:,position],paths[:,position + 1]
+            valid = (left >= 0) & (right >= 0)
+            nRight = len(self._layerLabels[rightLayer])
+            strips = core._sumStrips(left[valid] * nRight + right[valid],counts[valid],nRight)
+            flow = self._flows[leftLayer]
+            # strips are sorted by (left,right), as the flows.
+            indices = np.searchsorted(flow['left'] * nRight + flow['right'],strips['left'] * nRight + strips['right'])
+            result[leftLayer] = (indices.astype(np.int64),strips['width'])
+        return result
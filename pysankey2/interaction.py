@@ -0,0 +1,120 @@
+"""
+Hit-testing of a laid out Sankey diagram, e.g. for hover tooltips and picking.
+
+The x-axis is split into the columns of the layers(boxes) and the gaps between them(strips),
+found by bisection. Boxes of a layer are stacked, so the box under a point is found by bisection
+of their bottoms. Strips cross each other within a gap: at each x-axis point of the strip geometry,
+their edges split the y-axis into elementary intervals, each holding the topmost(last drawn) strip
+covering it. These intervals are built on the first query at that point, later queries bisect them.
+So a query takes logarithmic time in the number of boxes and strips.
+"""
+import numpy as np
+
+__all__ = ['PickIndex']
+
+class PickIndex:
+    """
+    Spatial index of the boxes and strips of a layout(see pysankey2.core.setStripGeometry).
+
+    Parameters:
+    -----------
+    layerLabels,boxPos,layerPos,strips:
+        The layout of Sankey.plot().
+
+    labelCounts:dict
+        labelCounts[layer][i] is the number of rows labeled layerLabels[layer][i].
+
+    layerNames:dict, optional.
+        Names of the layers in the records, default to the layer keys.
+    """
+    def __init__(self,layerLabels,labelCounts,boxPos,layerPos,strips,layerNames=None):
+        self._layers = list(layerLabels.keys())
+        self._layerLabels = layerLabels
+        self._labelCounts = labelCounts
+        self._strips = strips
+        self._names = layerNames if layerNames is not None else {layer:layer for layer in self._layers}
+        # start and end of each layer, in x order.
+        self._edges = np.array([[layerPos[layer]['layerStart'],layerPos[layer]['layerEnd']] for layer in self._layers],
+                               dtype=float).ravel()
+        self._boxes = {}
+        for layer,labels in layerLabels.items():
+            self._boxes[layer] = (np.array([boxPos[layer][label]['bottom'] for label in labels],dtype=float),
+                                  np.array([boxPos[layer][label]['top'] for label in labels],dtype=float))
+        # elementary intervals of the strips, by (leftLayer,point).
+        self._intervals = {}
+
+    def pick(self,x,y):
+        """
+        Returns:
+        -------
+        record:dict of the box or strip at (x,y)(the topmost strip if they overlap), None if none.
+            box:{'type':'box','layer','label','count','index'}
+            strip:{'type':'strip','layer','rightLayer','source','target','width','index'}
+            'index' is the position of the box in layerLabels[layer], or of the strip in strips[layer].
+        """
+        column = int(np.searchsorted(self._edges,x,side='right')) - 1
+        if column < 0 or x > self._edges[-1]:
+            return None
+        layer = self._layers[column // 2]
+        if column % 2 == 0 or x == self._edges[column]:
+            return self._pickBox(layer,y)
+        return self._pickStrip(layer,x,y)
+
+    def _pickBox(self,layer,y):
+        bottoms,tops = self._boxes[layer]
+        i = int(np.searchsorted(bottoms,y,side='right')) - 1
+        if i < 0 or y > tops[i]:
+            return None
+        label = self._layerLabels[layer][i]
+        return {'type':'box','layer':self._names[layer],'label':label,
+                'count':int(self._labelCounts[layer][i]),'index':i}
+
+    def _pickStrip(self,layer,x,y):
+        strip = self._strips[layer]
+        xs = strip['x']
+        point = int(round((x - xs[0]) / (xs[-1] - xs[0]) * (len(xs) - 1))) if xs[-1] > xs[0] else 0
+        point = min(max(point,0),len(xs) - 1)
+        key = (layer,point)
+        if key not in self._intervals:
+            self._intervals[key] = _coverIntervals(strip['ysBottom'][:,point],strip['ysTop'][:,point])
+        edges,cover = self._intervals[key]
+        k = int(np.searchsorted(edges,y,side='right')) - 1
+        if k == len(edges) - 1 and len(edges) and y == edges[-1]:
+            k -= 1
+        if k < 0 or k >= len(cover) or cover[k] < 0:
+            return None
+        i = int(cover[k])
+        return {'type':'strip','layer':self._names[layer],'rightLayer':self._names[strip['rightLayer']],
+                'source':self._layerLabels[layer][strip['left'][i]],
+                'target':self._layerLabels[strip['rightLayer']][strip['right'][i]],
+                'width':strip['width'][i].item(),'index':i}
+
+def _coverIntervals(bottoms,tops):
+    """
+    Split the y-axis by the edges of the intervals [bottoms[i],tops[i]].
+    Returns:
+    -------
+    edges:sorted array of the edges.
+
+    cover:array, cover[k] is the largest i whose interval covers [edges[k],edges[k+1]], -1 for none.
+    """
+    edges = np.unique(np.concatenate([bottoms,tops]))
+    low = np.searchsorted(edges,bottoms).tolist()
+    high = np.searchsorted(edges,tops).tolist()
+    cover = np.full(max(len(edges) - 1,0),-1,dtype=np.int64)
+    # nextFree[k] leads to the first interval not covered yet from k, painting from the topmost strip down.
+    nextFree = list(range(len(edges)))
+    def find(k):
+        root = k
+        while nextFree[root] != root:
+            root = nextFree[root]
+        while nextFree[k] != root:
+            nextFree[k],k = root,nextFree[k]
+        return root
+    for i in range(len(low) - 1,-1,-1):
+        k = find(low[i])
+        while k < high[i]:
+            cover[k] = i
+            nextFree[k] = k + 1
+            k = find(k + 1)
+    return edges,cover
@@ -0,0 +1,115 @@
+"""
+Memory-budget-aware planning of the stages of a Sankey diagram.
+
+The footprint of each stage is estimated from the number of rows, the dtypes of the
+dataFrame and the label cardinality, and the cheapest strategy that fits in the budget
+is picked:
+    'copy'      : 'deep'(copy the dataFrame) or 'shallow'(share the data of the caller's dataFrame).
+    'labels'    : 'perColumn'(unique labels of one column at a time).
+    'aggregate' : 'inMemory'(encode all rows at once) or 'chunked'(encode and count chunks of rows),
+                  with dense or sparse counting of the flows.
+The budget covers the memory pySankey2 allocates on top of the input dataFrame.
+"""
+import re
+import warnings
+from collections import OrderedDict
+
+__all__ = ['parseBytes','formatBytes','frameBytes','planLoad','planAggregate']
+
+_UNITS = {'':1,'b':1,
+          'k':1 << 10,'kb':1 << 10,'kib':1 << 10,
+          'm':1 << 20,'mb':1 << 20,'mib':1 << 20,
+          'g':1 << 30,'gb':1 << 30,'gib':1 << 30,
+          't':1 << 40,'tb':1 << 40,'tib':1 << 40}
+
+# Bytes allocated per cell/row by each stage, measured with tracemalloc on object and categorical
+# columns(rounded up).
+UNIQUE_ROW_BYTES = 32       # hash table and result of unique() on one column.
+CODE_CELL_BYTES = 8         # int64 label code of a cell.
+ENCODE_ROW_BYTES = 32       # temporaries of pd.Categorical on one column.
+PAIR_ROW_BYTES = 20         # valid mask, pair keys and the np.unique sort of one layer pair.
+DENSE_CELL_BYTES = 8        # one (leftLabel,rightLabel) counter of a dense bincount.
+STRIP_BYTES = 48            # (left,right,width) of a strip, and the temporaries of merging.
+
+# Chunks are not made smaller than this number of rows.
+MIN_CHUNK_ROWS = 10000
+
+def parseBytes(size):
+    """
+    Parse a memory size such as 2147483648, "2GB", "512 MiB" or "1.5g"(units are powers of 1024).
+    """
+    if isinstance(size,(int,float)):
+        return int(size)
+    match = re.match(r'^\s*([0-9]*\.?[0-9]+)\s*([a-zA-Z]*)\s*$',str(size))
+    if match is None or match.group(2).lower() not in _UNITS:
+        raise ValueError("Invalid memory size:{0}".format(size))
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+def formatBytes(size):
+    """Format a number of bytes, e.g. 1536 -> '1.5KB'."""
+    for unit in ('B','KB','MB','GB'):
+        if abs(size) < 1024:
+            return "%.1f%s"%(size,unit) if unit != 'B' else "%d%s"%(size,unit)
+        size /= 1024
+    return "%.1fTB"%size
+
+def frameBytes(dataFrame):
+    """
+    Bytes of the arrays of the dataFrame, i.e. the cost of a deep copy
+    (python objects referenced by object columns are shared, not copied).
+    """
+    return int(dataFrame.memory_usage(index=True,deep=False).sum())
+
+def planLoad(dataFrame,budget):
+    """
+    Plan the stages run at construction.
+    Returns:
+    -------
+    plan:dict, plan[stage] = {'strategy':...,'estimatedBytes':...}, for stages 'copy' and 'labels'.
+    """
+    nrows = len(dataFrame)
+    plan = OrderedDict()
+
+    copyBytes = frameBytes(dataFrame)
+    # the copy lives as long as the Sankey, leave at least half of the budget to the other stages.
+    if copyBytes <= budget / 2:
+        plan['copy'] = {'strategy':'deep','estimatedBytes':copyBytes}
+        budget -= copyBytes
+    else:
+        plan['copy'] = {'strategy':'shallow','estimatedBytes':0}
+
+    plan['labels'] = {'strategy':'perColumn','estimatedBytes':UNIQUE_ROW_BYTES * nrows}
+    return plan
+
+def planAggregate(nrows,layerSizes,budget):
+    """
+    Plan the aggregation of <nrows> rows over layers with <layerSizes> labels each.
+    Returns:
+    -------
+    plan:dict, {'strategy':'inMemory' or 'chunked','chunkSize':int or None,'sparse':bool,'estimatedBytes':int}
+    """
+    nlayers = len(layerSizes)
+    pairCells = [nLeft * nRight for nLeft,nRight in zip(layerSizes[:-1],layerSizes[1:])]
+    resultBytes = STRIP_BYTES * sum(min(nrows,cells) for cells in pairCells)
+    rowBytes = CODE_CELL_BYTES * nlayers + ENCODE_ROW_BYTES + PAIR_ROW_BYTES
+
+    def chunkBytes(rows,sparse):
+        # a layer pair is counted at a time, so only the largest dense counter is alive.
+        cells = 0 if sparse else DENSE_CELL_BYTES * max(pairCells,default=0)
+        return rowBytes * rows + cells + resultBytes
+
+    for sparse in (False,True):
+        if chunkBytes(nrows,sparse) <= budget:
+            return {'strategy':'inMemory','chunkSize':None,'sparse':sparse,
+                    'estimatedBytes':chunkBytes(nrows,sparse)}
+    for sparse in (False,True):
+        chunkSize = int((budget - chunkBytes(0,sparse)) // rowBytes)
+        if chunkSize >= MIN_CHUNK_ROWS:
+            return {'strategy':'chunked','chunkSize':chunkSize,'sparse':sparse,
+                    'estimatedBytes':chunkBytes(chunkSize,sparse)}
+
+    chunkSize = min(nrows,MIN_CHUNK_ROWS)
+    estimated = chunkBytes(chunkSize,True)
+    warnings.warn("Aggregation needs about {0}, more than the memory budget of {1}."
+                  .format(formatBytes(estimated),formatBytes(budget)))
+    return {'strategy':'chunked','chunkSize':chunkSize,'sparse':True,'estimatedBytes':estimated}
@@ -0,0 +1,130 @@
+"""
+Multi-process aggregation of labels and flows.
+
+Rows are encoded into an int32 array of label codes(layers x rows) in shared memory, so
+the data is never pickled to the workers. The workers then count the labels of each layer
+and the flows of each layer pair over row partitions, and the partial counts are merged.
+Where processes are forked(Linux), the encoding is also split over the workers, which
+inherit the dataFrame; elsewhere the codes are encoded by the calling process.
+"""
+import os
+import sys
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from . import core
+
+__all__ = ['resolveJobs','aggregate']
+
+# Below this number of rows, starting processes costs more than it saves.
+MIN_PARALLEL_ROWS = 1 << 17
+
+# state of the workers, see _attach().
+_frame = None
+_shm = None
+_codes = None
+
+def resolveJobs(n_jobs):
+    """
+    Number of processes for <n_jobs>: None or 1 means 1, -1 means all cpus, -2 all cpus but one, etc.
+    """
+    if n_jobs is None:
+        return 1
+    ncpus = os.cpu_count() or 1
+    if n_jobs < 0:
+        return max(1,ncpus + 1 + n_jobs)
+    if n_jobs == 0:
+        raise ValueError("n_jobs must not be 0.")
+    return n_jobs
+
+def _sharedMemory(name):
+    from multiprocessing import shared_memory
+    try:
+        # python >= 3.13, the creating process owns(and unlinks) the segment.
+        return shared_memory.SharedMemory(name=name,track=False)
+    except TypeError:
+        # workers share the resource tracker of the creating process, which unlinks the segment.
+        return shared_memory.SharedMemory(name=name)
+
+def _attach(name,shape):
+    """Worker initializer: map the shared codes."""
+    global _shm,_codes
+    _shm = _sharedMemory(name)
+    _codes = np.ndarray(shape,dtype=np.int32,buffer=_shm.buf)
+
+def _encodeTask(task):
+    """Encode rows [start,stop) of a layer of the inherited dataFrame into the shared codes."""
+    i,layer,labels,start,stop = task
+    cat = pd.Categorical(_frame.loc[:,layer].iloc[start:stop],categories=labels)
+    _codes[i,start:stop] = cat.codes
+
+def _countTask(task):
+    """Count the labels of layer i(if nRight is None) or the flows of layers i and i+1, over rows [start,stop)."""
+    i,start,stop,nLeft,nRight,sparse = task
+    left = _codes[i,start:stop]
+    if nRight is None:
+        return np.bincount(left[left >= 0],minlength=nLeft).astype(np.int64)
+    return core._countPairs(left,_codes[i + 1,start:stop],nLeft,nRight,sparse=sparse)
+
+def _partitions(nrows,nparts):
+    bounds = np.linspace(0,nrows,nparts + 1).astype(int)
+    return list(zip(bounds[:-1].tolist(),bounds[1:].tolist()))
+
+def aggregate(dataFrame,layerLabels,n_jobs=None,sparse=None):
+    """
+    Count labels and flows of the dataFrame with <n_jobs> processes(see resolveJobs),
+    splitting the work by layer and layer pair and by row partition.
+
+    Returns:
+    -------
+    labelCounts,flows: see core.aggregate().
+    """
+    global _frame
+    njobs = resolveJobs(n_jobs)
+    nrows = len(dataFrame)
+    if njobs <= 1 or nrows < MIN_PARALLEL_ROWS:
+        return core.aggregate(dataFrame,layerLabels,sparse=sparse)
+
+    from multiprocessing import shared_memory
+    layers = list(layerLabels.keys())
+    sizes = [len(layerLabels[layer]) for layer in layers]
+    shape = (len(layers),nrows)
+    parts = _partitions(nrows,njobs)
+    fork = sys.platform.startswith('linux')
+    context = multiprocessing.get_context('fork' if fork else None)
+
+    shm = shared_memory.SharedMemory(create=True,size=max(1,4 * len(layers) * nrows))
+    codes = np.ndarray(shape,dtype=np.int32,buffer=shm.buf)
+    try:
+        if fork:
+            _frame = dataFrame
+        else:
+            for i,(layer,labels) in enumerate(layerLabels.items()):
+                codes[i] = pd.Categorical(dataFrame.loc[:,layer],categories=labels).codes
+        with ProcessPoolExecutor(njobs,mp_context=context,initializer=_attach,initargs=(shm.name,shape)) as pool:
+            if fork:
+                list(pool.map(_encodeTask,[(i,layer,layerLabels[layer],start,stop)
+                                           for i,layer in enumerate(layers) for start,stop in parts]))
+            labelTasks = [(i,start,stop,sizes[i],None,sparse) for i in range(len(layers)) for start,stop in parts]
+            pairTasks = [(i,start,stop,sizes[i],sizes[i + 1],sparse) for i in range(len(layers) - 1) for start,stop in parts]
+            results = list(pool.map(_countTask,labelTasks + pairTasks))
+    finally:
+        _frame = None
+        del codes
+        shm.close()
+        shm.unlink()
+
+    nparts = len(parts)
+    labelCounts = OrderedDict()
+    for i,layer in enumerate(layers):
+        labelCounts[layer] = np.sum(results[i * nparts:(i + 1) * nparts],axis=0)
+    flows = OrderedDict()
+    pairResults = results[len(layers) * nparts:]
+    for i,layer in enumerate(layers[:-1]):
+        partial = pairResults[i * nparts:(i + 1) * nparts]
+        keys = np.concatenate([flow['left'] * sizes[i + 1] + flow['right'] for flow in partial])
+        flows[layer] = core._sumStrips(keys,np.concatenate([flow['width'] for flow in partial]),sizes[i + 1])
+    return labelCounts,flows
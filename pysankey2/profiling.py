@@ -0,0 +1,98 @@
+"""
+Low-overhead per-stage timing and counters of a Sankey diagram.
+
+Each stage(copying the dataFrame, label discovery, aggregation, box/strip layout,
+artist creation, savefig...) is recorded with its wall time and counters:
+    'rows'   : rows scanned.
+    'boxes'  : boxes laid out.
+    'strips' : strips laid out.
+    'artists': matplotlib artists created.
+    'peakBytes': peak memory allocated during the stage(only if memory is tracked, see Profile).
+Stages are also logged at DEBUG level on the 'pysankey2' logger.
+"""
+import logging
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+__all__ = ['Profile']
+
+logger = logging.getLogger('pysankey2')
+
+_COUNTERS = ('seconds','rows','boxes','strips','artists')
+
+class Profile:
+    """
+    Records of the stages of one Sankey operation(construction or plot), in execution order.
+
+    Parameters:
+    -----------
+    callback:callable, optional.
+        Called as callback(stage,record) when each stage ends, e.g. to send metrics.
+
+    trackMemory:bool, default=False.
+        If True, the peak memory of each stage is measured with tracemalloc,
+        which slows allocations down while a stage runs.
+    """
+    def __init__(self,callback=None,trackMemory=False):
+        self._callback = callback
+        self._trackMemory = trackMemory
+        self.stages = OrderedDict()
+
+    @contextmanager
+    def stage(self,name,**fields):
+        """
+        Time the enclosed block as stage <name>, the yielded record dict(initialized with <fields>) takes the counters.
+        A stage entered twice accumulates time and counters.
+        """
+        record = dict(fields)
+        if self._trackMemory:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            elif hasattr(tracemalloc,'reset_peak'):
+                tracemalloc.reset_peak()
+            baseBytes = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self._trackMemory:
+                record['peakBytes'] = tracemalloc.get_traced_memory()[1] - baseBytes
+                if started:
+                    tracemalloc.stop()
+            if name in self.stages:
+                for key,value in record.items():
+                    if key == 'peakBytes':
+                        self.stages[name][key] = max(self.stages[name].get(key,0),value)
+                    elif key in _COUNTERS:
+                        self.stages[name][key] = self.stages[name].get(key,0) + value
+            else:
+                self.stages[name] = record
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("stage %s: %s",name,
+                             ", ".join("%s=%s"%(key,value) for key,value in record.items()))
+            if self._callback is not None:
+                self._callback(name,record)
+
+    @property
+    def seconds(self):
+        """float, total wall time of the stages."""
+        return sum(record['seconds'] for record in self.stages.values())
+
+    def records(self):
+        """
+        Returns:
+        -------
+        list of dict, one per stage with key 'stage' and its counters, e.g. to build a pd.DataFrame.
+        """
+        return [dict(stage=name,**record) for name,record in self.stages.items()]
+
+    def __repr__(self):
+        lines = ["Profile(%.4fs)"%self.seconds]
+        for name,record in self.stages.items():
+            counters = ", ".join("%s=%s"%(key,value) for key,value in record.items() if key != 'seconds')
+            lines.append("  %-14s %.4fs %s"%(name,record['seconds'],counters))
+        return "\n".join(lines)
@@ -1,23 +1,35 @@
 from collections import defaultdict
 from collections import OrderedDict
 from copy import deepcopy
-import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib.colors import to_hex
+import io
 
 import numpy as np
 import pandas as pd
 import math
-from .utils import setColorConf,listRemoveNAN
+from .utils import setColorConf
+from . import core
+from .core import SankeyException,LabelMismatchError
+from .counts import FlowCounts
+from .profiling import Profile
+from . import memory
+from . import parallel
+from . import sampling
+from .interaction import PickIndex
+from .flowindex import FlowIndex
 
-__all__ = ['Sankey','LabelMismatchError']
+# size(inches) and resolution of the previews of notebooks, see Sankey._preview.
+PREVIEW_SIZE = (6,6)
+PREVIEW_DPI = 50
+# strips of less pixels are left out of the previews, and at most PREVIEW_MAX_STRIPS per layer pair are drawn.
+PREVIEW_MIN_PIXELS = 0.25
+PREVIEW_MAX_STRIPS = 1000
+# boxes of less pixels have no label in the previews.
+PREVIEW_FONT_PIXELS = 6
 
-class SankeyException(Exception):
-    pass
+# matplotlib is imported lazily in plot(), so that importing pysankey2 does not
+# load pyplot or select a GUI backend.
 
-class LabelMismatchError(SankeyException):
-    """LabelMismatchError is thrown when the provided labels are different from the labels in the dataframe."""
-    pass
+__all__ = ['Sankey','LabelMismatchError']
 
 class Sankey:
     """
@@ -25,7 +37,7 @@ class Sankey:
     pySankey2 currently supports 2-layer and multi-layer Sankey diagram, where user can freely set the box position, strip length, etc.
     The returned matplotlib.figure and matplotlib.axes object allows post modification using matplotlib api.
     """
-    def __init__(self,dataFrame,layerLabels=None,colorDict=None,colorMode="global",stripColor="grey"):
+    def __init__(self,dataFrame,layerLabels=None,colorDict=None,colorMode="global",stripColor="grey",profileCallback=None,memory_budget=None,retain_data=True,n_jobs=None,sample=None,approx=False,stratify=None,hierarchy=None):
         """
         Parameters:
         -----------
@@ -56,44 +68,467 @@ class Sankey:
             Default is "grey".
             If choosing "left": The color of strip would be the same as the box on the left.
             Specified colors would be passed into  plt.fill_between().
+
+        profileCallback:callable, optional.
+            Called as profileCallback(stage,record) when each stage of construction or plot ends,
+            see last_profile for the stages and records.
+
+        memory_budget:int or str, optional.
+            Memory(e.g. 2147483648 or "2GB") that pySankey2 may allocate on top of the dataFrame.
+            If passing, the footprint of each stage is estimated and a strategy that stays within
+            the budget is picked(see memoryPlan), and the measured peak memory of each stage is
+            reported in last_profile(as 'peakBytes').
+
+        retain_data:bool, default=True.
+            If False, labels and flows are counted once at construction and the rows are released
+            (the dataFrame attribute is None). plot(), recoloring(colorDict), label reordering(layerLabels)
+            and relabel() then only use the aggregated counts.
+
+        n_jobs:int, optional.
+            Number of processes counting labels and flows(-1 means all cpus). Rows are encoded into
+            shared-memory label codes, and counted by layer pair and row partition in parallel.
+            Small dataFrames, and aggregations chunked to fit memory_budget, are counted in this process.
+
+        sample:int or float, optional.
+            If passing, only a random sample of <sample> rows(or of a fraction of the rows if a float in (0,1],
+            1.0 keeps all rows, other floats must be whole numbers of rows) is kept,
+            and box heights and strip widths are estimated for all rows from it, see estimates() for their
+            confidence intervals. Labels that are not sampled are left out(also of layerLabels and colorDict).
+
+        approx:bool, default=False.
+            If True and sample is not passing, a sample of pysankey2.sampling.DEFAULT_SAMPLE_ROWS rows is used.
+
+        stratify:str, optional.
+            Column name of a layer to post-stratify the sample on: its labels are counted over all rows,
+            which makes its boxes exact and narrows the intervals of the other counts.
+
+        hierarchy:dict, optional.
+            Coarser labels of layers, {column name:mapping or list of mappings}, e.g.
+                {'layer1':[{'France':'Europe','Japan':'Asia'},{'Europe':'Eurasia','Asia':'Eurasia'}]}.
+            The i-th mapping maps the labels of level i - 1 to those of level i(level 0 being the labels
+            of the dataFrame), labels not in a mapping are kept. Flows are counted once at level 0 and
+            coarser levels are summed up from the level below, see plot(level=).
         """
+        self._nJobs = n_jobs
+        self._profileCallback = profileCallback
+        self._memoryBudget = None if memory_budget is None else memory.parseBytes(memory_budget)
+        self._profile = self._newProfile()
+        self._memoryPlan = None
+        if approx and sample is None:
+            sample = sampling.DEFAULT_SAMPLE_ROWS
+        self._sampling = None
+        self._variances = None
+        if sample is not None:
+            with self._stage('sample') as rec:
+                dataFrame,self._sampling = sampling.sampleFrame(dataFrame,sample,stratify = stratify)
+                rec['rows'] = self._sampling['rows']
+        if self._memoryBudget is not None:
+            self._memoryPlan = memory.planLoad(dataFrame,self._memoryBudget)
 
-        self.dataFrame = deepcopy(dataFrame)
+        with self._stage('copy') as rec:
+            if not retain_data or (self._memoryPlan is not None and self._memoryPlan['copy']['strategy'] == 'shallow'):
+                # shares the data of the caller's dataFrame, which must not be modified in place.
+                self.dataFrame = dataFrame.copy(deep=False)
+            else:
+                self.dataFrame = deepcopy(dataFrame)
+            rec['rows'] = len(dataFrame)
         # get mapping between old and new column names & rename columns.
         self._colnameMaps = self._getColnamesMapping(self.dataFrame)
         self.dataFrame.columns = ['layer%d'%(i+1) for i in range(dataFrame.shape[1])] 
 
         # labels
-        self._allLabels = self._getAllLabels(self.dataFrame)
+        with self._stage('labels') as rec:
+            # one unique() per column, reused by the validation of provided labels.
+            dfLayerLabels = self._getLayerLabels(self.dataFrame)
+            if layerLabels is None:
+                self._layerLabels = dfLayerLabels
+            else:
+                if self._sampling is not None:
+                    # labels that are not sampled are left out.
+                    present = {layer:set(labels) for layer,labels in dfLayerLabels.items()}
+                    layerLabels = {layer:[label for label in labels if label in present[self._layerName(layer)]]
+                                   for layer,labels in layerLabels.items()}
+                self._checkLayerLabelsMatchDF(self.dataFrame,layerLabels,self._colnameMaps,dfLayerLabels)
+                self._layerLabels = self._renameLayerLabels(layerLabels)
+            self._allLabels = core.getAllLabels(None,self._layerLabels)
+            rec['rows'] = len(self.dataFrame)
+        
+        if self._sampling is not None and colorDict is not None:
+            colorDict = self._sampledColors(colorDict,colorMode)
+        self._setColors(colorDict,colorMode,stripColor)
+        self._hierarchy = self._setHierarchy(hierarchy)
+        self._frameScale = None
+
+        # aggregated counts, see _aggregate()
+        self._labelCounts = None
+        self._flows = None
+        if not retain_data:
+            self._aggregate()
+            self.dataFrame = None
+
+    @classmethod
+    def from_counts(cls,counts,colorDict=None,colorMode="global",stripColor="grey",profileCallback=None):
+        """
+        Sankey diagram of aggregated counts(e.g. merged from partitions), behaves as with retain_data=False.
+
+        Parameters:
+        -----------
+        counts:pysankey2.FlowCounts
+            Layers of counts play the role of the dataFrame columns(for layerLabels,colorDict...).
+
+        colorDict,colorMode,stripColor,profileCallback:
+            see Sankey().
+        """
+        sky = cls.__new__(cls)
+        sky._nJobs = None
+        sky._profileCallback = profileCallback
+        sky._memoryBudget = None
+        sky._profile = sky._newProfile()
+        sky._memoryPlan = None
+        sky._sampling = None
+        sky._variances = None
+        sky._hierarchy = {}
+        sky._frameScale = None
+        sky.dataFrame = None
+        sky._colnameMaps = dict(zip(counts.layers,['layer%d'%(i+1) for i in range(len(counts.layers))]))
+        sky._layerLabels = sky._renameLayerLabels(counts.layerLabels)
+        sky._allLabels = core.getAllLabels(None,sky._layerLabels)
+        sky._setColors(colorDict,colorMode,stripColor)
+        sky._labelCounts = OrderedDict((sky._colnameMaps[layer],labelCounts)
+                                       for layer,labelCounts in counts.labelCounts.items())
+        sky._flows = OrderedDict((sky._colnameMaps[layer],flow) for layer,flow in counts.flows.items())
+        return sky
+
+    @classmethod
+    def facet(cls,dataFrame,by,layers=None,layerLabels=None,colorDict=None,colorMode="global",stripColor="grey",
+              ncols=None,figSize=None,savePath=None,**plot_kws):
+        """
+        Small-multiple Sankey diagrams, one per group of rows(facet), counted in one pass over the dataFrame.
+        All facets share the label order and the colors, labels of no rows in a facet are left out.
+
+        Parameters:
+        -----------
+        dataFrame:pd.DataFrame
+
+        by:str or list of str
+            Column(s) defining the facets, as in dataFrame.groupby(by), rows with a NaN key are left out.
+
+        layers:list of str, optional.
+            Columns of the layers, default to all columns but <by>.
+
+        layerLabels,colorDict,colorMode,stripColor:
+            see Sankey(), for the whole dataFrame.
+
+        ncols:int, optional.
+            Number of columns of the grid, default to about the square root of the number of facets.
+
+        figSize:(float, float), optional.
+            Size of the grid figure(default to 5 inches per facet), or of each figure if saving one file per facet.
+
+        savePath:str, optional.
+            If it contains "{}", one file per facet is saved to savePath.format(facet key) and no grid is drawn,
+            else the grid is saved to savePath.
+
+        plot_kws:
+            Additional keyword arguments, which would be passed to plot().
+
+        Returns:
+        --------
+        fig:matplotlib Figure, of the grid(None if saving one file per facet).
+
+        axes:2d array of matplotlib Axes, of the grid(None if saving one file per facet).
+
+        sankeys:OrderedDict, {facet key:Sankey}, in the sorted order of the keys.
+        """
+        keys = [by] if not isinstance(by,list) else by
+        if layers is None:
+            layers = [column for column in dataFrame.columns if column not in keys]
+        frame = dataFrame.loc[:,layers]
         if layerLabels is None:
-            self._layerLabels = self._getLayerLabels(self.dataFrame)
+            layerLabels = core.getLayerLabels(frame)
         else:
-            self._checkLayerLabelsMatchDF(self.dataFrame,layerLabels,self._colnameMaps)
-            self._layerLabels = layerLabels
-        
+            core.checkLayerLabelsMatchDF(frame,layerLabels,{layer:layer for layer in layers})
+            layerLabels = OrderedDict((layer,list(layerLabels[layer])) for layer in layers)
+
+        grouped = dataFrame.groupby(by,sort=True,dropna=True,observed=True)
+        facetKeys = list(grouped.size().index)
+        # rows with a NaN key have no group(NaN in ngroup()).
+        groups = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        results = core.aggregateGroups(frame,layerLabels,groups,len(facetKeys))
+
+        # colors of all labels, shared by the facets.
+        totals = OrderedDict((layer,sum(labelCounts[layer] for labelCounts,flows in results)) for layer in layers)
+        empty = {'left':[],'right':[],'width':[]}
+        colors = cls.from_counts(FlowCounts(layerLabels,totals,{layer:empty for layer in layers[:-1]}),
+                                 colorDict = colorDict,colorMode = colorMode).colorDict
+        sankeys = OrderedDict()
+        for key,(labelCounts,flows) in zip(facetKeys,results):
+            sky = cls.from_counts(FlowCounts(layerLabels,labelCounts,flows)._compact(),
+                                  colorMode = colorMode,stripColor = stripColor)
+            sky._colorDict = colors
+            sankeys[key] = sky
+
+        import matplotlib.pyplot as plt
+        if savePath is not None and "{}" in savePath:
+            for key,sky in sankeys.items():
+                fig,ax = sky.plot(figSize = figSize or (10,10),**plot_kws)
+                ax.set_title(str(key))
+                fig.savefig(savePath.format(key), bbox_inches='tight', dpi=800)
+                plt.close(fig)
+            return None,None,sankeys
+
+        if ncols is None:
+            ncols = max(1,int(math.ceil(math.sqrt(len(sankeys)))))
+        nrows = max(1,int(math.ceil(len(sankeys) / ncols)))
+        fig,axes = plt.subplots(nrows,ncols,figsize = figSize or (5 * ncols,5 * nrows),squeeze = False)
+        for ax in axes.ravel()[len(sankeys):]:
+            ax.axis('off')
+        for ax,(key,sky) in zip(axes.ravel(),sankeys.items()):
+            sky.plot(ax = ax,**plot_kws)
+            ax.set_title(str(key))
+        if savePath is not None:
+            fig.savefig(savePath, bbox_inches='tight')
+        return fig,axes,sankeys
+
+    @classmethod
+    def from_events(cls,dataFrame,entity,step,label,max_steps=None,
+                    colorDict=None,colorMode="global",stripColor="grey",profileCallback=None):
+        """
+        Sankey diagram of a long-format event log(one row per entity and step), with one layer per step,
+        counted without pivoting the log(see pysankey2.core.aggregateEvents).
+        Entities without event at a step(e.g. that dropped out) are NaN there, as in the pivoted frame.
+
+        Parameters:
+        -----------
+        dataFrame:pd.DataFrame
+            The event log, at most one event per entity and step.
+
+        entity,step,label:str
+            Column names of the entity, the step(layers are the sorted steps) and the label of each event.
+
+        max_steps:int, optional.
+            If passing, only the first <max_steps> steps are drawn.
+
+        colorDict,colorMode,stripColor,profileCallback:
+            see Sankey(), layers are named by their step.
+        """
+        profile = Profile(profileCallback)
+        with profile.stage('aggregate') as rec:
+            layerLabels,labelCounts,flows = core.aggregateEvents(dataFrame,entity,step,label,maxSteps = max_steps)
+            rec['rows'] = len(dataFrame)
+        sky = cls.from_counts(FlowCounts(layerLabels,labelCounts,flows),colorDict = colorDict,
+                              colorMode = colorMode,stripColor = stripColor,profileCallback = profileCallback)
+        sky._profile = profile
+        return sky
+
+    @classmethod
+    def windows(cls,dataFrame,time_col,window,step=None,layers=None,layerLabels=None,
+                colorDict=None,colorMode="global",stripColor="grey",
+                figSize=(10,10),savePath=None,interval=500,**plot_kws):
+        """
+        Sankey diagrams of sliding windows of time, e.g. each rolling 7 days of a year of rows.
+        Windows are counted incrementally in about one pass over the rows(see pysankey2.core.aggregateWindows),
+        and laid out alike: all frames share the label order, the colors and the vertical scale.
+
+        Parameters:
+        -----------
+        dataFrame:pd.DataFrame
+
+        time_col:str
+            Column of the time of each row(datetimes or numbers), rows with a NaN time are left out.
+
+        window:
+            Length of the windows, e.g. '7D' or pd.Timedelta(days=7) for datetimes, or a number.
+            Windows [start,start + window) start at the first time, and every <step> after,
+            until a window reaches past the last time.
+
+        step:optional.
+            Distance between the starts of successive windows, default to <window>(non-overlapping windows).
+
+        layers:list of str, optional.
+            Columns of the layers, default to all columns but <time_col>.
+
+        layerLabels,colorDict,colorMode,stripColor:
+            see Sankey(), for the whole dataFrame.
+
+        figSize:(float, float), default=(10,10).
+            Size of the figure of each frame.
+
+        savePath:str, optional.
+            If it contains "{}", each frame is saved to savePath.format(frame number), else the frames
+            are saved as an animation(e.g. '.gif'), see matplotlib.animation.Animation.save.
+
+        interval:int, default=500.
+            Delay between the frames of the animation, in milliseconds.
+
+        plot_kws:
+            Additional keyword arguments, which would be passed to plot().
+
+        Returns:
+        --------
+        sankeys:OrderedDict, {window start:Sankey}, in time order, labels of no rows in a window are empty boxes.
+            Their plot() keeps the vertical scale and the gaps between the boxes of all frames.
+        """
+        if step is None:
+            step = window
+        times = dataFrame.loc[:,time_col]
+        if pd.api.types.is_datetime64_any_dtype(times):
+            window,step = pd.Timedelta(window),pd.Timedelta(step)
+        if not step > step * 0 or not window > window * 0:
+            raise ValueError("window and step must be positive.")
+        if layers is None:
+            layers = [column for column in dataFrame.columns if column != time_col]
+        valid = times.notna().to_numpy()
+        order = np.argsort(times.to_numpy()[valid],kind='stable') if valid.any() else np.empty(0,dtype=np.int64)
+        frame = dataFrame.loc[:,layers].iloc[np.flatnonzero(valid)]
+        if layerLabels is None:
+            layerLabels = core.getLayerLabels(frame)
+        else:
+            core.checkLayerLabelsMatchDF(frame,layerLabels,{layer:layer for layer in layers})
+            layerLabels = OrderedDict((layer,list(layerLabels[layer])) for layer in layers)
+        # rows in time order.
+        frame = frame.iloc[order]
+        times = pd.Index(times[valid].iloc[order])
+
+        starts,bounds = [],[]
+        if len(times):
+            start,last = times[0],times[-1]
+            while True:
+                starts.append(start)
+                bounds.append((times.searchsorted(start,side='left'),times.searchsorted(start + window,side='left')))
+                if start + window > last:
+                    break
+                start = start + step
+
+        # colors of all labels, shared by the frames.
+        empty = {'left':[],'right':[],'width':[]}
+        totals = OrderedDict((layer,np.ones(len(labels),dtype=np.int64)) for layer,labels in layerLabels.items())
+        colors = cls.from_counts(FlowCounts(layerLabels,totals,{layer:empty for layer in layers[:-1]}),
+                                 colorDict = colorDict,colorMode = colorMode).colorDict
+        sankeys = OrderedDict()
+        for start,(labelCounts,flows) in zip(starts,core.aggregateWindows(frame,layerLabels,bounds)):
+            sky = cls.from_counts(FlowCounts(layerLabels,labelCounts,flows),colorMode = colorMode,stripColor = stripColor)
+            sky._colorDict = colors
+            sankeys[start] = sky
+        # labels of no rows keep an empty box and the gaps between the boxes are taken from the largest layer total
+        # of all frames(see pysankey2.core.setBoxPos), so the boxes keep their place, up to the counts below them.
+        boxInterv = plot_kws.get('boxInterv',0.02)
+        total = max([int(counts.sum()) for sky in sankeys.values() for counts in sky._labelCounts.values()] or [0])
+        height = total * (1 + boxInterv * max(len(labels) - 1 for labels in layerLabels.values()))
+        for sky in sankeys.values():
+            sky._frameScale = (total,max(height,1))
+
+        if savePath is None:
+            return sankeys
+        import matplotlib.pyplot as plt
+        def draw(ax,start,sky):
+            sky.plot(ax = ax,**plot_kws)
+            ax.set_title(str(start))
+
+        if "{}" in savePath:
+            for i,(start,sky) in enumerate(sankeys.items()):
+                fig = plt.figure(figsize = figSize)
+                draw(fig.subplots(),start,sky)
+                fig.savefig(savePath.format(i), bbox_inches='tight')
+                plt.close(fig)
+            return sankeys
+
+        from matplotlib.animation import FuncAnimation
+        fig = plt.figure(figsize = figSize)
+        ax = fig.subplots()
+        frames = list(sankeys.items())
+        def update(i):
+            ax.clear()
+            draw(ax,*frames[i])
+            return []
+        animation = FuncAnimation(fig,update,frames = len(frames),interval = interval,blit = False)
+        animation.save(savePath)
+        plt.close(fig)
+        return sankeys
+
+    def _significance(self,confidence,invert=False):
+        """dict, [leftLayer][i] is True if estimated strip i is significantly above 0(not, if invert)."""
+        z = sampling.zScore(confidence)
+        significant = OrderedDict()
+        for leftLayer,flow in self._flows.items():
+            low = flow['width'] - z * np.sqrt(self._variances[1][leftLayer]['width'])
+            significant[leftLayer] = (low <= 0) if invert else (low > 0)
+        return significant
+
+    def estimates(self,confidence=0.95):
+        """
+        Estimated counts(with sample or approx) and their confidence intervals.
+
+        Parameters:
+        ----------
+        confidence:float, default=0.95.
+            Confidence level of the intervals.
+
+        Returns:
+        -------
+        dict, with keys:
+            'rows','sampleRows': number of rows of the dataFrame and of the sample.
+            'confidence': confidence level of the intervals.
+            'boxes': boxes['layer'][label] = {'count','low','high'}.
+            'strips': strips['layer'][leftLabel][rightLabel] = {'width','low','high','significant'},
+                where significant is False if the interval reaches 0.
+        """
+        if self._sampling is None:
+            raise SankeyException("Counts are exact, pass sample or approx=True to estimate them.")
+        labelCounts,flows = self._aggregate()
+        labelVariances,flowVariances = self._variances
+        z = sampling.zScore(confidence)
+        boxes = OrderedDict()
+        for layer,labels in self._layerLabels.items():
+            margin = z * np.sqrt(labelVariances[layer])
+            counts = labelCounts[layer]
+            boxes[layer] = OrderedDict((label,{'count':count,'low':max(0.,count - m),'high':count + m})
+                                       for label,count,m in zip(labels,counts.tolist(),margin.tolist()))
+        strips = OrderedDict()
+        significance = self._significance(confidence)
+        layers = list(self._layerLabels.keys())
+        for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+            flow = flows[leftLayer]
+            strips[leftLayer] = defaultdict(OrderedDict)
+            leftLabels,rightLabels = self._layerLabels[leftLayer],self._layerLabels[rightLayer]
+            margin = z * np.sqrt(flowVariances[leftLayer]['width'])
+            for li,ri,width,m,significant in zip(flow['left'].tolist(),flow['right'].tolist(),flow['width'].tolist(),
+                                                 margin.tolist(),significance[leftLayer].tolist()):
+                strips[leftLayer][leftLabels[li]][rightLabels[ri]] = {'width':width,'low':max(0.,width - m),
+                                                                      'high':width + m,'significant':significant}
+        return {'rows':self._sampling['rows'],'sampleRows':self._sampling['sampleRows'],
+                'confidence':confidence,'boxes':boxes,'strips':strips}
+
+    def _setColors(self,colorDict,colorMode,stripColor):
         # colors
         self.colorMode = colorMode
         _opts=["global","layer"]
         if colorMode not in _opts:
             raise ValueError("colorMode options must be one of:{0} ".format(",".join([i for i in _opts])))       
-        if colorDict is None:
-            self._colorDict = self._setColorDict(self._layerLabels,mode = colorMode)
-        else:
-            self._checkColorMatchLabels(colorDict,mode = colorMode)
-            if colorMode == "layer":
-                colorDict = self._renameColorDict(colorDict)
-            self._colorDict = colorDict
+        # resolved on first access(see colorDict) if not passing, as palettes require matplotlib.
+        self._colorDict = None
+        if colorDict is not None:
+            self.colorDict = colorDict
 
         # stripColor
         self._stripColor = stripColor
 
+    def _newProfile(self):
+        return Profile(self._profileCallback,trackMemory = self._memoryBudget is not None)
+
+    def _stage(self,name):
+        """
+        Profile stage <name>, its record starts with the memory plan of the stage(if any).
+        """
+        return self._profile.stage(name,**(self._memoryPlan or {}).get(name,{}))
+
     def _getColnamesMapping(self,dataFrame):
         """
         Returns:
         -------
         dict: mapping relationship between old and new names.
         """
-        return dict(zip(dataFrame.columns,['layer%d'%(i+1) for i in range(dataFrame.shape[1])]))
+        return core.getColnamesMapping(dataFrame)
     
     def _getAllLabels(self,dataFrame):
         """
@@ -102,9 +537,7 @@ class Sankey:
         allLabels:list
             a global unique label list.
         """
-        uniqLabels = list(set(dataFrame.unstack().values))
-        allLabels = listRemoveNAN(uniqLabels)
-        return allLabels
+        return core.getAllLabels(dataFrame)
 
     def _getLayerLabels(self,dataFrame):
         """
@@ -113,77 +546,230 @@ class Sankey:
         layerLabels:dict
             a layer-specific unique label dict(same labels in different layers would be treated as independent labels).
         """
-        layerLabels = OrderedDict()
-        for layer_label in dataFrame.columns:
-            layer_labels = list(dataFrame.loc[:,layer_label].unique()) # may contain NaN
-            layer_labels = listRemoveNAN(layer_labels)
-            layerLabels[layer_label] = layer_labels
-        return layerLabels
+        return core.getLayerLabels(dataFrame)
 
-    def _checkLayerLabelsMatchDF(self,dataFrame,layerLabels,colnameMaps):
+    def _checkLayerLabelsMatchDF(self,dataFrame,layerLabels,colnameMaps,dfLayerLabels=None):
         """
         check whether the provided layer-specific labels match dataframe column names.
         """
-        for oldname,newname in colnameMaps.items():
-            df_list = listRemoveNAN(dataFrame.loc[:,newname].unique())
-            provided_list = listRemoveNAN(layerLabels[oldname])
-            df_set = set(df_list)
-            provided_set = set(provided_list)
-
-            if df_set != provided_set:
-                msg_df = "dataFrame Labels:" + ",".join([str(i) for i in df_set]) + "\n"
-                msg_provided = "Provided Labels:" + ",".join([str(i) for i in provided_set]) + "\n"
-                raise LabelMismatchError('{0} do not match with {1}'.format(msg_provided, msg_df))
+        core.checkLayerLabelsMatchDF(dataFrame,layerLabels,colnameMaps,dfLayerLabels)
             
 
     def _checkColorMatchLabels(self,colorDict,mode):
         """
         check if labels in provided colorDict are identical to those in dataFrame.
         """
+        # labels were discovered at construction, dict keys compare as sets without copies.
         if mode == "global":
-            provided_set = set(colorDict.keys())
-            df_set = set(self.labels)
-            if provided_set !=df_set:
-                msg_provided = "Provided Color Labels:" + ",".join([str(i) for i in provided_set]) + "\n"
-                msg_df = "dataFrame Labels:" + ",".join([str(i) for i in df_set]) + "\n"
+            if colorDict.keys() != set(self.labels):
+                msg_provided = "Provided Color Labels:" + ",".join([str(i) for i in colorDict.keys()]) + "\n"
+                msg_df = "dataFrame Labels:" + ",".join([str(i) for i in self.labels]) + "\n"
                 raise LabelMismatchError('{0} do not match with {1}'.format(msg_provided, msg_df))     
         elif mode == "layer":
             # whether layer-specific labels match layerLabels
             for old_layer,layer_labels_map in colorDict.items():
-                provided_set = set(layer_labels_map.keys())
                 new_layer = self._colnameMaps[old_layer]
-                df_set = set(self.layerLabels[new_layer])
-                if provided_set !=df_set:
-                    msg_provided = "Provided Color Labels:" + ",".join([str(i) for i in provided_set]) + "\n"
-                    msg_df = "dataFrame Labels:" + ",".join([str(i) for i in df_set]) + "\n"
-                    raise LabelMismatchError('In {0},{1} do not match with {1}'.format(new_layer,msg_provided, msg_df))            
+                if layer_labels_map.keys() != set(self.layerLabels[new_layer]):
+                    msg_provided = "Provided Color Labels:" + ",".join([str(i) for i in layer_labels_map.keys()]) + "\n"
+                    msg_df = "dataFrame Labels:" + ",".join([str(i) for i in self.layerLabels[new_layer]]) + "\n"
+                    raise LabelMismatchError('In {0},{1} do not match with {2}'.format(new_layer,msg_provided, msg_df))            
     
     def _setColorDict(self,layerLabels,mode):
         """
         Set color for each label, return a color palette(dict). 
         """
 
+        # labels past the qualitative palette are spread over a continuous colormap(see utils.colorTable).
         if mode =="global":
-            ngroups = len(self.labels)
-            colorPalette = setColorConf(ngroups=ngroups)
-            colorDict = {}
-            for i, label in enumerate(self.labels):
-                colorDict[label] = colorPalette[i]
+            colorPalette = setColorConf(ngroups=len(self.labels),alternative=None)
+            colorDict = dict(zip(self.labels,colorPalette))
         elif mode =="layer":
-            all_layer_labels = []
-            for layer,layer_labels in self.layerLabels.items():
-                all_layer_labels +=layer_labels
-            
-            ngroups = len(all_layer_labels)
-            colorPalette = setColorConf(ngroups=ngroups)
+            ngroups = sum(len(layer_labels) for layer_labels in self.layerLabels.values())
+            colorPalette = setColorConf(ngroups=ngroups,alternative=None)
             colorDict = defaultdict(dict)
             i=0
             for layer,layer_labels in self.layerLabels.items():
-                for layer_label in layer_labels:
-                    colorDict[layer][layer_label] = colorPalette[i]
-                    i+=1
+                colorDict[layer] = dict(zip(layer_labels,colorPalette[i:i + len(layer_labels)]))
+                i+=len(layer_labels)
         return colorDict
 
+    def _colorTables(self,layerLabels):
+        """
+        Colors of the labels of each layer, as (labels,4) RGBA arrays aligned with layerLabels[layer].
+        """
+        from matplotlib.colors import to_rgba_array
+        colorDict = self.colorDict
+        tables = OrderedDict()
+        for layer,labels in layerLabels.items():
+            colors = colorDict if self.colorMode == "global" else colorDict[layer]
+            tables[layer] = to_rgba_array([colors[label] for label in labels]).reshape(-1,4)
+        return tables
+
+    def _sampledColors(self,colorDict,colorMode):
+        """colorDict without the labels that are not sampled, as layerLabels."""
+        if colorMode == "global":
+            present = set(self._allLabels)
+            return {label:color for label,color in colorDict.items() if label in present}
+        if colorMode == "layer":
+            sampled = {}
+            for layer,colors in colorDict.items():
+                present = set(self._layerLabels[self._layerName(layer)])
+                sampled[layer] = {label:color for label,color in colors.items() if label in present}
+            return sampled
+        return colorDict
+
+    def _layerName(self,layer):
+        """name('layer1','layer2'...) of a layer given by its column name in the dataFrame(or its name)."""
+        if layer in self._colnameMaps:
+            return self._colnameMaps[layer]
+        if layer in self._colnameMaps.values():
+            return layer
+        raise KeyError("Unknown layer:{0}".format(layer))
+
+    def _renameLayerLabels(self,layerLabels):
+        """rename keys of layerLabels from old column names to 'layer', in the order of layers."""
+        renamed = {self._layerName(layer):list(labels) for layer,labels in layerLabels.items()}
+        return OrderedDict((layer,renamed[layer]) for layer in self._colnameMaps.values())
+
+    def _remapLabels(self,layerLabels,indexMaps):
+        """
+        Switch to new layerLabels, moving the aggregated counts(if any) by indexMaps, see core.remapCounts.
+        """
+        if self._labelCounts is not None:
+            self._labelCounts,self._flows = core.remapCounts(self._layerLabels,self._labelCounts,self._flows,
+                                                             layerLabels,indexMaps)
+        if self._variances is not None:
+            # variances of merged labels are summed up, an upper bound as their estimates are negatively correlated.
+            self._variances = core.remapCounts(self._layerLabels,self._variances[0],self._variances[1],
+                                               layerLabels,indexMaps,dtype=float)
+        self._layerLabels = layerLabels
+
+    def reorder(self,order="barycenter",layers=None,iterations=4):
+        """
+        Change the stacking order of the boxes, only the aggregated counts are moved(the rows are not scanned
+        again, but counted once if they were not yet).
+
+        Parameters:
+        ----------
+        order:dict or str, default="barycenter".
+            dict: {column name:labels in drawing order}, layers not passing keep their order(as setting layerLabels).
+            "barycenter": order the labels to reduce strip crossings, see pysankey2.core.barycenterOrder.
+
+        layers:list, optional.
+            Column names of the layers whose labels may move with "barycenter", default to all.
+
+        iterations:int, default=4.
+            Number of forward and backward sweeps of "barycenter".
+        """
+        if isinstance(order,dict):
+            self.layerLabels = order
+            return
+        if order != "barycenter":
+            raise ValueError("order must be a dict of labels or 'barycenter'.")
+        labelCounts,flows = self._aggregate()
+        movable = None if layers is None else [self._layerName(layer) for layer in layers]
+        orders = core.barycenterOrder(self._layerLabels,labelCounts,flows,layers = movable,iterations = iterations)
+        self._remapLabels(OrderedDict((layer,[labels[i] for i in orders[layer].tolist()])
+                                      for layer,labels in self._layerLabels.items()),
+                          OrderedDict((layer,np.argsort(orders[layer])) for layer in self._layerLabels))
+
+    def relabel(self,mapping,layer=None):
+        """
+        Rename labels, labels renamed to the same name are merged(their counts and flows are summed up).
+        Only the aggregated counts are used, so this works with retain_data=False.
+
+        Parameters:
+        ----------
+        mapping:dict, {old label:new label}, labels not in mapping are kept.
+
+        layer:str, optional.
+            Column name of the layer to relabel, if not passing, labels are renamed in all layers.
+        """
+        layers = list(self._layerLabels.keys()) if layer is None else [self._layerName(layer)]
+        if self._labelCounts is None and self.dataFrame is not None:
+            self._aggregate()
+        newLayerLabels = OrderedDict()
+        indexMaps = OrderedDict()
+        for name,labels in self._layerLabels.items():
+            newLayerLabels[name],indexMaps[name] = core.mapLabels(labels,mapping if name in layers else {})
+        self._remapLabels(newLayerLabels,indexMaps)
+        present = set(core.getAllLabels(None,newLayerLabels))
+        renamed = OrderedDict.fromkeys(mapping.get(label,label) for label in self._allLabels)
+        self._allLabels = [label for label in OrderedDict.fromkeys(list(renamed) + self._allLabels) if label in present]
+        if self.dataFrame is not None:
+            for name in layers:
+                column = self.dataFrame[name]
+                if isinstance(column.dtype,pd.CategoricalDtype):
+                    column = column.astype(object)
+                self.dataFrame[name] = column.replace(mapping)
+
+        # move provided colors to the new labels.
+        if self._colorDict is not None:
+            if self.colorMode == "global":
+                self._colorDict = self._moveColors(self._colorDict,self._allLabels,mapping)
+            elif self.colorMode == "layer":
+                for name in layers:
+                    self._colorDict[name] = self._moveColors(self._colorDict[name],self._layerLabels[name],mapping)
+
+    def _setHierarchy(self,hierarchy):
+        """{layer:list of mappings} of a hierarchy(see __init__), keyed by the layer names."""
+        if hierarchy is None:
+            return {}
+        levels = {}
+        for layer,mappings in hierarchy.items():
+            if not isinstance(mappings,list):
+                mappings = [mappings]
+            levels[self._layerName(layer)] = [dict(mapping) for mapping in mappings]
+        return levels
+
+    @property
+    def levels(self):
+        """int, number of levels of the labels(1 without hierarchy), see plot(level=)."""
+        return 1 + max([len(mappings) for mappings in self._hierarchy.values()],default=0)
+
+    def _rollup(self,level):
+        """
+        Sankey of the labels at <level> of the hierarchy, summed up from the level below(see pysankey2.core.remapCounts),
+        levels are cached until the counts change.
+        """
+        if not isinstance(level,(int,np.integer)) or not 0 <= level < self.levels:
+            raise ValueError("level must be an integer in [0,{0}).".format(self.levels))
+        labelCounts,flows = self._aggregate()
+        if getattr(self,'_rollups',None) is None or self._rollups[0] is not flows:
+            self._rollups = (flows,[(self._layerLabels,labelCounts,flows)],{})
+        levels,sankeys = self._rollups[1],self._rollups[2]
+        while len(levels) <= level:
+            layerLabels,labelCounts,flows = levels[-1]
+            depth = len(levels) - 1
+            newLayerLabels,indexMaps = OrderedDict(),OrderedDict()
+            for layer,labels in layerLabels.items():
+                # layers of fewer levels stay at their coarsest labels.
+                mappings = self._hierarchy.get(layer,[])
+                mapping = mappings[depth] if depth < len(mappings) else {}
+                newLayerLabels[layer],indexMaps[layer] = core.mapLabels(labels,mapping)
+            levels.append((newLayerLabels,) + core.remapCounts(layerLabels,labelCounts,flows,newLayerLabels,indexMaps))
+        if level not in sankeys:
+            layerLabels,labelCounts,flows = levels[level]
+            names = {new:old for old,new in self._colnameMaps.items()}
+            counts = FlowCounts(OrderedDict((names[layer],labels) for layer,labels in layerLabels.items()),
+                                {names[layer]:counts for layer,counts in labelCounts.items()},
+                                {names[layer]:flow for layer,flow in flows.items()})
+            sankeys[level] = type(self).from_counts(counts,colorMode = self.colorMode,stripColor = self._stripColor,
+                                                      profileCallback = self._profileCallback)
+        return sankeys[level]
+
+    def _moveColors(self,colors,labels,mapping):
+        """
+        colors of <labels> after relabeling by <mapping>: the first label renamed to a label passes its color on,
+        labels that are kept(e.g. in other layers) keep their color.
+        """
+        moved = {}
+        for label,color in colors.items():
+            moved.setdefault(mapping.get(label,label),color)
+        for label,color in colors.items():
+            moved.setdefault(label,color)
+        return {label:moved[label] for label in labels}
+
     def _renameColorDict(self,colorDict):
         """rename keys of colordict from old column names to 'layer'"""
         for old_name,new_name in self.colnameMaps.items():
@@ -194,30 +780,44 @@ class Sankey:
                 del colorDict[old_name]
         return colorDict
 
-    def _setboxPos(self,dataFrame,layerLabels,boxInterv):
+    def _aggregate(self):
+        """
+        Count labels and flows of the dataFrame once, results are cached for subsequent plots.
+        Returns:
+        -------
+        labelCounts,flows: see pysankey2.core.
+        """
+        if self._labelCounts is None:
+            chunkSize = sparse = None
+            if self._memoryBudget is not None:
+                plan = memory.planAggregate(len(self.dataFrame),
+                                            [len(labels) for labels in self._layerLabels.values()],
+                                            self._memoryBudget - self._memoryPlan['copy']['estimatedBytes'])
+                self._memoryPlan['aggregate'] = plan
+                chunkSize,sparse = plan['chunkSize'],plan['sparse']
+            with self._stage('aggregate') as rec:
+                if self._sampling is not None:
+                    self._labelCounts,self._flows,labelVariances,flowVariances = sampling.estimate(
+                        self.dataFrame,self._layerLabels,self._sampling)
+                    self._variances = (labelVariances,flowVariances)
+                elif chunkSize is None and parallel.resolveJobs(self._nJobs) > 1:
+                    self._labelCounts,self._flows = parallel.aggregate(self.dataFrame,self._layerLabels,
+                                                                       n_jobs = self._nJobs,sparse = sparse)
+                else:
+                    self._labelCounts,self._flows = core.aggregate(self.dataFrame,self._layerLabels,
+                                                                   chunkSize = chunkSize,sparse = sparse)
+                rec['rows'] = len(self.dataFrame)
+        return self._labelCounts,self._flows
+
+    def _setboxPos(self,labelCounts,layerLabels,boxInterv):
         """
         Set y-axis coordinate position for each box.
         Returns:
         -------
         boxPos:dict, contain y-axis position of each box.
         """
-        boxPos = OrderedDict()
-        for layer,labels in layerLabels.items():
-            layerPos = defaultdict(dict)
-            for i,label in enumerate(labels):
-                labelHeight = ((dataFrame[dataFrame.loc[:,layer] == label])
-                            .loc[:,layer]
-                            .count())
-                if i ==0:
-                    layerPos[label]['bottom'] = 0
-                    layerPos[label]['top'] = labelHeight
-                else:
-                    prevLabelTop = layerPos[labels[i-1]]['top']
-                    layerPos[label]['bottom'] = prevLabelTop + boxInterv * dataFrame.loc[:,layer].count()
-                    layerPos[label]['top'] = layerPos[label]['bottom'] + labelHeight
-            boxPos[layer] = layerPos
-        
-        return boxPos    
+        boxScale = self._frameScale[0] if self._frameScale is not None else None
+        return core.setBoxPos(layerLabels,labelCounts,boxInterv,boxScale = boxScale)
     
     def _setLayerPos(self,layerLabels,boxWidth,stripLen):
         """
@@ -226,19 +826,9 @@ class Sankey:
         --------
         layerPos:dict, contain x-axis position of each layer.
         """
-        layerPos = defaultdict(dict) 
-        layerStart = 0
-        layerEnd = 0 + boxWidth
-
-        for layer in layerLabels.keys():
-            layerPos[layer]['layerStart'] = layerStart
-            layerPos[layer]['layerEnd'] = layerEnd     
+        return core.setLayerPos(layerLabels.keys(),boxWidth,stripLen)
 
-            layerStart = (layerEnd + stripLen)     
-            layerEnd = (layerStart + boxWidth)
-        return layerPos
-
-    def _setStripWidth(self,layerLabels,dataFrame):
+    def _setStripWidth(self,layerLabels,flows):
         """
         Set the width of strip(i.e. the size of a transfer pair).
         Returns:
@@ -247,38 +837,13 @@ class Sankey:
            <leftLabel> in 'layer' has a link with <rightLabel>(in the next layer) , where the size/width of link equals <width>.
 
         """
-        layers = list(layerLabels.keys())
-        # nested dict,see more:https://stackoverflow.com/questions/19189274/nested-defaultdict-of-defaultdict
-        stripWidths = defaultdict(lambda: defaultdict(dict))
-
-        for i,layer in enumerate(layers):
-            # the last layer
-            if i == len(layers) -1:
-                break
-            
-            leftLayer = layers[i]
-            rightLayer = layers[i+1]
-            for leftLabel in layerLabels[leftLayer]:
-                for rightLabel in layerLabels[rightLayer]:
-                    width = len(dataFrame[(dataFrame.loc[:,leftLayer] == leftLabel) & (dataFrame.loc[:,rightLayer] == rightLabel)])
-                    if width >0:
-                        stripWidths[leftLayer][leftLabel][rightLabel] = width
-
-        return stripWidths
+        return core.setStripWidth(layerLabels,flows)
             
     def _setStripPos(self,leftBottom,rightBottom,leftTop,rightTop,kernelSize,stripShrink):
         """
         Smooth the strip by convolution, and create array of y values for each strip.
         """
-        ys_bottom = np.array(50 * [leftBottom] + 50 * [rightBottom])
-        ys_bottom = np.convolve(ys_bottom + stripShrink, (1/kernelSize) * np.ones(kernelSize), mode='valid')
-        ys_bottom = np.convolve(ys_bottom + stripShrink, (1/kernelSize) * np.ones(kernelSize), mode='valid')
-        
-        ys_top = np.array(50 * [leftTop] + 50 * [rightTop])
-        ys_top = np.convolve(ys_top - stripShrink, (1/kernelSize) * np.ones(kernelSize), mode='valid')
-        ys_top = np.convolve(ys_top - stripShrink,(1/kernelSize) * np.ones(kernelSize), mode='valid')    
-
-        return ys_bottom,ys_top
+        return core.setStripPos(leftBottom,rightBottom,leftTop,rightTop,kernelSize,stripShrink)
 
     def _plotBox(self,ax,boxPos,layerPos,layerLabels,colorDict,fontSize,fontPos,box_kws,text_kws):
         """
@@ -289,6 +854,9 @@ class Sankey:
             for label in labels:
                 labelBot = boxPos[layer][label]['bottom']
                 labelTop = boxPos[layer][label]['top']
+                # labels of no rows(e.g. in a window) only keep their place.
+                if labelTop == labelBot:
+                    continue
                 layerStart = layerPos[layer]['layerStart']
                 layerEnd = layerPos[layer]['layerEnd']
 
@@ -315,67 +883,29 @@ class Sankey:
                     **text_kws)
 
     def _plotStrip(self,ax,
-                    dataFrame,
                     layerLabels,
-                    boxPos,layerPos,
-                    stripWidths,kernelSize,
-                    stripShrink,stripColor,strip_kws):
-        """
-        Render the strip according to box-position(boxPos), layer-position(layerPos) and strip width(stripWidths).
-        """
-        layers = list(layerLabels.keys())
-        for i,layer in enumerate(layers):
-            # the last layer does not need strip.
-            if i == len(layers) -1:
-                break
-            leftLayer = layers[i]
-            rightLayer = layers[i+1]
-            # deepcopy:https://zhuanlan.zhihu.com/p/61904991
-            # Update the box position when iterated to the next layer,
-            # to make sure operation in the last layer would not affect the next layer.
-            boxPosProxy = deepcopy(boxPos)
-            for leftLabel in layerLabels[leftLayer]:
-                for rightLabel in layerLabels[rightLayer]:
-                    width = len(dataFrame[(dataFrame.loc[:,leftLayer] == leftLabel) & (dataFrame.loc[:,rightLayer] == rightLabel)])
-                    if width > 0:
-                        leftBottom = boxPosProxy[leftLayer][leftLabel]['bottom']
-                        leftTop = leftBottom + stripWidths[layer][leftLabel][rightLabel] 
-
-                        rightBottom = boxPosProxy[rightLayer][rightLabel]['bottom']
-                        rightTop = rightBottom + stripWidths[layer][leftLabel][rightLabel] 
-
-                        ys_bottom,ys_top = self._setStripPos(leftBottom,rightBottom,leftTop,rightTop,kernelSize = kernelSize,stripShrink = stripShrink)
-                        
-                        # Update bottom edges at each label so next strip starts at the right place
-                        boxPosProxy[leftLayer][leftLabel]['bottom'] = leftTop
-                        boxPosProxy[rightLayer][rightLabel]['bottom'] = rightTop
-                        
-                        # X axis of layer.
-                        x_start = layerPos[leftLayer]['layerEnd']
-                        x_end = layerPos[rightLayer]['layerStart']
-
-                        if stripColor =="left":
-                            if self.colorMode == "global":
-                                ax.fill_between(
-                                    np.linspace(x_start, x_end, len(ys_top)), ys_bottom, ys_top, alpha=0.4,
-                                    color=self.colorDict[leftLabel],
-                                    #edgecolor='black',
-                                    **strip_kws
-                                )
-                            elif self.colorMode == "layer":
-                                ax.fill_between(
-                                    np.linspace(x_start, x_end, len(ys_top)), ys_bottom, ys_top, alpha=0.4,
-                                    color=self.colorDict[leftLayer][leftLabel],
-                                    #edgecolor='black',
-                                    **strip_kws
-                                )
-                        else:
-                            ax.fill_between(
-                                np.linspace(x_start, x_end, len(ys_top)), ys_bottom, ys_top, alpha=0.4,
-                                color=stripColor,
-                                #edgecolor='black',
-                                **strip_kws
-                            )
+                    strips,
+                    stripColor,strip_kws,hatched=None,colorTables=None):
+        """
+        Render the strip according to the strip geometry(see pysankey2.core.setStripGeometry).
+        hatched:dict, optional, hatched[leftLayer][i] is True if strip i is hatched.
+        colorTables:dict, optional, see _colorTables().
+        """
+        if stripColor == "left" and colorTables is None:
+            colorTables = self._colorTables(layerLabels)
+        for leftLayer,strip in strips.items():
+            # colors of the strips, taken from the color table by the index of their left label.
+            colors = colorTables[leftLayer][strip['left']] if stripColor == "left" else None
+            for i in range(len(strip['left'])):
+                kws = strip_kws
+                if hatched is not None and hatched[leftLayer][i]:
+                    kws = dict(strip_kws,hatch='///')
+                ax.fill_between(
+                    strip['x'], strip['ysBottom'][i], strip['ysTop'][i], alpha=0.4,
+                    color=colors[i] if colors is not None else stripColor,
+                    #edgecolor='black',
+                    **kws
+                )
 
     def plot(self,figSize=(10,10),
                     fontSize=10,fontPos=(-0.15,0.5),
@@ -383,7 +913,7 @@ class Sankey:
                     boxWidth=2,stripLen=10,
                     kernelSize=25,stripShrink=0,
                     box_kws=None,text_kws=None,strip_kws=None,
-                    savePath=None):
+                    savePath=None,ax=None,flagInsignificant=False,highlight=None,level=0,layers=None):
         """
         Parameters:
         ----------   
@@ -424,6 +954,24 @@ class Sankey:
 
         savePath:
             name to save the figure.
+
+        ax:matplotlib Axes, optional.
+            Axes to draw into(e.g. a subplot), figSize is then ignored.
+
+        flagInsignificant:bool, default=False.
+            If True and counts are estimated(see sample), strips whose width is not significantly
+            above 0(at 95% confidence, see estimates()) are hatched.
+
+        highlight:optional.
+            Labels whose flows are highlighted, see highlight().
+
+        level:int, default=0.
+            Level of the labels of the hierarchy(see __init__) to draw, derived from the counts without the rows.
+            Coarser levels are drawn by their own Sankey(with its own layout and colors).
+
+        layers:slice, optional.
+            Window of adjacent layers to draw(by position, e.g. slice(10,15)), the first one drawn at x = 0.
+            Only the layers of the window are laid out and drawn, from the counts of all layers.
         
         Returns:
         --------
@@ -433,22 +981,61 @@ class Sankey:
         ax:matplotlib Axes
             The Axes object containing the plot.
         """
-        # set box position
-        self._boxPos = self._setboxPos(self.dataFrame,
-                                        self._layerLabels,
-                                        boxInterv = boxInterv)
-        # set layer position
-        self._layerPos = self._setLayerPos(self._layerLabels,
-                                            boxWidth = boxWidth , 
-                                            stripLen = stripLen)
-        # set strip width
-        self._stripWidths = self._setStripWidth(self._layerLabels,
-                                                self.dataFrame)
+        if level:
+            sky = self._rollup(level)
+            fig,ax = sky.plot(figSize = figSize,fontSize = fontSize,fontPos = fontPos,boxInterv = boxInterv,
+                              boxWidth = boxWidth,stripLen = stripLen,kernelSize = kernelSize,stripShrink = stripShrink,
+                              box_kws = box_kws,text_kws = text_kws,strip_kws = strip_kws,
+                              savePath = savePath,ax = ax,highlight = highlight,layers = layers)
+            self._profile = sky._profile
+            return fig,ax
+        self._profile = self._newProfile()
+        labelCounts,flows = self._aggregate()
+        visible = self._viewport(layers)
+        # the layout is cached for subsequent plots of the same counts and parameters(e.g. highlighting).
+        layoutKey = (self._layerLabels,labelCounts,flows,visible,boxInterv,boxWidth,stripLen,kernelSize,stripShrink,
+                     self._frameScale)
+        cached = getattr(self,'_layoutKey',None)
+        if cached is None or any(old is not new for old,new in zip(cached[:3],layoutKey[:3])) or cached[3:] != layoutKey[3:]:
+            # only the layers of the window are laid out, from x = 0.
+            layerLabels = OrderedDict((layer,self._layerLabels[layer]) for layer in visible)
+            flows = OrderedDict((layer,flows[layer]) for layer in visible[:-1])
+            # set box position
+            with self._stage('boxPos') as rec:
+                self._boxPos = self._setboxPos(labelCounts,
+                                                layerLabels,
+                                                boxInterv = boxInterv)
+                rec['boxes'] = sum(len(labels) for labels in layerLabels.values())
+            # set layer position
+            self._layerPos = self._setLayerPos(layerLabels,
+                                                boxWidth = boxWidth , 
+                                                stripLen = stripLen)
+            # set strip width
+            with self._stage('stripWidth') as rec:
+                self._stripWidths = self._setStripWidth(layerLabels,
+                                                        flows)
+                rec['strips'] = sum(len(flow['width']) for flow in flows.values())
+            # set strip geometry
+            with self._stage('stripGeometry') as rec:
+                self._strips = core.setStripGeometry(layerLabels,
+                                                     self._boxPos,
+                                                     self._layerPos,
+                                                     flows,
+                                                     kernelSize = kernelSize,
+                                                     stripShrink = stripShrink)
+                rec['strips'] = sum(len(strip['width']) for strip in self._strips.values())
+            self._layoutLabels = layerLabels
+            self._layoutKey = layoutKey
+        layerLabels = self._layoutLabels
 
+        import matplotlib.pyplot as plt
         plt.rc('text', usetex=False)
         plt.rc('font', family='Arial')
-        fig = plt.figure(figsize = figSize)
-        ax = fig.subplots()
+        if ax is None:
+            fig = plt.figure(figsize = figSize)
+            ax = fig.subplots()
+        else:
+            fig = ax.figure
 
         # plot box
         if box_kws is None:box_kws = {} 
@@ -460,37 +1047,295 @@ class Sankey:
         
         distToBoxLeft = boxWidth * fontPos[0]
         distToBoxBottom = fontPos[1]
-        self._plotBox(ax,
-                      self._boxPos,
-                      self._layerPos,
-                      self._layerLabels,
-                      self._colorDict,
-                      fontSize = fontSize,
-                      fontPos = (distToBoxLeft,distToBoxBottom),
-                      box_kws = box_kws,
-                      text_kws = text_kws)
+        with self._stage('plotBox') as rec:
+            nartists = len(ax.get_children())
+            self._plotBox(ax,
+                          self._boxPos,
+                          self._layerPos,
+                          layerLabels,
+                          self.colorDict,
+                          fontSize = fontSize,
+                          fontPos = (distToBoxLeft,distToBoxBottom),
+                          box_kws = box_kws,
+                          text_kws = text_kws)
+            rec['artists'] = len(ax.get_children()) - nartists
 
         # plot strip
         if strip_kws is None:strip_kws = {}
         if not isinstance(strip_kws,dict):
             raise TypeError("strip_kws must be dict.")
-        self._plotStrip(ax,
-                        self.dataFrame,
-                        self._layerLabels,
-                        self._boxPos,
-                        self._layerPos,
-                        self._stripWidths,
-                        kernelSize,
-                        stripShrink,
-                        self._stripColor,
-                        strip_kws)
-        plt.gca().axis('off')
+        with self._stage('plotStrip') as rec:
+            nartists = len(ax.get_children())
+            self._plotStrip(ax,
+                            layerLabels,
+                            self._strips,
+                            self._stripColor,
+                            strip_kws,
+                            colorTables = self._colorTables(layerLabels) if self._stripColor == "left" else None,
+                            hatched = self._significance(0.95,invert=True) if flagInsignificant and self._variances else None)
+            rec['artists'] = len(ax.get_children()) - nartists
+        if highlight is not None:
+            self.highlight(ax,highlight,strip_kws = strip_kws)
+        if self._frameScale is not None:
+            # the vertical scale shared by the frames of windows().
+            ax.set_ylim(0,self._frameScale[1])
+        ax.axis('off')
 
         if savePath != None:
-            plt.savefig(savePath, bbox_inches='tight', dpi=800)
+            with self._stage('savefig'):
+                fig.savefig(savePath, bbox_inches='tight', dpi=800)
         
         return fig,ax
 
+    def _viewport(self,layers):
+        """tuple, names of the layers of a window(see plot(layers=)), in order."""
+        names = list(self._layerLabels.keys())
+        if layers is None:
+            return tuple(names)
+        if not isinstance(layers,slice) or layers.step not in (None,1):
+            raise ValueError("layers must be a slice of adjacent layers, e.g. slice(2,5).")
+        visible = tuple(names[layers])
+        if not visible:
+            raise ValueError("No layer in {0}.".format(layers))
+        return visible
+
+    def _preview(self,fmt):
+        """
+        Image(bytes) of a size-capped, low-resolution preview, strips thinner than a pixel are left out.
+        Previews are cached until the counts, labels or colors change.
+        """
+        labelCounts,flows = self._aggregate()
+        colorDict = self.colorDict
+        key = (self._layerLabels,labelCounts,flows,colorDict,self._stripColor,self.colorMode)
+        previews = getattr(self,'_previews',None)
+        if previews is None or any(old is not new for old,new in zip(previews[0],key)):
+            previews = self._previews = (key,{})
+        if fmt in previews[1]:
+            return previews[1][fmt]
+
+        from matplotlib.figure import Figure
+        from matplotlib.collections import PolyCollection
+        width,height = PREVIEW_SIZE
+        boxPos = core.setBoxPos(self._layerLabels,labelCounts,0.02)
+        layerPos = core.setLayerPos(self._layerLabels.keys(),2,10)
+        # rows of a pixel, from the top of the highest layer.
+        top = max([boxPos[layer][labels[-1]]['top'] for layer,labels in self._layerLabels.items() if labels] + [1])
+        pixel = top / (height * PREVIEW_DPI)
+        culled = OrderedDict()
+        for layer,flow in flows.items():
+            keep = np.flatnonzero(flow['width'] >= pixel * PREVIEW_MIN_PIXELS)
+            # the heaviest strips, in their drawing order.
+            keep = np.sort(keep[np.argsort(-flow['width'][keep],kind='stable')[:PREVIEW_MAX_STRIPS]])
+            culled[layer] = {side:flow[side][keep] for side in ('left','right','width')}
+        strips = core.setStripGeometry(self._layerLabels,boxPos,layerPos,culled)
+        colorTables = self._colorTables(self._layerLabels)
+
+        fig = Figure(figsize = (width,height))
+        ax = fig.subplots()
+        # one collection of boxes per layer and of strips per layer pair.
+        for layer,labels in self._layerLabels.items():
+            bottoms = np.array([boxPos[layer][label]['bottom'] for label in labels],dtype=float)
+            tops = np.array([boxPos[layer][label]['top'] for label in labels],dtype=float)
+            start,end = layerPos[layer]['layerStart'],layerPos[layer]['layerEnd']
+            boxes = np.stack([np.broadcast_to([start,start,end,end],(len(labels),4)),
+                              np.stack([bottoms,tops,tops,bottoms],axis=1)],axis=2)
+            ax.add_collection(PolyCollection(boxes,facecolors = colorTables[layer],edgecolors = 'none',alpha = 0.9))
+            # labels of boxes too low to read are left out.
+            for label,bottom,top in zip(labels,bottoms.tolist(),tops.tolist()):
+                if top - bottom >= pixel * PREVIEW_FONT_PIXELS:
+                    ax.text(start - 0.3,(bottom + top) / 2,label,{'ha':'right','va':'center'},fontsize = 6)
+        for layer,strip in strips.items():
+            x = np.concatenate([strip['x'],strip['x'][::-1]])
+            polygons = np.stack([np.broadcast_to(x,(len(strip['width']),len(x))),
+                                 np.concatenate([strip['ysBottom'],strip['ysTop'][:,::-1]],axis=1)],axis=2)
+            colors = colorTables[layer][strip['left']] if self._stripColor == "left" else self._stripColor
+            ax.add_collection(PolyCollection(polygons,facecolors = colors,edgecolors = 'none',alpha = 0.4))
+        ax.autoscale_view()
+        ax.axis('off')
+        buffer = io.BytesIO()
+        fig.savefig(buffer,format = fmt,dpi = PREVIEW_DPI,bbox_inches = 'tight')
+        previews[1][fmt] = buffer.getvalue()
+        return previews[1][fmt]
+
+    def _repr_png_(self):
+        """
+        Preview in notebooks, see _preview(), plot() renders at full resolution.
+        The only _repr_*_ method, IPython renders each format that is defined.
+        """
+        return self._preview('png')
+
+    def _getFlowIndex(self):
+        """FlowIndex of the flows, with the paths of the rows if they are retained(and not sampled)."""
+        labelCounts,flows = self._aggregate()
+        if getattr(self,'_flowIndex',None) is None or self._flowIndex[0] is not flows:
+            paths = pathCounts = None
+            if self.dataFrame is not None and self._sampling is None:
+                with self._stage('paths') as rec:
+                    paths,pathCounts = core.countPaths(core.encodeLayers(self.dataFrame,self._layerLabels))
+                    rec['rows'] = len(self.dataFrame)
+            self._flowIndex = (flows,FlowIndex(self._layerLabels,flows,paths,pathCounts))
+        return self._flowIndex[1]
+
+    def _selectLabels(self,labels):
+        """
+        {layer:indices of labels} of a label(in all its layers), or of a dict {column name:label or list of labels}.
+        """
+        if isinstance(labels,dict):
+            selection = OrderedDict((self._layerName(layer),labels[layer] if isinstance(labels[layer],list) else [labels[layer]])
+                                    for layer in labels)
+        else:
+            selection = OrderedDict((layer,[labels]) for layer,layerLabels in self._layerLabels.items() if labels in layerLabels)
+            if not selection:
+                raise ValueError("Unknown label:{0}".format(labels))
+        indices = OrderedDict()
+        for layer,selected in selection.items():
+            position = {label:i for i,label in enumerate(self._layerLabels[layer])}
+            missing = [label for label in selected if label not in position]
+            if missing:
+                raise ValueError("Unknown labels {0} in {1}".format(missing,layer))
+            indices[layer] = np.array([position[label] for label in selected],dtype=np.int64)
+        return indices
+
+    def through(self,labels):
+        """
+        Flows of the rows passing through labels, answered from an index of the flows(see pysankey2.flowindex),
+        without rescanning the rows. The distinct paths of the rows are counted on the first query, so if the
+        rows are not retained(retain_data=False, from_counts) or sampled, only the strips adjacent to the labels are given.
+
+        Parameters:
+        ----------
+        labels:
+            A label(in all layers holding it), or a dict {column name:label or list of labels}.
+
+        Returns:
+        -------
+        records:list of dict, one per strip, with keys 'layer','rightLayer','source','target','width'
+            (number of rows of the strip passing through labels), layers are named by the column names of the dataFrame.
+        """
+        labelCounts,flows = self._aggregate()
+        names = {new:old for old,new in self._colnameMaps.items()}
+        layers = list(self._layerLabels.keys())
+        records = []
+        for layer,(strips,widths) in self._getFlowIndex().through(self._selectLabels(labels)).items():
+            rightLayer = layers[layers.index(layer) + 1]
+            leftLabels,rightLabels = self._layerLabels[layer],self._layerLabels[rightLayer]
+            flow = flows[layer]
+            for li,ri,width in zip(flow['left'][strips].tolist(),flow['right'][strips].tolist(),widths.tolist()):
+                records.append({'layer':names[layer],'rightLayer':names[rightLayer],
+                                'source':leftLabels[li],'target':rightLabels[ri],'width':width})
+        return records
+
+    def highlight(self,ax,labels,color=None,strip_kws=None):
+        """
+        Draw the flows of the rows passing through labels over the strips of the last plot() on ax,
+        the layout is reused and only the affected strips are drawn.
+
+        Parameters:
+        ----------
+        labels:
+            A label(in all layers holding it), or a dict {column name:label or list of labels}.
+
+        color:optional.
+            Color of the highlighted flows, default to the color of their left box.
+
+        strip_kws:
+            Additional keyword arguments, which would be passed to plt.fill_between().
+
+        Returns:
+        --------
+        artists:list of the matplotlib artists drawn, e.g. to remove them.
+        """
+        if getattr(self,'_strips',None) is None:
+            raise SankeyException("No layout to highlight, please call plot() first.")
+        if strip_kws is None:strip_kws = {}
+        selection = self._selectLabels(labels)
+        colorTables = self._colorTables(self._layoutLabels) if color is None else None
+        artists = []
+        with self._stage('highlight') as rec:
+            for layer,(strips,widths) in self._getFlowIndex().through(selection).items():
+                if layer not in self._strips:
+                    # outside the window of plot(layers=).
+                    continue
+                strip = self._strips[layer]
+                bottom,top = strip['ysBottom'][strips],strip['ysTop'][strips]
+                # rows through the labels take the lower part of each strip.
+                fraction = widths / np.maximum(strip['width'][strips],1)
+                top = bottom + (top - bottom) * fraction[:,None]
+                colors = colorTables[layer][strip['left'][strips]] if color is None else [color] * len(strips)
+                for i in range(len(strips)):
+                    artists.append(ax.fill_between(strip['x'],bottom[i],top[i],alpha=0.8,color=colors[i],**strip_kws))
+            rec['strips'] = len(artists)
+            rec['artists'] = len(artists)
+        return artists
+
+    def _getPickIndex(self):
+        """PickIndex of the layout of the last plot(), built once per plot()."""
+        if getattr(self,'_strips',None) is None:
+            raise SankeyException("No layout to pick from, please call plot() first.")
+        if getattr(self,'_pickIndex',None) is None or self._pickIndex[0] is not self._strips:
+            labelCounts,flows = self._aggregate()
+            names = {new:old for old,new in self._colnameMaps.items()}
+            self._pickIndex = (self._strips,PickIndex(self._layoutLabels,labelCounts,self._boxPos,
+                                                      self._layerPos,self._strips,layerNames = names))
+        return self._pickIndex[1]
+
+    def pick(self,x,y):
+        """
+        Find the box or strip of the last plot() at data coordinates (x,y), in logarithmic time
+        (see pysankey2.interaction.PickIndex).
+
+        Returns:
+        -------
+        record:dict, None if nothing is at (x,y).
+            box:{'type':'box','layer','label','count','index'}
+            strip:{'type':'strip','layer','rightLayer','source','target','width','index'}
+            Layers are named by the column names of the dataFrame.
+        """
+        return self._getPickIndex().pick(x,y)
+
+    def hover(self,ax,callback=None):
+        """
+        Show the box or strip under the cursor of an interactive figure.
+
+        Parameters:
+        ----------
+        ax:matplotlib Axes
+            The Axes of plot().
+
+        callback:callable, optional.
+            Called as callback(record) when the cursor moves over ax(record is None if over nothing, see pick()),
+            default to a tooltip annotation.
+
+        Returns:
+        --------
+        cid:int, the connection id of the event handler, see matplotlib FigureCanvasBase.mpl_disconnect.
+        """
+        index = self._getPickIndex()
+        if callback is None:
+            tooltip = ax.annotate("",xy=(0,0),xytext=(10,10),textcoords='offset points',
+                                  bbox={'boxstyle':'round','fc':'white','alpha':0.9})
+            tooltip.set_visible(False)
+
+        def onMove(event):
+            if event.inaxes is not ax or event.xdata is None:
+                return
+            record = index.pick(event.xdata,event.ydata)
+            if callback is not None:
+                callback(record)
+                return
+            if record is None:
+                tooltip.set_visible(False)
+            else:
+                if record['type'] == 'box':
+                    text = "{0}: {1}".format(record['label'],record['count'])
+                else:
+                    text = "{0} -> {1}: {2}".format(record['source'],record['target'],record['width'])
+                tooltip.xy = (event.xdata,event.ydata)
+                tooltip.set_text(text)
+                tooltip.set_visible(True)
+            ax.figure.canvas.draw_idle()
+        return ax.figure.canvas.mpl_connect('motion_notify_event',onMove)
+
     @property
     def colnameMaps(self):
         """
@@ -510,8 +1355,25 @@ class Sankey:
     def layerLabels(self):
         """
         dict, set of layer specific labels in the data.(e.g. {'layer1':['label1','label2','label4'],'layer2':['label1','label3','label5']})
+        Setting layerLabels(keys are column names of dataFrame, as in __init__) reorders the boxes,
+        from the aggregated counts only.
         """
         return self._layerLabels
+
+    @layerLabels.setter
+    def layerLabels(self,layerLabels):
+        # layers not passing keep their order.
+        provided = {self._layerName(layer):list(labels) for layer,labels in layerLabels.items()}
+        layerLabels = OrderedDict((layer,provided.get(layer,labels)) for layer,labels in self._layerLabels.items())
+        indexMaps = OrderedDict()
+        for layer,labels in self._layerLabels.items():
+            if set(labels) != set(layerLabels[layer]) or len(labels) != len(layerLabels[layer]):
+                msg_provided = "Provided Labels:" + ",".join([str(i) for i in layerLabels[layer]]) + "\n"
+                msg_df = "dataFrame Labels:" + ",".join([str(i) for i in labels]) + "\n"
+                raise LabelMismatchError('In {0},{1} do not match with {2}'.format(layer,msg_provided,msg_df))
+            position = {label:i for i,label in enumerate(layerLabels[layer])}
+            indexMaps[layer] = np.array([position[label] for label in labels],dtype=np.int64)
+        self._remapLabels(layerLabels,indexMaps)
     
     @property
     def boxPos(self):
@@ -544,8 +1406,48 @@ class Sankey:
     def colorDict(self):
         """
         dict, see doc strings of colorMode in __init__ for details.
+        Setting colorDict recolors the diagram, colors are checked against the labels as in __init__.
+        """
+        if self._colorDict is None:
+            self._colorDict = self._setColorDict(self._layerLabels,mode = self.colorMode)
+        return self._colorDict
+
+    @colorDict.setter
+    def colorDict(self,colorDict):
+        self._checkColorMatchLabels(colorDict,mode = self.colorMode)
+        if self.colorMode == "layer":
+            colorDict = self._renameColorDict(colorDict)
+        self._colorDict = colorDict        
+
+    @property
+    def last_profile(self):
+        """
+        pysankey2.profiling.Profile of the last construction or plot(), with the wall time and counters of each stage:
+            'sample'(rows, with sample), 'copy'(rows), 'labels'(rows), 'aggregate'(rows), 'boxPos'(boxes), 'stripWidth'(strips),
+            'stripGeometry'(strips), 'plotBox'(artists), 'plotStrip'(artists), 'savefig'.
+        Stages whose results are cached(e.g. 'aggregate' on a second plot) are not recorded.
+        """
+        return self._profile
+
+    @property
+    def counts(self):
+        """
+        pysankey2.FlowCounts of the labels and flows(keyed by the column names of the dataFrame),
+        e.g. to merge with the counts of other partitions.
+        """
+        labelCounts,flows = self._aggregate()
+        names = {new:old for old,new in self._colnameMaps.items()}
+        return FlowCounts(OrderedDict((names[layer],labels) for layer,labels in self._layerLabels.items()),
+                          {names[layer]:counts for layer,counts in labelCounts.items()},
+                          {names[layer]:flow for layer,flow in flows.items()})
+
+    @property
+    def memoryPlan(self):
+        """
+        dict, strategy and estimated memory of each stage picked for memory_budget(None without budget),
+        see pysankey2.memory. The 'aggregate' stage is planned on the first plot().
         """
-        return self._colorDict        
+        return self._memoryPlan
 
     @property
     def stripColor(self):
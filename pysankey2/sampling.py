@@ -0,0 +1,130 @@
+"""
+Approximate counts of a Sankey diagram from a random sample of rows.
+
+Rows are drawn uniformly without replacement. Optionally they are post-stratified on a column:
+the rows of each label of that column(NaN included) are counted exactly, and the sampled rows
+of a stratum stand for all rows of the stratum. Label counts and flows are estimated as
+
+    N_h * c_h / n_h, summed over the strata h,
+
+where N_h and n_h are the rows and sampled rows of stratum h, and c_h the sampled rows of the
+label or flow in it. Their variance is estimated as
+
+    N_h^2 * p_h * (1 - p_h) / (n_h - 1) * (1 - n_h / N_h), summed over the strata, with p_h = c_h / n_h,
+
+and confidence intervals use the normal approximation. Strata without sampled rows are left out.
+"""
+from collections import OrderedDict
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from . import core
+
+__all__ = ['DEFAULT_SAMPLE_ROWS','sampleFrame','estimate','zScore']
+
+# sample size of approx=True.
+DEFAULT_SAMPLE_ROWS = 100000
+
+def zScore(confidence):
+    """z of a two-sided normal confidence interval, e.g. 1.96 for 0.95."""
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be in (0,1).")
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+def sampleFrame(dataFrame,sample,stratify=None,seed=0):
+    """
+    Draw a random sample of the rows.
+
+    Parameters:
+    ----------
+    sample:int or float
+        Number of rows, or fraction of the rows if a float in (0,1](1.0 keeps all rows).
+        Floats above 1 must be whole numbers of rows, e.g. 1000.0.
+
+    stratify:str, optional.
+        Column to post-stratify on, its labels are counted over all rows.
+
+    seed:int, default=0.
+        Seed of the random generator.
+
+    Returns:
+    -------
+    sample:pd.DataFrame, the sampled rows in their original order.
+
+    info:dict, {'rows','sampleRows','strata'(stratum of each sampled row),
+        'stratumRows','stratumSampleRows'(arrays indexed by stratum)}
+    """
+    nrows = len(dataFrame)
+    if isinstance(sample,float) and 0 < sample <= 1:
+        size = int(round(sample * nrows))
+    elif sample >= 1 and (not isinstance(sample,float) or sample.is_integer()):
+        size = int(sample)
+    else:
+        raise ValueError("sample must be a number of rows or a fraction in (0,1].")
+    size = min(size,nrows)
+    rng = np.random.default_rng(seed)
+    positions = np.sort(rng.choice(nrows,size,replace=False)) if size < nrows else np.arange(nrows)
+
+    if stratify is None:
+        strata = np.zeros(size,dtype=np.int64)
+        stratumRows = np.array([nrows],dtype=np.int64)
+    else:
+        codes,uniques = pd.factorize(dataFrame.loc[:,stratify])
+        # NaN(-1) is a stratum of its own.
+        codes = np.where(codes < 0,len(uniques),codes).astype(np.int64)
+        strata = codes[positions]
+        stratumRows = np.bincount(codes).astype(np.int64)
+    info = {'rows':nrows,'sampleRows':size,'strata':strata,'stratumRows':stratumRows,
+            'stratumSampleRows':np.bincount(strata,minlength=len(stratumRows)).astype(np.int64)}
+    return dataFrame.iloc[positions],info
+
+def _estimateKeys(keys,info):
+    """
+    Estimate the rows of each key(-1 for none) of the sampled rows.
+    Returns:
+    -------
+    keys,estimate,variance: arrays, for the keys present in the sample(sorted).
+    """
+    valid = keys >= 0
+    nstrata = len(info['stratumRows'])
+    combined,counts = np.unique(keys[valid] * nstrata + info['strata'][valid],return_counts=True)
+    stratum = combined % nstrata
+    N = info['stratumRows'][stratum].astype(float)
+    n = info['stratumSampleRows'][stratum].astype(float)
+    p = counts / n
+    estimate = N * p
+    variance = N ** 2 * p * (1 - p) / np.maximum(n - 1,1) * (1 - n / N)
+    keys,inverse = np.unique(combined // nstrata,return_inverse=True)
+    return (keys,np.bincount(inverse.ravel(),weights=estimate,minlength=len(keys)),
+            np.bincount(inverse.ravel(),weights=variance,minlength=len(keys)))
+
+def estimate(dataFrame,layerLabels,info):
+    """
+    Estimate the label counts and flows of all rows from the sampled rows(see sampleFrame).
+
+    Returns:
+    -------
+    labelCounts,flows: estimates(rounded), see core.aggregate().
+
+    labelVariances,flowVariances: the variances of the estimates, in the same layout as labelCounts and flows.
+    """
+    codes = core.encodeLayers(dataFrame,layerLabels)
+    labelCounts,labelVariances = OrderedDict(),OrderedDict()
+    for layer,labels in layerLabels.items():
+        keys,counts,variances = _estimateKeys(codes[layer],info)
+        labelCounts[layer] = np.zeros(len(labels),dtype=np.int64)
+        labelCounts[layer][keys] = np.rint(counts).astype(np.int64)
+        labelVariances[layer] = np.zeros(len(labels))
+        labelVariances[layer][keys] = variances
+
+    flows,flowVariances = OrderedDict(),OrderedDict()
+    layers = list(layerLabels.keys())
+    for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+        nRight = len(layerLabels[rightLayer])
+        left,right = codes[leftLayer],codes[rightLayer]
+        pairs = np.where((left >= 0) & (right >= 0),left * nRight + right,-1)
+        keys,widths,variances = _estimateKeys(pairs,info)
+        flows[leftLayer] = {'left':keys // nRight,'right':keys % nRight,'width':np.rint(widths).astype(np.int64)}
+        flowVariances[leftLayer] = {'left':keys // nRight,'right':keys % nRight,'width':variances}
+    return labelCounts,flows,labelVariances,flowVariances
@@ -0,0 +1,299 @@
+"""
+Local render service: a pool of worker processes, warmed up once(matplotlib, fonts, colormaps), renders
+Sankey diagrams over HTTP on localhost or a Unix socket, so requests do not pay the start-up of Python.
+
+    python -m pysankey2.serve --port 8765 --workers 4
+    python -m pysankey2.serve --socket /tmp/pysankey2.sock
+
+Endpoints:
+    POST /render   JSON payload(see render()), or a CSV body(Content-Type: text/csv, each row a trans-entity,
+                   each column a layer) with the options as query parameters(format,dpi and the Sankey options
+                   of SANKEY_OPTIONS with a type, e.g. colorMode,stripColor,sample,approx=true).
+                   Returns the image bytes, with the timing of the request in X-Render-Timing(JSON).
+    GET /metrics   JSON with the workers, the requests in flight and waiting for a worker(queueDepth),
+                   counts of requests and errors, and the timing of the recent requests.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler,ThreadingHTTPServer
+from urllib.parse import parse_qsl,urlsplit
+
+__all__ = ['RenderServer','render','main']
+
+# formats of the images, by their Content-Type.
+FORMATS = {'png':'image/png','svg':'image/svg+xml','pdf':'application/pdf','jpg':'image/jpeg'}
+# timings of the recent requests kept for /metrics.
+RECENT_REQUESTS = 100
+# size of the chunks the image is written in.
+CHUNK_BYTES = 1 << 16
+
+def _flag(value):
+    if value.lower() in ('true','1','yes'):
+        return True
+    if value.lower() in ('false','0','no'):
+        return False
+    raise ValueError("{0} is not a boolean.".format(value))
+
+def _number(value):
+    return float(value) if any(c in value for c in '.eE') else int(value)
+
+# options of the requests(others, e.g. savePath, are refused), with the type of those accepted as query parameters.
+SANKEY_OPTIONS = {'layerLabels':None,'colorDict':None,'colorMode':str,'stripColor':str,
+                  'sample':_number,'approx':_flag,'stratify':str,'retain_data':_flag}
+COUNTS_OPTIONS = ('colorDict','colorMode','stripColor')
+PLOT_OPTIONS = ('figSize','fontSize','fontPos','boxInterv','boxWidth','stripLen','kernelSize','stripShrink',
+                'box_kws','text_kws','strip_kws','flagInsignificant','highlight','level')
+
+def _checkOptions(options,allowed,name):
+    """Returns a copy of the <options> dict, raises ValueError if any is not <allowed>."""
+    if not isinstance(options,dict):
+        raise ValueError("'{0}' must be an object.".format(name))
+    refused = sorted(key for key in options if key not in allowed)
+    if refused:
+        raise ValueError("'{0}' does not accept:{1}".format(name,",".join(refused)))
+    return dict(options)
+
+def _queryOptions(query):
+    """Sankey options of the query parameters(strings), converted to their types."""
+    options = _checkOptions(query,[key for key,convert in SANKEY_OPTIONS.items() if convert is not None],'query')
+    return {key:SANKEY_OPTIONS[key](value) for key,value in options.items()}
+
+def _warmUp():
+    """Initializer of the workers: import and render once, so fonts and colormaps are loaded."""
+    import matplotlib
+    matplotlib.use('Agg')
+    from .counts import FlowCounts
+    from .pysankey2 import Sankey
+    counts = FlowCounts({'left':['a','b'],'right':['a','b']},{'left':[1,1],'right':[1,1]},
+                        {'left':{'left':[0,1],'right':[1,0],'width':[1,1]}})
+    render({'counts':counts.to_dict(),'plot':{'figSize':(2,2)},'dpi':10})
+
+def render(payload):
+    """
+    Render a Sankey diagram(in a worker).
+
+    Parameters:
+    ----------
+    payload:dict
+        'counts':FlowCounts.to_dict() of aggregated flows, or 'csv':text of the rows.
+        'sankey':dict, optional, keyword arguments of Sankey()(or Sankey.from_counts), see SANKEY_OPTIONS(COUNTS_OPTIONS).
+        'plot':dict, optional, keyword arguments of Sankey.plot(), see PLOT_OPTIONS(savePath and ax are refused).
+        'format':str, default 'png', see FORMATS.
+        'dpi':int, default 100.
+
+    Returns:
+    -------
+    image:bytes
+
+    timing:dict, {'start':time the worker took the request,'build','plot','savefig':seconds}.
+    """
+    start = time.time()
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from .counts import FlowCounts
+    from .pysankey2 import Sankey
+    fmt = payload.get('format','png')
+    if fmt not in FORMATS:
+        raise ValueError("format must be one of:{0}".format(",".join(FORMATS)))
+    if 'counts' in payload:
+        options = _checkOptions(payload.get('sankey',{}),COUNTS_OPTIONS,'sankey')
+        sky = Sankey.from_counts(FlowCounts.from_dict(payload['counts']),**options)
+    elif 'csv' in payload:
+        options = _checkOptions(payload.get('sankey',{}),SANKEY_OPTIONS,'sankey')
+        sky = Sankey(pd.read_csv(io.StringIO(payload['csv'])),**options)
+    else:
+        raise ValueError("payload must hold 'counts' or 'csv'.")
+    built = time.time()
+    plotKws = _checkOptions(payload.get('plot',{}),PLOT_OPTIONS,'plot')
+    for key in ('figSize','fontPos'):
+        if key in plotKws:
+            plotKws[key] = tuple(plotKws[key])
+    fig,ax = sky.plot(**plotKws)
+    plotted = time.time()
+    buffer = io.BytesIO()
+    fig.savefig(buffer,format=fmt,dpi=payload.get('dpi',100),bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue(),{'start':start,'build':built - start,'plot':plotted - built,'savefig':time.time() - plotted}
+
+class _Metrics:
+    """Thread-safe counters of the requests."""
+    def __init__(self,workers):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.inFlight = 0
+        self.requests = 0
+        self.errors = 0
+        self.recent = deque(maxlen=RECENT_REQUESTS)
+
+    def begin(self):
+        with self._lock:
+            self.inFlight += 1
+            self.requests += 1
+
+    def end(self,timing=None,failed=False):
+        with self._lock:
+            self.inFlight -= 1
+            if failed:
+                self.errors += 1
+            if timing is not None:
+                self.recent.append(timing)
+
+    def snapshot(self):
+        with self._lock:
+            recent = list(self.recent)
+            totals = [timing['total'] for timing in recent]
+            return {'workers':self.workers,'inFlight':self.inFlight,
+                    'queueDepth':max(self.inFlight - self.workers,0),
+                    'requests':self.requests,'errors':self.errors,
+                    'meanSeconds':sum(totals) / len(totals) if totals else None,
+                    'recent':recent}
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "pysankey2"
+
+    def address_string(self):
+        # Unix sockets have no client address.
+        return self.client_address[0] if self.client_address else self.server.address
+
+    def log_message(self,format,*args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self,format,*args)
+
+    def _send(self,status,body,contentType,headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type',contentType)
+        self.send_header('Content-Length',str(len(body)))
+        for key,value in (headers or {}).items():
+            self.send_header(key,value)
+        self.end_headers()
+        for start in range(0,len(body),CHUNK_BYTES):
+            self.wfile.write(body[start:start + CHUNK_BYTES])
+
+    def _sendJSON(self,status,data):
+        self._send(status,json.dumps(data).encode(),'application/json')
+
+    def do_GET(self):
+        if urlsplit(self.path).path == '/metrics':
+            self._sendJSON(200,self.server.metrics.snapshot())
+        else:
+            self._sendJSON(404,{'error':'unknown path {0}'.format(self.path)})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/render':
+            self._sendJSON(404,{'error':'unknown path {0}'.format(self.path)})
+            return
+        received = time.time()
+        metrics = self.server.metrics
+        metrics.begin()
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length',0))).decode()
+            if self.headers.get('Content-Type','').startswith('text/csv'):
+                query = dict(parse_qsl(url.query))
+                payload = {'csv':body,'format':query.pop('format','png'),'dpi':int(query.pop('dpi',100)),
+                           'sankey':_queryOptions(query)}
+            else:
+                payload = json.loads(body)
+            image,timing = self.server.pool.apply(render,(payload,))
+        except Exception as error:
+            metrics.end(failed=True)
+            status = 400 if isinstance(error,(ValueError,KeyError,TypeError)) else 500
+            self._sendJSON(status,{'error':'{0}: {1}'.format(type(error).__name__,error)})
+            return
+        timing['queue'] = timing.pop('start') - received
+        timing['total'] = time.time() - received
+        metrics.end(timing)
+        self._send(200,image,FORMATS[payload.get('format','png')],{'X-Render-Timing':json.dumps(timing)})
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn,socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class RenderServer:
+    """
+    Render service over HTTP, on host:port or on a Unix socket.
+
+    Parameters:
+    -----------
+    host:str, default='127.0.0.1'.
+
+    port:int, default=8765.
+        0 picks a free port, see address.
+
+    socketPath:str, optional.
+        If passing, serve on this Unix socket instead of host:port.
+
+    workers:int, optional.
+        Number of worker processes, default to the number of cpus.
+
+    verbose:bool, default=False.
+        If True, log each request to stderr.
+    """
+    def __init__(self,host='127.0.0.1',port=8765,socketPath=None,workers=None,verbose=False):
+        workers = workers or os.cpu_count() or 1
+        # workers are started(and warmed up) before the server threads.
+        self.pool = multiprocessing.Pool(workers,initializer=_warmUp)
+        if socketPath is not None:
+            if os.path.exists(socketPath):
+                os.unlink(socketPath)
+            self.httpd = _UnixHTTPServer(socketPath,_Handler)
+            self.address = socketPath
+        else:
+            self.httpd = ThreadingHTTPServer((host,port),_Handler)
+            self.address = self.httpd.server_address
+        self.httpd.pool = self.pool
+        self.httpd.metrics = _Metrics(workers)
+        self.httpd.verbose = verbose
+        self.httpd.address = str(self.address)
+        self._socketPath = socketPath
+
+    @property
+    def metrics(self):
+        """dict, see GET /metrics."""
+        return self.httpd.metrics.snapshot()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        """Serve in a background thread, returns the thread."""
+        thread = threading.Thread(target=self.httpd.serve_forever,daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Stop serving and the workers."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.pool.terminate()
+        self.pool.join()
+        if self._socketPath is not None and os.path.exists(self._socketPath):
+            os.unlink(self._socketPath)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pysankey2.serve',description='Render Sankey diagrams over HTTP.')
+    parser.add_argument('--host',default='127.0.0.1')
+    parser.add_argument('--port',type=int,default=8765)
+    parser.add_argument('--socket',default=None,help='serve on a Unix socket instead of host:port.')
+    parser.add_argument('--workers',type=int,default=None,help='number of worker processes(default: cpus).')
+    parser.add_argument('--verbose',action='store_true')
+    args = parser.parse_args(argv)
+    server = RenderServer(args.host,args.port,socketPath=args.socket,workers=args.workers,verbose=args.verbose)
+    print("pysankey2 render server on {0}".format(server.address),flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == '__main__':
+    # workers look render() up by its module, which must be importable(not __main__).
+    from pysankey2.serve import main as _main
+    _main()
@@ -0,0 +1,195 @@
+"""
+Bounded-memory counts of a stream of rows, for unbounded label sets(e.g. URLs or search terms).
+
+Each layer and each pair of adjacent layers keeps a count-min sketch of all its labels(or flows)
+and the <capacity> heaviest ones as candidates. A candidate is counted exactly from the chunk it
+enters the candidates on, plus the sketch estimate of the rows before, so counts are never
+underestimated, and overestimated by at most epsilon * rows with probability 1 - delta
+(candidates since the first chunk are exact). Memory does not grow with the stream:
+
+    stream = StreamCounts(['source','target'],capacity=500)
+    for chunk in chunks:
+        stream.update(chunk)
+    Sankey.from_counts(stream.counts(labels=20)).plot()
+"""
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from .counts import FlowCounts
+
+__all__ = ['StreamCounts']
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+def _hashLabels(values):
+    """uint64 hash of each label."""
+    return pd.util.hash_array(np.asarray(values,dtype=object))
+
+class _HeavyHitters:
+    """Count-min sketch of (depth x width) counters, and the <capacity> heaviest keys."""
+
+    def __init__(self,capacity,width,depth,rng):
+        self.capacity = capacity
+        self.width = width
+        self.sketch = np.zeros((depth,width),dtype=np.int64)
+        # odd multipliers of the multiply-shift hash of each row.
+        self.salts = rng.integers(1,2 ** 63,size=(depth,1),dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.total = 0
+        # candidates, sorted by key.
+        self.keys = np.empty(0,dtype=np.uint64)
+        self.base = np.empty(0,dtype=np.int64)
+        self.exact = np.empty(0,dtype=np.int64)
+        self.values = {}
+
+    def _columns(self,keys):
+        return ((keys[None,:] * self.salts) >> np.uint64(32)) % np.uint64(self.width)
+
+    def add(self,keys,counts,values):
+        """Add the <counts> of unique <keys>, whose labels are <values>."""
+        self.total += int(counts.sum())
+        columns = self._columns(keys).astype(np.int64)
+        position = np.searchsorted(self.keys,keys)
+        found = position < len(self.keys)
+        found[found] = self.keys[position[found]] == keys[found]
+        np.add.at(self.exact,position[found],counts[found])
+        new = ~found
+        # rows of new candidates before this chunk.
+        prior = self.sketch[np.arange(len(self.sketch))[:,None],columns[:,new]].min(axis=0,initial=self.total)
+        for row,column in zip(self.sketch,columns):
+            row += np.bincount(column,weights=counts,minlength=self.width).astype(np.int64)
+
+        keys = np.concatenate([self.keys,keys[new]])
+        base = np.concatenate([self.base,prior])
+        exact = np.concatenate([self.exact,counts[new]])
+        newValues = [value for value,isNew in zip(values,new.tolist()) if isNew]
+        if len(keys) > self.capacity:
+            keep = np.argpartition(-(base + exact),self.capacity - 1)[:self.capacity]
+        else:
+            keep = np.arange(len(keys))
+        keep = keep[np.argsort(keys[keep])]
+        kept = set(keys[keep].tolist())
+        self.values = {key:value for key,value in self.values.items() if key in kept}
+        for key,value in zip(keys[len(self.keys):].tolist(),newValues):
+            if key in kept:
+                self.values[key] = value
+        self.keys,self.base,self.exact = keys[keep],base[keep],exact[keep]
+
+    def top(self):
+        """(labels,counts,errors) of the candidates, heaviest first."""
+        counts = self.base + self.exact
+        order = np.argsort(-counts,kind='stable')
+        return [self.values[key] for key in self.keys[order].tolist()],counts[order],self.base[order]
+
+    @property
+    def nbytes(self):
+        return self.sketch.nbytes + self.capacity * 24
+
+class StreamCounts:
+    """
+    Approximate label counts and flows of a stream of rows, in fixed memory.
+
+    Parameters:
+    -----------
+    layers:list
+        Column names of the layers, in order.
+
+    capacity:int, default=1000.
+        Number of labels of each layer and of flows of each pair of layers that are counted individually.
+
+    epsilon:float, default=0.001.
+        Counts are overestimated by at most epsilon * rows(see error)...
+
+    delta:float, default=0.01.
+        ...with probability 1 - delta. Sketches take 8 * ceil(e / epsilon) * ceil(ln(1 / delta)) bytes each.
+
+    seed:int, default=0.
+        Seed of the hash functions.
+    """
+    def __init__(self,layers,capacity=1000,epsilon=0.001,delta=0.01,seed=0):
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("epsilon and delta must be in (0,1).")
+        self.layers = list(layers)
+        self.epsilon = epsilon
+        self.delta = delta
+        self.rows = 0
+        width = int(math.ceil(math.e / epsilon))
+        depth = int(math.ceil(math.log(1 / delta)))
+        rng = np.random.default_rng(seed)
+        self._labels = OrderedDict((layer,_HeavyHitters(capacity,width,depth,rng)) for layer in self.layers)
+        self._flows = OrderedDict((layer,_HeavyHitters(capacity,width,depth,rng)) for layer in self.layers[:-1])
+
+    def update(self,dataFrame):
+        """Count a chunk of rows(a dataFrame with the layer columns)."""
+        self.rows += len(dataFrame)
+        codes = OrderedDict()
+        for layer in self.layers:
+            layerCodes,uniques = pd.factorize(dataFrame.loc[:,layer])
+            counts = np.bincount(layerCodes[layerCodes >= 0],minlength=len(uniques)).astype(np.int64)
+            uniques = np.asarray(uniques,dtype=object)
+            hashes = _hashLabels(uniques)
+            self._labels[layer].add(hashes,counts,uniques.tolist())
+            codes[layer] = (layerCodes,uniques,hashes)
+        for leftLayer,rightLayer in zip(self.layers[:-1],self.layers[1:]):
+            (left,leftLabels,leftHashes),(right,rightLabels,rightHashes) = codes[leftLayer],codes[rightLayer]
+            valid = (left >= 0) & (right >= 0)
+            pairs,counts = np.unique(left[valid].astype(np.int64) * len(rightLabels) + right[valid],return_counts=True)
+            li,ri = pairs // len(rightLabels),pairs % len(rightLabels)
+            hashes = (leftHashes[li] * _GOLDEN) ^ rightHashes[ri]
+            self._flows[leftLayer].add(hashes,counts.astype(np.int64),
+                                       list(zip(leftLabels[li].tolist(),rightLabels[ri].tolist())))
+
+    @property
+    def error(self):
+        """float, bound of the overestimate of any count(with probability 1 - delta)."""
+        return self.epsilon * self.rows
+
+    @property
+    def nbytes(self):
+        """int, memory of the sketches and candidates(excluding the labels themselves), fixed by the parameters."""
+        return sum(hitters.nbytes for hitters in list(self._labels.values()) + list(self._flows.values()))
+
+    def topLabels(self,layer):
+        """
+        Returns:
+        -------
+        records:list of dict, the candidate labels of <layer>, heaviest first, with keys 'label','count',
+            and 'error'(the overestimate bound of count, 0 if exact).
+        """
+        labels,counts,errors = self._labels[layer].top()
+        return [{'label':label,'count':count,'error':min(error,self.error)}
+                for label,count,error in zip(labels,counts.tolist(),errors.tolist())]
+
+    def counts(self,labels=None):
+        """
+        Label counts and flows of the heaviest labels, e.g. for Sankey.from_counts.
+
+        Parameters:
+        ----------
+        labels:int, optional.
+            Maximum number of labels of each layer, default to all candidates.
+
+        Returns:
+        -------
+        FlowCounts, boxes are at least as high as their strips.
+        """
+        layerLabels,labelCounts,positions = OrderedDict(),OrderedDict(),OrderedDict()
+        for layer,hitters in self._labels.items():
+            top,counts,errors = hitters.top()
+            layerLabels[layer] = top[:labels]
+            labelCounts[layer] = counts[:labels].copy()
+            positions[layer] = {label:i for i,label in enumerate(layerLabels[layer])}
+        flows = OrderedDict()
+        for leftLayer,rightLayer in zip(self.layers[:-1],self.layers[1:]):
+            top,widths,errors = self._flows[leftLayer].top()
+            left,right = positions[leftLayer],positions[rightLayer]
+            kept = [i for i,(source,target) in enumerate(top) if source in left and target in right]
+            flow = {'left':np.array([left[top[i][0]] for i in kept],dtype=np.int64),
+                    'right':np.array([right[top[i][1]] for i in kept],dtype=np.int64),
+                    'width':widths[kept]}
+            flows[leftLayer] = flow
+            for layer,side in ((leftLayer,'left'),(rightLayer,'right')):
+                stacked = np.bincount(flow[side],weights=flow['width'],minlength=len(layerLabels[layer]))
+                np.maximum(labelCounts[layer],stacked.astype(np.int64),out=labelCounts[layer])
+        return FlowCounts(layerLabels,labelCounts,flows)
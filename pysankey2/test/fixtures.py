@@ -0,0 +1,16 @@
+"""
+Data shared by the tests.
+"""
+import numpy as np
+from pysankey2.datasets import load_countrys
+
+def countrysWithGaps(column=2,every=9,names=('First','Mid','Last')):
+    """
+    load_countrys() with NaN in every <every> rows of its <column>-th column(entities leaving the diagram),
+    and its columns renamed to <names>(if passing).
+    """
+    df = load_countrys()
+    if names is not None:
+        df.columns = list(names)
+    df.iloc[::every,column] = np.nan
+    return df
@@ -0,0 +1,84 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pysankey2 import Sankey
+from pysankey2 import LabelMismatchError
+from pysankey2.test.fixtures import countrysWithGaps
+from pysankey2.utils import setColorConf
+import unittest
+
+class TestAggregated(unittest.TestCase):
+    """Operations on the aggregated counts only(retain_data=False)."""
+
+    def setUp(self):
+        self.df = countrysWithGaps()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_retain_data(self):
+        ref = Sankey(self.df)
+        ref.plot()
+        sky = Sankey(self.df,retain_data=False)
+        self.assertIsNone(sky.dataFrame)
+        sky.plot()
+        self.assertEqual(sky.boxPos,ref.boxPos)
+        self.assertEqual(sky.stripWidth,ref.stripWidth)
+
+    def test_reorder(self):
+        sky = Sankey(self.df,retain_data=False)
+        layerLabels = {'First':sorted(sky.layerLabels['layer1']),'Last':sorted(sky.layerLabels['layer3'],reverse=True)}
+        sky.layerLabels = layerLabels
+        self.assertEqual(sky.layerLabels['layer1'],layerLabels['First'])
+        self.assertEqual(sky.layerLabels['layer3'],layerLabels['Last'])
+        sky.plot()
+
+        ref = Sankey(self.df,layerLabels={'First':sky.layerLabels['layer1'],
+                                          'Mid':sky.layerLabels['layer2'],
+                                          'Last':sky.layerLabels['layer3']})
+        ref.plot()
+        self.assertEqual(sky.boxPos,ref.boxPos)
+        self.assertEqual(sky.stripWidth,ref.stripWidth)
+
+        with self.assertRaises(LabelMismatchError):
+            sky.layerLabels = {'First':layerLabels['First'][1:]}
+
+    def test_relabel(self):
+        mapping = {'USA':'America','Canada':'America','Mexico':'America'}
+        ref = Sankey(self.df.replace(mapping))
+        ref.plot()
+        sky = Sankey(self.df,retain_data=False)
+        sky.relabel(mapping)
+        self.assertEqual(set(sky.labels),set(ref.labels))
+        for layer in ref.layerLabels:
+            self.assertEqual(set(sky.layerLabels[layer]),set(ref.layerLabels[layer]))
+        sky.layerLabels = {'First':ref.layerLabels['layer1'],'Mid':ref.layerLabels['layer2'],'Last':ref.layerLabels['layer3']}
+        sky.plot()
+        self.assertEqual(sky.boxPos,ref.boxPos)
+        self.assertEqual(sky.stripWidth,ref.stripWidth)
+
+        # a single layer
+        sky = Sankey(self.df,retain_data=False)
+        sky.relabel({'USA':'America'},layer='Mid')
+        self.assertIn('America',sky.layerLabels['layer2'])
+        self.assertIn('USA',sky.layerLabels['layer1'])
+        self.assertEqual(set(sky.labels),set(sky.layerLabels['layer1']) | set(sky.layerLabels['layer2']) | set(sky.layerLabels['layer3']))
+
+    def test_recolor(self):
+        sky = Sankey(self.df,retain_data=False)
+        colors = dict(zip(sky.labels,setColorConf(len(sky.labels),colors="Set3")))
+        sky.colorDict = colors
+        self.assertEqual(sky.colorDict,colors)
+        with self.assertRaises(LabelMismatchError):
+            sky.colorDict = {'USA':'#000000'}
+        # provided colors follow relabeling.
+        sky.relabel({'USA':'America'})
+        self.assertEqual(sky.colorDict['America'],colors['USA'])
+        self.assertNotIn('USA',sky.colorDict)
+        sky.plot()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import subprocess
+sys.path.append(os.path.realpath('.'))
+import numpy as np
+import pandas as pd
+from pysankey2 import core
+from pysankey2 import LabelMismatchError
+from pysankey2.test.fixtures import countrysWithGaps
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+class TestCore(unittest.TestCase):
+
+    def setUp(self):
+        # entities dropping out in the middle layer.
+        self.df = countrysWithGaps(column=1,every=7,names=None)
+        self.layerLabels = core.getLayerLabels(self.df)
+        codes = core.encodeLayers(self.df,self.layerLabels)
+        self.labelCounts = core.countLabels(codes,self.layerLabels)
+        self.flows = core.countFlows(codes,self.layerLabels)
+
+    def test_labels(self):
+        for layer,labels in self.layerLabels.items():
+            self.assertEqual(labels,list(self.df.loc[:,layer].dropna().unique()))
+        expected = list(pd.unique(self.df.T.stack().dropna().values))
+        self.assertEqual(core.getAllLabels(self.df),expected)
+        categorical = self.df.astype('category')
+        self.assertEqual(core.getLayerLabels(categorical),self.layerLabels)
+        layerLabels = {layer:labels + [np.nan] for layer,labels in self.layerLabels.items()}
+        core.checkLayerLabelsMatchDF(self.df,layerLabels,{layer:layer for layer in self.df.columns},self.layerLabels)
+        layerLabels['layer2'] = layerLabels['layer2'][1:]
+        with self.assertRaises(LabelMismatchError):
+            core.checkLayerLabelsMatchDF(self.df,layerLabels,{layer:layer for layer in self.df.columns})
+
+    def test_countLabels(self):
+        for layer,labels in self.layerLabels.items():
+            for label,count in zip(labels,self.labelCounts[layer]):
+                self.assertEqual(count,(self.df.loc[:,layer] == label).sum())
+
+    def test_stripWidth(self):
+        stripWidths = core.setStripWidth(self.layerLabels,self.flows)
+        layers = list(self.layerLabels.keys())
+        for leftLayer,rightLayer in zip(layers[:-1],layers[1:]):
+            for leftLabel in self.layerLabels[leftLayer]:
+                for rightLabel in self.layerLabels[rightLayer]:
+                    width = ((self.df.loc[:,leftLayer] == leftLabel) & (self.df.loc[:,rightLayer] == rightLabel)).sum()
+                    self.assertEqual(stripWidths[leftLayer][leftLabel].get(rightLabel,0),width)
+
+    def test_sparse_flows(self):
+        dense = core.countFlows(core.encodeLayers(self.df,self.layerLabels),self.layerLabels)
+        cells = core.DENSE_FLOW_CELLS
+        core.DENSE_FLOW_CELLS = 0
+        try:
+            sparse = core.countFlows(core.encodeLayers(self.df,self.layerLabels),self.layerLabels)
+        finally:
+            core.DENSE_FLOW_CELLS = cells
+        for layer in dense:
+            for key in ('left','right','width'):
+                np.testing.assert_array_equal(dense[layer][key],sparse[layer][key])
+
+    def test_stripGeometry(self):
+        boxPos = core.setBoxPos(self.layerLabels,self.labelCounts,0.02)
+        layerPos = core.setLayerPos(self.layerLabels.keys(),2,10)
+        strips = core.setStripGeometry(self.layerLabels,boxPos,layerPos,self.flows,kernelSize=25,stripShrink=0.5)
+        for leftLayer,strip in strips.items():
+            # strips stack from the bottom of each box(rows dropping out in the next layer leave the top empty).
+            for li in range(len(self.layerLabels[leftLayer])):
+                sel = strip['left'] == li
+                if sel.any():
+                    label = self.layerLabels[leftLayer][li]
+                    self.assertAlmostEqual(strip['leftBottom'][sel].min(),boxPos[leftLayer][label]['bottom'])
+                    self.assertAlmostEqual(strip['leftTop'][sel].max() - strip['leftBottom'][sel].min(),strip['width'][sel].sum())
+                    self.assertLessEqual(strip['leftTop'][sel].max(),boxPos[leftLayer][label]['top'])
+            for i in range(len(strip['width'])):
+                ys_bottom,ys_top = core.setStripPos(strip['leftBottom'][i],strip['rightBottom'][i],
+                                                    strip['leftTop'][i],strip['rightTop'][i],25,0.5)
+                np.testing.assert_allclose(strip['ysBottom'][i],ys_bottom,atol=1e-9)
+                np.testing.assert_allclose(strip['ysTop'][i],ys_top,atol=1e-9)
+                self.assertEqual(len(strip['x']),len(ys_bottom))
+
+    def test_layout(self):
+        lay = core.layout(self.df,geometry=True)
+        json.dumps(lay)
+        self.assertEqual(len(lay['boxes']),sum(len(labels) for labels in self.layerLabels.values()))
+        self.assertEqual(len(lay['strips']),sum(len(flow['width']) for flow in self.flows.values()))
+        self.assertEqual(sum(s['width'] for s in lay['strips'] if s['leftLayer'] == 'layer1'),
+                         self.df.loc[:,['layer1','layer2']].notna().all(axis=1).sum())
+
+    def test_layout_layerLabels(self):
+        layerLabels = {layer:sorted(labels) for layer,labels in self.layerLabels.items()}
+        lay = core.layout(self.df,layerLabels=layerLabels)
+        self.assertEqual(lay['layerLabels']['layer2'],layerLabels['layer2'])
+        with self.assertRaises(LabelMismatchError):
+            layerLabels['layer1'] = layerLabels['layer1'][1:]
+            core.layout(self.df,layerLabels=layerLabels)
+
+    def test_without_matplotlib(self):
+        probe = ("import sys\n"
+                 "sys.modules['matplotlib'] = None\n"
+                 "from pysankey2 import core\n"
+                 "from pysankey2.datasets import load_fruits\n"
+                 "print(len(core.layout(load_fruits())['strips']))\n")
+        out = subprocess.check_output([sys.executable,'-c',probe],cwd=ROOT)
+        self.assertGreater(int(out),0)
+
+if __name__ == "__main__":
+    unittest.main()
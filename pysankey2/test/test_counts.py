@@ -0,0 +1,56 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import json
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pysankey2 import Sankey
+from pysankey2 import FlowCounts
+from pysankey2 import LabelMismatchError
+from pysankey2.test.fixtures import countrysWithGaps
+import unittest
+
+class TestFlowCounts(unittest.TestCase):
+
+    def setUp(self):
+        self.df = countrysWithGaps()
+        # partitions with different label sets and orders.
+        self.parts = [self.df.iloc[:40],self.df.iloc[40:90].iloc[::-1],self.df.iloc[90:]]
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_merge(self):
+        counts = [FlowCounts.from_frame(part) for part in self.parts]
+        a,b,c = counts
+        self.assertEqual(a.merge(b),b.merge(a))
+        self.assertEqual((a + b) + c,a + (b + c))
+        whole = FlowCounts.from_frame(self.df)
+        total = sum(counts)
+        self.assertEqual(set(total.layerLabels['Last']),set(whole.layerLabels['Last']))
+        # same counts up to the label order.
+        whole = whole.merge(FlowCounts.from_frame(self.df.iloc[:0]))
+        self.assertEqual(total,whole)
+
+    def test_mismatch(self):
+        with self.assertRaises(LabelMismatchError):
+            FlowCounts.from_frame(self.df).merge(FlowCounts.from_frame(self.df.iloc[:,:2]))
+
+    def test_serialize(self):
+        counts = FlowCounts.from_frame(self.df)
+        self.assertEqual(FlowCounts.from_dict(json.loads(json.dumps(counts.to_dict()))),counts)
+
+    def test_from_counts(self):
+        ref = Sankey(self.df)
+        ref.plot()
+        total = sum(FlowCounts.from_frame(part) for part in self.parts)
+        sky = Sankey.from_counts(total)
+        sky.layerLabels = ref.layerLabels
+        sky.plot()
+        self.assertEqual(sky.boxPos,ref.boxPos)
+        self.assertEqual(sky.stripWidth,ref.stripWidth)
+        self.assertEqual(ref.counts,FlowCounts.from_frame(self.df))
+
+if __name__ == '__main__':
+    unittest.main()
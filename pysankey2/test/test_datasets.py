@@ -3,8 +3,29 @@ import sys
 sys.path.append(os.path.realpath('.'))
 import pandas as pd
 import pandas.testing as pdt
-from datasets import load_countrys,load_fruits
+from datasets import load_countrys,load_fruits,make_flows
 if __name__ == "__main__":
     tmp = pd.DataFrame({'test':range(1000)})
     pdt.assert_index_equal(load_countrys().index,tmp.index)
-    pdt.assert_index_equal(load_fruits().index,tmp.index)
\ No newline at end of file
+    pdt.assert_index_equal(load_fruits().index,tmp.index)
+    # synthetic flows
+    df = make_flows(10000,n_layers=4,labels_per_layer=[5,50,50,20],skew=1.2,nan_rate=0.1,seed=1)
+    assert df.shape == (10000,4)
+    assert list(df.columns) == ['layer1','layer2','layer3','layer4']
+    assert [df[c].nunique() for c in df.columns] == [5,50,50,20]
+    # seeded
+    pdt.assert_frame_equal(df,make_flows(10000,n_layers=4,labels_per_layer=[5,50,50,20],skew=1.2,nan_rate=0.1,seed=1))
+    # dropped entities stay NaN in the following layers
+    na = df.isna().values
+    assert not na[:,0].any() and (na[:,:-1] <= na[:,1:]).all()
+    assert 0.05 < na[:,1].mean() < 0.15
+    # heavy-tailed labels
+    counts = df['layer2'].value_counts()
+    assert counts.iloc[0] > 5 * counts.iloc[-1]
+    # categorical columns hold the same data
+    cat = make_flows(10000,n_layers=4,labels_per_layer=[5,50,50,20],skew=1.2,nan_rate=0.1,seed=1,dtype="category")
+    assert (cat.dtypes == 'category').all()
+    pdt.assert_frame_equal(cat.astype(object),df.astype(object))
+    # sparse flows
+    sparse = make_flows(10000,n_layers=2,labels_per_layer=100,density=0.05)
+    assert sparse.groupby('layer1')['layer2'].nunique().max() <= 5
\ No newline at end of file
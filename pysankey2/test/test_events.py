@@ -0,0 +1,51 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+from pysankey2 import Sankey
+from pysankey2.datasets import make_flows
+import unittest
+
+def makeEvents():
+    wide = make_flows(3000,n_layers=4,labels_per_layer=[4,6,5,3],nan_rate=0.2,seed=4)
+    wide.columns = [1,2,3,4]
+    wide.index.name = 'user'
+    events = wide.stack().rename('state').reset_index().rename(columns={'level_1':'step'})
+    # shuffled log, with a gap(no event at step 2) for some users.
+    events = events[~((events['step'] == 2) & (events['user'] % 50 == 0))]
+    events = events.sample(frac=1,random_state=0).reset_index(drop=True)
+    return events
+
+class TestEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.events = makeEvents()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_from_events(self):
+        sky = Sankey.from_events(self.events,entity='user',step='step',label='state')
+        self.assertIn('aggregate',sky.last_profile.stages)
+        wide = self.events.pivot(index='user',columns='step',values='state')
+        ref = Sankey(wide,layerLabels={layer:sky.layerLabels[sky.colnameMaps[layer]] for layer in wide.columns})
+        sky.plot()
+        ref.plot()
+        self.assertEqual(sky.layerLabels,ref.layerLabels)
+        self.assertEqual(sky.boxPos,ref.boxPos)
+        self.assertEqual(sky.stripWidth,ref.stripWidth)
+        self.assertEqual(list(sky.colnameMaps),[1,2,3,4])
+
+    def test_max_steps(self):
+        sky = Sankey.from_events(self.events,entity='user',step='step',label='state',max_steps=2)
+        self.assertEqual(list(sky.colnameMaps),[1,2])
+
+    def test_duplicates(self):
+        with self.assertRaises(ValueError):
+            Sankey.from_events(pd.concat([self.events,self.events.iloc[:1]]),entity='user',step='step',label='state')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import tempfile
+import warnings
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from pysankey2 import Sankey
+from pysankey2 import core
+from pysankey2.test.fixtures import countrysWithGaps
+import unittest
+
+def makeDF():
+    df = countrysWithGaps()
+    df['region'] = np.array(['north','south','east'])[np.arange(len(df)) % 3]
+    df.loc[df.index[::7],'region'] = np.nan
+    return df
+
+class TestFacet(unittest.TestCase):
+
+    def setUp(self):
+        self.df = makeDF()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_facet(self):
+        fig,axes,sankeys = Sankey.facet(self.df,by='region')
+        self.assertEqual(list(sankeys),['east','north','south'])
+        self.assertEqual(axes.shape,(2,2))
+        layerLabels = core.getLayerLabels(self.df[['First','Mid','Last']])
+        for key,sky in sankeys.items():
+            part = self.df[self.df['region'] == key][['First','Mid','Last']]
+            # labels of the facet in the global order.
+            present = core.getLayerLabels(part)
+            ref = Sankey(part,layerLabels={layer:[label for label in labels if label in present[layer]]
+                                           for layer,labels in layerLabels.items()})
+            ref.plot()
+            self.assertEqual(sky.layerLabels,ref.layerLabels)
+            self.assertEqual(sky.boxPos,ref.boxPos)
+            self.assertEqual(sky.stripWidth,ref.stripWidth)
+        # shared colors.
+        colors = [sky.colorDict for sky in sankeys.values()]
+        self.assertTrue(all(color is colors[0] for color in colors))
+
+    def test_nan_keys(self):
+        # rows with a NaN key are left out, without casting NaN to int.
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            fig,axes,sankeys = Sankey.facet(self.df,by='region')
+        total = sum(int(sky._labelCounts['layer1'].sum()) for sky in sankeys.values())
+        self.assertEqual(total,int(self.df['region'].notna().sum()))
+        groups = np.array([0,np.nan,1,np.nan])
+        frame = self.df[['First']].iloc[:4]
+        results = core.aggregateGroups(frame,core.getLayerLabels(frame),groups,2)
+        self.assertEqual([int(labelCounts['First'].sum()) for labelCounts,flows in results],[1,1])
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            fig,axes,sankeys = Sankey.facet(self.df,by='region',layers=['First','Last'],
+                                            savePath=os.path.join(tmp,'{}.png'),figSize=(3,3))
+            self.assertIsNone(fig)
+            self.assertEqual(sorted(os.listdir(tmp)),['east.png','north.png','south.png'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from pysankey2 import Sankey
+from pysankey2 import core
+from pysankey2.datasets import load_countrys
+import unittest
+
+def bruteForce(df,mask):
+    """{(layer,source,target):rows} of the rows of mask."""
+    part = df[mask]
+    layers = list(df.columns)
+    flows = {}
+    for left,right in zip(layers[:-1],layers[1:]):
+        for (source,target),rows in part.groupby([left,right]).size().items():
+            flows[(left,source,target)] = rows
+    return flows
+
+def asDict(records):
+    return {(record['layer'],record['source'],record['target']):record['width'] for record in records}
+
+class TestFlowIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.df = load_countrys()
+        self.df.columns = ['First','Mid','Last']
+        self.df.iloc[::9,1] = np.nan
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_paths(self):
+        codes = core.encodeLayers(self.df,core.getLayerLabels(self.df))
+        paths,counts = core.countPaths(codes)
+        self.assertEqual(counts.sum(),len(self.df))
+        self.assertEqual(len(paths),len(self.df.drop_duplicates()))
+        keys = [tuple(path) for path in paths.tolist()]
+        self.assertEqual(keys,sorted(keys))
+
+    def test_through(self):
+        sky = Sankey(self.df)
+        df = self.df
+        self.assertEqual(asDict(sky.through({'Mid':'China'})),bruteForce(df,df['Mid'] == 'China'))
+        self.assertEqual(asDict(sky.through({'First':['China','USA']})),bruteForce(df,df['First'].isin(['China','USA'])))
+        self.assertEqual(asDict(sky.through('Japan')),
+                         bruteForce(df,(df['First'] == 'Japan') | (df['Mid'] == 'Japan') | (df['Last'] == 'Japan')))
+        with self.assertRaises(ValueError):
+            sky.through('Atlantis')
+
+        # without the rows, the adjacent strips are known.
+        sky = Sankey(self.df,retain_data=False)
+        records = asDict(sky.through({'First':'China'}))
+        expected = {key:rows for key,rows in bruteForce(df,df['First'] == 'China').items() if key[0] == 'First'}
+        self.assertEqual(records,expected)
+
+    def test_highlight(self):
+        sky = Sankey(self.df,stripColor="left")
+        fig,ax = sky.plot(highlight={'Mid':'Japan'})
+        stages = sky.last_profile.stages
+        self.assertEqual(stages['highlight']['artists'],len(sky.through({'Mid':'Japan'})))
+        # the layout of the same parameters is reused.
+        sky.plot(highlight='USA')
+        self.assertNotIn('stripGeometry',sky.last_profile.stages)
+        sky.plot(boxInterv=0.05)
+        self.assertIn('stripGeometry',sky.last_profile.stages)
+        artists = sky.highlight(ax,'China',color='red')
+        self.assertTrue(all(artist.axes is ax for artist in artists))
+
+if __name__ == '__main__':
+    unittest.main()
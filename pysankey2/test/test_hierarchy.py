@@ -0,0 +1,71 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from pysankey2 import Sankey
+from pysankey2.datasets import load_countrys
+import unittest
+
+REGIONS = {'China':'Asia','Japan':'Asia','India':'Asia','USA':'America','Canada':'America','Mexico':'America',
+           'Brazil':'America','England':'Europe','Spain':'Europe','Senegal':'Africa','South Africa':'Africa',
+           'Angola':'Africa'}
+CONTINENTS = {'Asia':'Eurasia','Europe':'Eurasia'}
+
+class TestHierarchy(unittest.TestCase):
+
+    def setUp(self):
+        self.df = load_countrys()
+        self.df.columns = ['First','Mid','Last']
+        self.df.iloc[::9,2] = np.nan
+
+    def tearDown(self):
+        plt.close('all')
+
+    def reference(self,df,mappings):
+        df = df.copy()
+        for layer,levels in mappings.items():
+            for mapping in levels:
+                df[layer] = df[layer].replace(mapping)
+        ref = Sankey(df)
+        ref.plot()
+        return ref
+
+    def test_levels(self):
+        sky = Sankey(self.df,hierarchy={'First':[REGIONS,CONTINENTS],'Mid':REGIONS})
+        self.assertEqual(sky.levels,3)
+        sky.plot()
+        self.assertIn('aggregate',sky.last_profile.stages)
+
+        sky.plot(level=1)
+        ref = self.reference(self.df,{'First':[REGIONS],'Mid':[REGIONS]})
+        child = sky._rollup(1)
+        self.assertEqual(child.layerLabels,ref.layerLabels)
+        self.assertEqual(child.boxPos,ref.boxPos)
+        self.assertEqual(child.stripWidth,ref.stripWidth)
+        # the rows are not scanned again.
+        self.assertNotIn('aggregate',sky.last_profile.stages)
+
+        # Mid stays at its coarsest level.
+        sky.plot(level=2)
+        ref = self.reference(self.df,{'First':[REGIONS,CONTINENTS],'Mid':[REGIONS]})
+        self.assertEqual(sky._rollup(2).stripWidth,ref.stripWidth)
+        self.assertIs(sky._rollup(2),sky._rollup(2))
+        with self.assertRaises(ValueError):
+            sky.plot(level=3)
+
+    def test_retain_data(self):
+        sky = Sankey(self.df,hierarchy={'Last':REGIONS},retain_data=False)
+        sky.plot(level=1)
+        ref = self.reference(self.df,{'Last':[REGIONS]})
+        self.assertEqual(sky._rollup(1).stripWidth,ref.stripWidth)
+        # relabeling the counts rebuilds the levels.
+        sky.relabel({'Japan':'China'},layer='First')
+        sky.plot(level=1)
+        ref = self.reference(self.df.replace({'First':{'Japan':'China'}}),{'Last':[REGIONS]})
+        self.assertEqual(sky._rollup(1).stripWidth,ref.stripWidth)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import subprocess
+sys.path.append(os.path.realpath('.'))
+import unittest
+
+# Budget(seconds) for `import pysankey2` on top of its hard dependencies(numpy, pandas).
+IMPORT_TIME_BUDGET = 0.25
+
+_PROBE = """
+import sys,time
+import numpy,pandas
+t0 = time.perf_counter()
+import pysankey2
+from pysankey2 import Sankey
+t1 = time.perf_counter()
+print(t1 - t0)
+print(int('matplotlib' in sys.modules))
+print(int('matplotlib.pyplot' in sys.modules))
+"""
+
+def probeImport():
+    out = subprocess.check_output([sys.executable,'-c',_PROBE],
+                                  cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+    elapsed,has_mpl,has_plt = out.decode().split()
+    return float(elapsed),bool(int(has_mpl)),bool(int(has_plt))
+
+class TestImport(unittest.TestCase):
+
+    def test_no_matplotlib_on_import(self):
+        _,has_mpl,has_plt = probeImport()
+        self.assertFalse(has_mpl)
+        self.assertFalse(has_plt)
+
+    def test_import_time(self):
+        # best of 3 runs, to be robust against a cold disk cache.
+        elapsed = min(probeImport()[0] for _ in range(3))
+        self.assertLess(elapsed,IMPORT_TIME_BUDGET)
+
+    def test_construct_without_pyplot(self):
+        import pandas as pd
+        from pysankey2 import Sankey
+        # building a Sankey(without drawing) should not require pyplot.
+        mods = set(sys.modules)
+        sky = Sankey(pd.DataFrame({'a':['x','y','x'],'b':['y','y','x']}),colorMode="global")
+        self.assertEqual(set(sky.labels),{'x','y'})
+        if 'matplotlib.pyplot' not in mods:
+            self.assertNotIn('matplotlib.pyplot',sys.modules)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.backend_bases import MouseEvent
+import numpy as np
+from pysankey2 import Sankey
+from pysankey2.core import SankeyException
+from pysankey2.datasets import load_countrys
+import unittest
+
+def bruteForce(sky,x,y):
+    """the box, or the last drawn strip, at (x,y) by scanning all of them."""
+    names = {new:old for old,new in sky.colnameMaps.items()}
+    found = None
+    for layer,labels in sky._layerLabels.items():
+        pos = sky.layerPos[layer]
+        if pos['layerStart'] <= x <= pos['layerEnd']:
+            for label in labels:
+                if sky.boxPos[layer][label]['bottom'] <= y <= sky.boxPos[layer][label]['top']:
+                    found = ('box',names[layer],label)
+        strip = sky._strips.get(layer)
+        if strip is not None and strip['x'][0] < x < strip['x'][-1]:
+            xs = strip['x']
+            point = int(round((x - xs[0]) / (xs[-1] - xs[0]) * (len(xs) - 1)))
+            hits = np.flatnonzero((strip['ysBottom'][:,point] <= y) & (y <= strip['ysTop'][:,point]))
+            if len(hits):
+                found = ('strip',names[layer],int(hits[-1]))
+    return found
+
+class TestInteraction(unittest.TestCase):
+
+    def setUp(self):
+        df = load_countrys()
+        df.columns = ['First','Mid','Last']
+        self.sky = Sankey(df,colorMode="layer",stripColor="left")
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_pick(self):
+        with self.assertRaises(SankeyException):
+            self.sky.pick(0,0)
+        fig,ax = self.sky.plot()
+        record = self.sky.pick(1,1)
+        self.assertEqual(record['type'],'box')
+        self.assertEqual(record['layer'],'First')
+        self.assertEqual(record['label'],self.sky.layerLabels['layer1'][0])
+        self.assertIsNone(self.sky.pick(-1,1))
+
+        rng = np.random.default_rng(0)
+        xmin,xmax = ax.get_xlim()
+        ymin,ymax = ax.get_ylim()
+        for x,y in rng.uniform([xmin,ymin],[xmax,ymax],(2000,2)):
+            record = self.sky.pick(x,y)
+            if record is None:
+                got = None
+            elif record['type'] == 'box':
+                got = ('box',record['layer'],record['label'])
+            else:
+                got = ('strip',record['layer'],record['index'])
+                strip = self.sky._strips[self.sky.colnameMaps[record['layer']]]
+                self.assertEqual(record['width'],strip['width'][record['index']])
+            self.assertEqual(got,bruteForce(self.sky,x,y))
+
+    def test_hover(self):
+        fig,ax = self.sky.plot()
+        records = []
+        self.sky.hover(ax,callback=records.append)
+        fig.canvas.draw()
+        x,y = ax.transData.transform((1,1))
+        fig.canvas.callbacks.process('motion_notify_event',MouseEvent('motion_notify_event',fig.canvas,x,y))
+        self.assertEqual(records[-1]['type'],'box')
+        # default tooltip
+        self.sky.hover(ax)
+        fig.canvas.callbacks.process('motion_notify_event',MouseEvent('motion_notify_event',fig.canvas,x,y))
+        self.assertTrue(any(text.get_visible() and text.get_text().endswith(str(records[-1]['count']))
+                            for text in ax.texts))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import warnings
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pysankey2 import Sankey
+from pysankey2 import memory
+from pysankey2.datasets import make_flows
+import unittest
+
+class TestMemory(unittest.TestCase):
+
+    def test_parseBytes(self):
+        self.assertEqual(memory.parseBytes("2GB"),2 << 30)
+        self.assertEqual(memory.parseBytes("512 MiB"),512 << 20)
+        self.assertEqual(memory.parseBytes("1.5k"),1536)
+        self.assertEqual(memory.parseBytes(1000),1000)
+        with self.assertRaises(ValueError):
+            memory.parseBytes("2 parsecs")
+
+    def test_planAggregate(self):
+        plan = memory.planAggregate(10**6,[10,10,10],memory.parseBytes("2GB"))
+        self.assertEqual(plan['strategy'],'inMemory')
+        self.assertFalse(plan['sparse'])
+        # too many label pairs for a dense counter.
+        plan = memory.planAggregate(10**6,[10**5,10**5],2 << 30)
+        self.assertTrue(plan['sparse'])
+        # too many rows for the budget.
+        plan = memory.planAggregate(10**8,[10,10,10],100 << 20)
+        self.assertEqual(plan['strategy'],'chunked')
+        self.assertLessEqual(plan['estimatedBytes'],100 << 20)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            plan = memory.planAggregate(10**8,[10**5,10**5],1 << 20)
+        self.assertEqual(len(caught),1)
+        self.assertEqual(plan['chunkSize'],memory.MIN_CHUNK_ROWS)
+
+    def test_budget(self):
+        df = make_flows(50000,n_layers=4,labels_per_layer=8,nan_rate=0.05)
+        ref = Sankey(df)
+        ref.plot()
+        sky = Sankey(df,memory_budget="2MB")
+        self.assertEqual(sky.memoryPlan['copy']['strategy'],'shallow')
+        self.assertEqual(sky.memoryPlan['labels']['strategy'],'perColumn')
+        sky.plot()
+        self.assertEqual(sky.memoryPlan['aggregate']['strategy'],'chunked')
+        self.assertEqual(sky.stripWidth,ref.stripWidth)
+        self.assertEqual(sky.boxPos,ref.boxPos)
+        self.assertEqual(set(sky.labels),set(ref.labels))
+        # measured peak of the chunked aggregation stays within the budget.
+        record = sky.last_profile.stages['aggregate']
+        self.assertEqual(record['strategy'],'chunked')
+        self.assertLess(record["peakBytes"],2 << 20)
+
+        sky = Sankey(df,memory_budget="2GB")
+        self.assertEqual(sky.memoryPlan['copy']['strategy'],'deep')
+        self.assertIn('peakBytes',sky.last_profile.stages['copy'])
+        plt.close('all')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import numpy as np
+from pysankey2 import Sankey
+from pysankey2 import core
+from pysankey2 import parallel
+from pysankey2.datasets import make_flows
+import unittest
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.df = make_flows(parallel.MIN_PARALLEL_ROWS + 1234,n_layers=4,labels_per_layer=[6,300,40,9],nan_rate=0.1,seed=3)
+        self.layerLabels = core.getLayerLabels(self.df)
+
+    def assertSameCounts(self,result,expected):
+        (labelCounts,flows),(refCounts,refFlows) = result,expected
+        self.assertEqual(list(labelCounts),list(refCounts))
+        for layer in refCounts:
+            np.testing.assert_array_equal(labelCounts[layer],refCounts[layer])
+        self.assertEqual(list(flows),list(refFlows))
+        for layer in refFlows:
+            for key in ('left','right','width'):
+                np.testing.assert_array_equal(flows[layer][key],refFlows[layer][key])
+
+    def test_resolveJobs(self):
+        self.assertEqual(parallel.resolveJobs(None),1)
+        self.assertEqual(parallel.resolveJobs(3),3)
+        self.assertEqual(parallel.resolveJobs(-1),os.cpu_count())
+        with self.assertRaises(ValueError):
+            parallel.resolveJobs(0)
+
+    def test_aggregate(self):
+        expected = core.aggregate(self.df,self.layerLabels)
+        for sparse in (None,True):
+            self.assertSameCounts(parallel.aggregate(self.df,self.layerLabels,n_jobs=3,sparse=sparse),expected)
+
+    def test_sankey(self):
+        ref = Sankey(self.df,retain_data=False)
+        sky = Sankey(self.df,retain_data=False,n_jobs=2)
+        self.assertSameCounts((sky._labelCounts,sky._flows),(ref._labelCounts,ref._flows))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pysankey2 import Sankey
+from pysankey2.datasets import load_countrys
+import unittest
+
+class TestPreview(unittest.TestCase):
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_cache(self):
+        sky = Sankey(load_countrys(),stripColor="left")
+        png = sky._repr_png_()
+        self.assertTrue(png.startswith(b'\x89PNG'))
+        self.assertIs(sky._repr_png_(),png)
+        # no figure is left to pyplot, and the layout of plot() is untouched.
+        self.assertEqual(plt.get_fignums(),[])
+        self.assertFalse(hasattr(sky,'_boxPos'))
+        # one format, so a display renders one preview.
+        self.assertFalse(hasattr(sky,'_repr_svg_'))
+        self.assertEqual(list(sky._previews[1]),['png'])
+
+        # new colors or labels render a new preview.
+        sky.colorDict = {label:'black' for label in sky.labels}
+        recolored = sky._repr_png_()
+        self.assertIsNot(recolored,png)
+        sky.relabel({'Japan':'China'})
+        self.assertIsNot(sky._repr_png_(),recolored)
+
+    def test_counts(self):
+        sky = Sankey(load_countrys(),retain_data=False)
+        self.assertTrue(sky._repr_png_().startswith(b'\x89PNG'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pysankey2 import Sankey
+from pysankey2.datasets import load_countrys
+import unittest
+
+class TestProfiling(unittest.TestCase):
+
+    def test_last_profile(self):
+        df = load_countrys()
+        sky = Sankey(df)
+        self.assertEqual(list(sky.last_profile.stages.keys()),['copy','labels'])
+        self.assertEqual(sky.last_profile.stages['copy']['rows'],len(df))
+
+        sky.plot()
+        stages = sky.last_profile.stages
+        self.assertEqual(list(stages.keys()),['aggregate','boxPos','stripWidth','stripGeometry','plotBox','plotStrip'])
+        self.assertEqual(stages['aggregate']['rows'],len(df))
+        self.assertEqual(stages['boxPos']['boxes'],sum(len(labels) for labels in sky.layerLabels.values()))
+        nstrips = sum(len(widths) for layer in sky.stripWidth.values() for widths in layer.values())
+        self.assertEqual(stages['stripGeometry']['strips'],nstrips)
+        self.assertEqual(stages['plotStrip']['artists'],nstrips)
+        self.assertGreaterEqual(sky.last_profile.seconds,sum(r['seconds'] for r in sky.last_profile.records()) - 1e-9)
+
+        # aggregation is cached.
+        sky.plot()
+        self.assertNotIn('aggregate',sky.last_profile.stages)
+        plt.close('all')
+
+    def test_callback(self):
+        calls = []
+        sky = Sankey(load_countrys(),profileCallback=lambda stage,record:calls.append(stage))
+        sky.plot()
+        plt.close('all')
+        self.assertEqual(calls,['copy','labels','aggregate','boxPos','stripWidth','stripGeometry','plotBox','plotStrip'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from pysankey2 import Sankey,core
+import unittest
+
+def makeDF(nrows=3000,seed=0):
+    # the labels of the next layer follow the previous one, shuffled, so a good order has few crossings.
+    rng = np.random.default_rng(seed)
+    labels = list('abcdefgh')
+    first = rng.integers(0,len(labels),nrows)
+    columns = {'layer1':first}
+    previous = first
+    for i in range(2,5):
+        mapping = rng.permutation(len(labels))
+        noise = rng.random(nrows) < 0.1
+        previous = np.where(noise,rng.integers(0,len(labels),nrows),mapping[previous])
+        columns['layer%d'%i] = previous
+    return pd.DataFrame({name:np.array(labels)[codes] for name,codes in columns.items()})
+
+class TestReorder(unittest.TestCase):
+
+    def setUp(self):
+        self.df = makeDF()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def assertSameCounts(self,sky,other):
+        self.assertEqual(sky.layerLabels,other.layerLabels)
+        labelCounts,flows = sky._aggregate()
+        otherCounts,otherFlows = other._aggregate()
+        for layer in labelCounts:
+            np.testing.assert_array_equal(labelCounts[layer],otherCounts[layer])
+        for layer in flows:
+            for key in ('left','right','width'):
+                np.testing.assert_array_equal(flows[layer][key],otherFlows[layer][key])
+
+    def test_explicit(self):
+        sky = Sankey(self.df)
+        sky._aggregate()
+        sky.reorder({'layer2':list('hgfedcba')})
+        layerLabels = dict(sky.layerLabels,layer2=list('hgfedcba'))
+        self.assertSameCounts(sky,Sankey(self.df,layerLabels=layerLabels))
+
+    def test_barycenter(self):
+        sky = Sankey(self.df,profileCallback=lambda stage,record:None)
+        labelCounts,flows = sky._aggregate()
+        before = core.countCrossings(sky._layerLabels,flows)
+        sky.reorder()
+        after = core.countCrossings(sky._layerLabels,sky._flows)
+        self.assertLess(after,before)
+        # the rows are not counted again.
+        sky.plot()
+        self.assertNotIn('aggregate',sky.last_profile.stages)
+        self.assertSameCounts(sky,Sankey(self.df,layerLabels=sky.layerLabels))
+
+    def test_barycenter_layers(self):
+        sky = Sankey(self.df)
+        layerLabels = sky.layerLabels
+        sky.reorder(layers=['layer2'])
+        for layer in ('layer1','layer3','layer4'):
+            self.assertEqual(sky.layerLabels[layer],layerLabels[layer])
+        self.assertEqual(sorted(sky.layerLabels['layer2']),sorted(layerLabels['layer2']))
+
+    def test_without_rows(self):
+        sky = Sankey(self.df,retain_data=False)
+        sky.reorder()
+        sky.plot()
+
+    def test_count_crossings(self):
+        # a crosses b once, weighted by the product of their widths.
+        layerLabels = {'l':['a','b'],'r':['a','b']}
+        flows = {'l':{'left':np.array([0,1]),'right':np.array([1,0]),'width':np.array([2,3])}}
+        self.assertEqual(core.countCrossings(layerLabels,flows),6)
+        orders = {'l':np.array([0,1]),'r':np.array([1,0])}
+        self.assertEqual(core.countCrossings(layerLabels,flows,orders),0)
+
+    def test_count_crossings_paths(self):
+        # dense(cumulative sums) and sparse(radix partition) counts agree with the pairs of strips.
+        rng = np.random.default_rng(1)
+        left,right = rng.integers(0,6,50),rng.integers(0,7,50)
+        keys = np.unique(left * 7 + right)
+        width = rng.integers(1,9,len(keys))
+        layerLabels = {'l':list(range(6)),'r':list(range(7))}
+        flows = {'l':{'left':keys // 7,'right':keys % 7,'width':width}}
+        expected = sum(int(width[i] * width[j]) for i in range(len(keys)) for j in range(len(keys))
+                       if keys[i] // 7 < keys[j] // 7 and keys[i] % 7 > keys[j] % 7)
+        self.assertEqual(core.countCrossings(layerLabels,flows),expected)
+        self.assertEqual(core._weightedInversions(keys % 7,width),expected)
+
+    def test_invalid(self):
+        sky = Sankey(self.df)
+        with self.assertRaises(ValueError):
+            sky.reorder("median")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pysankey2 import Sankey
+from pysankey2.core import SankeyException,LabelMismatchError
+from pysankey2.datasets import load_countrys,make_flows
+import unittest
+
+class TestSampling(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = make_flows(50000,n_layers=3,labels_per_layer=[5,8,6],nan_rate=0.05,seed=1)
+        cls.exact = Sankey(cls.df,retain_data=False)
+        cls.exact.plot()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_intervals(self):
+        sky = Sankey(self.df,sample=5000,retain_data=False)
+        estimates = sky.estimates()
+        self.assertEqual((estimates['rows'],estimates['sampleRows']),(50000,5000))
+        inside = total = 0
+        exactWidths = self.exact.stripWidth
+        for layer,strips in estimates['strips'].items():
+            for left,rights in strips.items():
+                for right,strip in rights.items():
+                    width = exactWidths[layer][left].get(right,0)
+                    inside += strip['low'] <= width <= strip['high']
+                    total += 1
+                    self.assertLessEqual(strip['low'],strip['width'])
+        # about 95% of the intervals hold the exact widths.
+        self.assertGreater(inside / total,0.85)
+        with self.assertRaises(SankeyException):
+            self.exact.estimates()
+
+    def test_stratify(self):
+        sky = Sankey(self.df,sample=0.05,stratify='layer1')
+        for label,box in sky.estimates()['boxes']['layer1'].items():
+            self.assertEqual(box['count'],self.exact._labelCounts['layer1'][self.exact.layerLabels['layer1'].index(label)])
+            self.assertEqual(box['low'],box['high'])
+
+    def test_whole(self):
+        # sampling all rows gives the exact counts.
+        sky = Sankey(self.df,sample=len(self.df),layerLabels=self.exact.layerLabels)
+        sky.plot(flagInsignificant=True)
+        self.assertEqual(sky.stripWidth,self.exact.stripWidth)
+        self.assertEqual(Sankey(self.df,approx=True).estimates()['sampleRows'],len(self.df))
+        # floats in (0,1] are fractions, others whole numbers of rows.
+        self.assertEqual(Sankey(self.df,sample=1.0).estimates()['sampleRows'],len(self.df))
+        self.assertEqual(Sankey(self.df,sample=1000.0).estimates()['sampleRows'],1000)
+        for sample in (1.5,0.0,-3):
+            with self.assertRaises(ValueError):
+                Sankey(self.df,sample=sample)
+        self.assertTrue(all(strip['significant'] for rights in sky.estimates()['strips']['layer1'].values()
+                            for strip in rights.values()))
+
+    def test_provided_colors(self):
+        # colors of all labels, some of them not sampled.
+        df = load_countrys()
+        full = Sankey(df)
+        colors = {label:'red' for label in full.labels}
+        sky = Sankey(df,sample=20,colorDict=colors)
+        self.assertLess(len(sky.labels),len(colors))
+        self.assertEqual(set(sky.colorDict),set(sky.labels))
+        layerColors = {layer:{label:'red' for label in full.layerLabels[layer]} for layer in df.columns}
+        sky = Sankey(df,sample=20,colorDict=layerColors,colorMode="layer")
+        self.assertEqual({layer:set(colors) for layer,colors in sky.colorDict.items()},
+                         {layer:set(labels) for layer,labels in sky.layerLabels.items()})
+        # labels that are sampled still need a color.
+        with self.assertRaises(LabelMismatchError):
+            Sankey(df,sample=20,colorDict={label:'red' for label in sky.labels[1:]})
+
+    def test_relabel(self):
+        sky = Sankey(self.df,sample=2000)
+        sky.relabel({'label1':'label0'},layer='layer2')
+        sky.plot(flagInsignificant=True)
+        boxes = sky.estimates()['boxes']['layer2']
+        self.assertNotIn('label1',boxes)
+        self.assertLessEqual(boxes['label0']['low'],boxes['label0']['count'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import http.client
+import json
+import socket
+import tempfile
+from pysankey2 import FlowCounts
+from pysankey2.datasets import load_countrys
+from pysankey2.serve import RenderServer
+import unittest
+
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self,path):
+        http.client.HTTPConnection.__init__(self,'localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+def request(connection,method,path,body=None,headers=None):
+    connection.request(method,path,body=body,headers=headers or {})
+    response = connection.getresponse()
+    return response.status,dict(response.getheaders()),response.read()
+
+class TestServe(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = RenderServer(port=0,workers=1)
+        cls.server.start()
+        cls.host,cls.port = cls.server.address
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def connection(self):
+        return http.client.HTTPConnection(self.host,self.port,timeout=60)
+
+    def test_counts(self):
+        counts = FlowCounts.from_frame(load_countrys())
+        payload = {'counts':counts.to_dict(),'sankey':{'stripColor':'left'},'plot':{'figSize':[4,4]},'dpi':50}
+        status,headers,body = request(self.connection(),'POST','/render',json.dumps(payload),
+                                      {'Content-Type':'application/json'})
+        self.assertEqual(status,200)
+        self.assertEqual(headers['Content-Type'],'image/png')
+        self.assertTrue(body.startswith(b'\x89PNG'))
+        timing = json.loads(headers['X-Render-Timing'])
+        self.assertGreaterEqual(timing['total'],timing['plot'])
+
+        status,headers,body = request(self.connection(),'GET','/metrics')
+        metrics = json.loads(body)
+        self.assertEqual(metrics['workers'],1)
+        self.assertEqual(metrics['queueDepth'],0)
+        self.assertGreaterEqual(metrics['requests'],1)
+        self.assertTrue(metrics['recent'])
+
+    def test_csv(self):
+        csv = load_countrys().to_csv(index=False)
+        status,headers,body = request(self.connection(),'POST','/render?format=svg&dpi=50&colorMode=layer',csv,
+                                      {'Content-Type':'text/csv'})
+        self.assertEqual(status,200)
+        self.assertEqual(headers['Content-Type'],'image/svg+xml')
+        self.assertIn(b'<svg',body)
+
+    def test_csv_options(self):
+        # query parameters are converted to their types.
+        csv = load_countrys().to_csv(index=False)
+        status,headers,body = request(self.connection(),'POST','/render?dpi=20&sample=100&retain_data=false&approx=false',
+                                      csv,{'Content-Type':'text/csv'})
+        self.assertEqual(status,200)
+        status,headers,body = request(self.connection(),'POST','/render?approx=maybe',csv,{'Content-Type':'text/csv'})
+        self.assertEqual(status,400)
+
+    def test_refused_options(self):
+        counts = FlowCounts.from_frame(load_countrys()).to_dict()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp,'out.png')
+            for payload in ({'counts':counts,'plot':{'savePath':path}},{'counts':counts,'sankey':{'n_jobs':4}},
+                            {'csv':'a,b\nx,y\n','sankey':{'profileCallback':'print'}}):
+                status,headers,body = request(self.connection(),'POST','/render',json.dumps(payload),
+                                              {'Content-Type':'application/json'})
+                self.assertEqual(status,400)
+                self.assertIn('does not accept',json.loads(body)['error'])
+            self.assertFalse(os.path.exists(path))
+        status,headers,body = request(self.connection(),'POST','/render?savePath=/tmp/x.png','a,b\nx,y\n',
+                                      {'Content-Type':'text/csv'})
+        self.assertEqual(status,400)
+
+    def test_errors(self):
+        status,headers,body = request(self.connection(),'POST','/render',json.dumps({'rows':[]}),
+                                      {'Content-Type':'application/json'})
+        self.assertEqual(status,400)
+        self.assertIn('error',json.loads(body))
+        status,headers,body = request(self.connection(),'GET','/nothing')
+        self.assertEqual(status,404)
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp,'render.sock')
+            server = RenderServer(socketPath=path,workers=1)
+            server.start()
+            try:
+                status,headers,body = request(UnixConnection(path),'GET','/metrics')
+                self.assertEqual(status,200)
+                self.assertEqual(json.loads(body)['requests'],0)
+            finally:
+                server.close()
+            self.assertFalse(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from pysankey2 import Sankey
+from pysankey2 import StreamCounts
+from pysankey2.datasets import make_flows
+import unittest
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.df = make_flows(100000,n_layers=3,labels_per_layer=5000,skew=1.1,nan_rate=0.05,seed=2)
+        self.stream = StreamCounts(list(self.df.columns),capacity=100,epsilon=0.002)
+        nbytes = self.stream.nbytes
+        for start in range(0,len(self.df),10000):
+            self.stream.update(self.df.iloc[start:start + 10000])
+        # memory does not grow with the stream.
+        self.assertEqual(self.stream.nbytes,nbytes)
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_topLabels(self):
+        exact = self.df['layer2'].value_counts()
+        records = self.stream.topLabels('layer2')
+        self.assertEqual(len(records),100)
+        for record in records[:10]:
+            self.assertLessEqual(record['count'] - record['error'],exact[record['label']])
+            self.assertGreaterEqual(record['count'],exact[record['label']])
+            self.assertLessEqual(record['error'],self.stream.error)
+        self.assertEqual([record['label'] for record in records[:5]],list(exact.index[:5]))
+
+    def test_counts(self):
+        counts = self.stream.counts(labels=10)
+        pairs = self.df.groupby(['layer1','layer2']).size()
+        layerLabels = counts.layerLabels
+        flow = counts.flows['layer1']
+        for li,ri,width in zip(flow['left'].tolist(),flow['right'].tolist(),flow['width'].tolist()):
+            exact = pairs[(layerLabels['layer1'][li],layerLabels['layer2'][ri])]
+            self.assertTrue(exact <= width <= exact + self.stream.error)
+        for layer in counts.layers[:-1]:
+            flow = counts.flows[layer]
+            stacked = np.bincount(flow['left'],weights=flow['width'],minlength=len(layerLabels[layer]))
+            self.assertTrue((counts.labelCounts[layer] >= stacked).all())
+        sky = Sankey.from_counts(counts)
+        sky.plot()
+        self.assertEqual(list(sky.boxPos['layer1']),layerLabels['layer1'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,10 +21,29 @@ class TestUtils(unittest.TestCase):
         with self.assertRaises(ValueError):
             utils.setColorConf(group,colors = colors_palette)
         
+    def test_color_table(self):
+        table = utils.colorTable(5000)
+        # cached and read-only
+        self.assertIs(utils.colorTable(5000),table)
+        self.assertFalse(table.flags.writeable)
+        self.assertEqual(table.shape,(5000,4))
+        # labels past tab20 are spread over a continuous colormap instead of all grey
+        self.assertGreater(len(set(utils.toHex(table))),1000)
+        self.assertEqual(utils.setColorConf(5000,alternative=None)[:20],utils.setColorConf(20))
+        # continuous colormaps are sampled evenly
+        colors = utils.setColorConf(3,colors="viridis")
+        self.assertEqual(colors,['#440154','#21918c','#fde725'])
+        self.assertEqual(utils.setColorConf(0),[])
+        # distinct colors for a few hundred labels
+        self.assertEqual(len(set(utils.setColorConf(300,alternative=None))),300)
+        # colors of matplotlib as alternative, e.g. a list of rgb
+        self.assertEqual(utils.setColorConf(30,alternative=[0.5,0.5,0.5])[20:],["#808080"] * 10)
+
     def test_remove_list(self):
         lst = ['a','b',np.nan,'c',1,2,3,np.nan,3.5,4.5]
         ret = utils.listRemoveNAN(lst)
         self.assertEqual(ret,['a','b','c',1,2,3,3.5,4.5])
+        self.assertEqual(utils.listRemoveNAN(np.array(['a',None,'b'],dtype=object)),['a','b'])
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from pysankey2 import Sankey
+import unittest
+
+def makeDF(nlayers=12,nrows=2000,seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'step%d'%i:rng.choice(['a','b','c','d'],nrows) for i in range(nlayers)})
+
+class TestViewport(unittest.TestCase):
+
+    def setUp(self):
+        self.df = makeDF()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_window(self):
+        sky = Sankey(self.df,stripColor="left")
+        sky.plot()
+        boxPos,stripWidth = sky.boxPos,sky.stripWidth
+        fig,ax = sky.plot(layers=slice(4,7))
+        layers = ['layer5','layer6','layer7']
+        self.assertEqual(list(sky.boxPos.keys()),layers)
+        self.assertEqual(sky.boxPos,{layer:boxPos[layer] for layer in layers})
+        self.assertEqual(sky.stripWidth,{layer:stripWidth[layer] for layer in layers[:-1]})
+        # x positions start from the first layer of the window.
+        self.assertEqual(sky.layerPos['layer5']['layerStart'],0)
+        stages = sky.last_profile.stages
+        self.assertNotIn('aggregate',stages)
+        self.assertEqual(stages['boxPos']['boxes'],12)
+        self.assertEqual(stages['plotStrip']['artists'],sum(len(stripWidth[layer][label]) for layer in layers[:-1]
+                                                             for label in stripWidth[layer]))
+        # same as a Sankey of the columns of the window.
+        ref = Sankey(self.df.iloc[:,4:7],stripColor="left",layerLabels={column:sky.layerLabels[layer]
+                     for column,layer in zip(self.df.columns[4:7],layers)})
+        ref.plot()
+        self.assertEqual(list(ref.boxPos.values()),list(sky.boxPos.values()))
+        self.assertEqual(list(ref.layerPos.values()),list(sky.layerPos.values()))
+        record = sky.pick(1,1)
+        self.assertEqual(record['layer'],'step4')
+        sky.highlight(ax,{'step0':'a'})
+
+    def test_invalid(self):
+        sky = Sankey(self.df)
+        with self.assertRaises(ValueError):
+            sky.plot(layers=slice(0,6,2))
+        with self.assertRaises(ValueError):
+            sky.plot(layers=slice(20,30))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+sys.path.append(os.path.realpath('.'))
+import tempfile
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from pysankey2 import Sankey
+from pysankey2 import core
+from pysankey2.test.fixtures import countrysWithGaps
+import unittest
+
+def makeDF():
+    df = countrysWithGaps()
+    rng = np.random.default_rng(0)
+    df['date'] = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0,60 * 24,len(df)),unit='h')
+    df.loc[df.index[::11],'date'] = pd.NaT
+    return df
+
+class TestWindows(unittest.TestCase):
+
+    def setUp(self):
+        self.df = makeDF()
+
+    def tearDown(self):
+        plt.close('all')
+
+    def test_windows(self):
+        sankeys = Sankey.windows(self.df,time_col='date',window='7D',step='2D')
+        starts = list(sankeys)
+        self.assertEqual(starts[0],self.df['date'].min())
+        self.assertEqual(starts[1] - starts[0],pd.Timedelta('2D'))
+        self.assertGreater(starts[-1] + pd.Timedelta('7D'),self.df['date'].max())
+        layerLabels = core.getLayerLabels(self.df.dropna(subset=['date'])[['First','Mid','Last']])
+        for start,sky in sankeys.items():
+            inWindow = (self.df['date'] >= start) & (self.df['date'] < start + pd.Timedelta('7D'))
+            part = self.df[inWindow][['First','Mid','Last']]
+            # labels of the window in the global order.
+            present = core.getLayerLabels(part)
+            ref = Sankey(part,layerLabels={layer:[label for label in labels if label in present[layer]]
+                                           for layer,labels in layerLabels.items()})
+            # all labels are kept, those of no rows in the window as empty boxes.
+            self.assertEqual(sky.layerLabels,{'layer%d'%(i + 1):labels for i,labels in enumerate(layerLabels.values())})
+            self.assertEqual(sky.counts._compact(),ref.counts)
+        # shared colors.
+        colors = [sky.colorDict for sky in sankeys.values()]
+        self.assertTrue(all(color is colors[0] for color in colors))
+
+    def test_stable_layout(self):
+        # z keeps its place though the total and the labels present change.
+        df = pd.DataFrame({'t':[0] * 10 + [1] * 25 + [2] * 3,
+                           'a':['x'] * 5 + ['z'] * 5 + ['x'] * 5 + ['z'] * 20 + ['y'] * 3,
+                           'b':['u'] * 38})
+        sankeys = list(Sankey.windows(df,time_col='t',window=1).values())
+        limits = []
+        for sky in sankeys:
+            fig,ax = sky.plot()
+            limits.append(ax.get_ylim())
+        self.assertEqual(sankeys[0].boxPos['layer1']['z']['bottom'],sankeys[1].boxPos['layer1']['z']['bottom'])
+        # y(no rows before t=2) is an empty box.
+        y = sankeys[0].boxPos['layer1']['y']
+        self.assertEqual(y['bottom'],y['top'])
+        self.assertEqual(limits,[limits[1]] * 3)
+        self.assertGreaterEqual(limits[0][1],sankeys[1].boxPos['layer1']['z']['top'])
+
+    def test_gaps(self):
+        # windows shorter than the step leave rows out.
+        df = pd.DataFrame({'t':[0,1,2,5,6,9,10],'a':list('xyxyxyx'),'b':list('uuvvuvu')})
+        sankeys = Sankey.windows(df,time_col='t',window=2,step=5)
+        self.assertEqual(list(sankeys),[0,5,10])
+        self.assertEqual([sky.counts.labelCounts['a'].sum() for sky in sankeys.values()],[2,2,1])
+        with self.assertRaises(ValueError):
+            Sankey.windows(df,time_col='t',window=2,step=0)
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sankeys = Sankey.windows(self.df,time_col='date',window='30D',layers=['First','Last'],
+                                     savePath=os.path.join(tmp,'{}.png'),figSize=(3,3))
+            self.assertEqual(sorted(os.listdir(tmp)),['%d.png'%i for i in range(len(sankeys))])
+            Sankey.windows(self.df,time_col='date',window='30D',layers=['First','Last'],
+                           savePath=os.path.join(tmp,'windows.gif'),figSize=(3,3))
+            self.assertTrue(os.path.exists(os.path.join(tmp,'windows.gif')))
+
+if __name__ == '__main__':
+    unittest.main()
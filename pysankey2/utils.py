@@ -1,6 +1,115 @@
-from matplotlib.colors import to_hex
-import matplotlib.pyplot as plt
-import math
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+def _getCmap(name):
+    """
+    Look up a matplotlib colormap by name without importing pyplot.
+    Raises ValueError if <name> is not a registered colormap.
+    """
+    try:
+        from matplotlib import colormaps
+    except ImportError:
+        # matplotlib < 3.5
+        from matplotlib.cm import get_cmap
+        return get_cmap(name)
+    try:
+        return colormaps[name]
+    except KeyError:
+        raise ValueError("{0} is not a valid colormap name.".format(name))
+
+# number of palettes cached by (colors,ngroups,alternative), see colorTable().
+PALETTE_CACHE_SIZE = 64
+# sampled for the labels past the colors of a qualitative colormap(if no alternative).
+CONTINUOUS_CMAP = "turbo"
+# colormaps with fewer colors are qualitative(e.g. tab20), their colors are taken in order.
+_QUALITATIVE_MAX_COLORS = 64
+# successive labels are spread over the continuous colormap in the order of golden ratio steps.
+_GOLDEN_RATIO = (5 ** 0.5 - 1) / 2
+
+_colorspace = None
+def _hclColors(ngroups):
+    """colors of the hcl palette, the colorspace package is looked up once."""
+    global _colorspace
+    if _colorspace is None:
+        try:
+            import colorspace
+            _colorspace = colorspace
+        except ImportError:
+            _colorspace = False
+    if _colorspace is False:
+        raise ImportError('hcl colorspace package has not being installed.\n'
+                          'please try the following command:\n'
+                          'pip install git+https://github.com/retostauffer/python-colorspace')
+    color_repo = _colorspace.sequential_hcl(h=[15,375],l=65,c=70)
+    return color_repo.colors(ngroups + 1)[:ngroups]
+
+def _sampleCmap(cmap,positions):
+    """RGBA colors of a continuous colormap at <positions> in [0,1], interpolated past its resolution."""
+    if len(positions) > cmap.N:
+        from matplotlib.colors import LinearSegmentedColormap
+        cmap = LinearSegmentedColormap.from_list(cmap.name,cmap(np.linspace(0,1,cmap.N)),N=len(positions))
+    return cmap(positions)
+
+def colorTable(ngroups,colors="tab20",alternative=None):
+    """
+    Colors of <ngroups> labels as a read-only (ngroups,4) RGBA array, cached by (colors,ngroups,alternative).
+
+    Parameters:
+    ----------
+    colors:str
+        "hcl", or a colormap accessible in matplotlib. Qualitative colormaps(e.g. tab20) give their colors in order,
+        continuous ones(e.g. viridis) are sampled evenly.
+
+    alternative:optional.
+        Color of the labels past the colors of a qualitative colormap, if not passing,
+        these labels are spread over the CONTINUOUS_CMAP colormap.
+    """
+    if alternative is not None:
+        from matplotlib.colors import to_rgba
+        alternative = to_rgba(alternative)
+    return _colorTable(colors,ngroups,alternative)
+
+def _spreadPositions(n):
+    """
+    <n> evenly spaced positions in [0,1](distinct colors), taken in the order of golden ratio steps
+    so that successive labels are far apart.
+    """
+    if n < 2:
+        return np.zeros(n)
+    ranks = np.argsort(np.argsort((np.arange(n) * _GOLDEN_RATIO) % 1,kind='stable'),kind='stable')
+    return ranks / (n - 1)
+
+@lru_cache(maxsize=PALETTE_CACHE_SIZE)
+def _colorTable(colors,ngroups,alternative):
+    """see colorTable(), <alternative> is an RGBA tuple or None."""
+    from matplotlib.colors import to_rgba_array
+    if colors == "hcl":
+        table = to_rgba_array(_hclColors(ngroups)) if ngroups else np.empty((0,4))
+    else:
+        cmap = _getCmap(colors)
+        if getattr(cmap,'colors',None) is not None and cmap.N <= _QUALITATIVE_MAX_COLORS:
+            table = to_rgba_array(cmap.colors)[:ngroups]
+            nrest = ngroups - len(table)
+            if nrest > 0 and alternative is not None:
+                rest = np.tile(to_rgba_array(alternative),(nrest,1))
+            elif nrest > 0:
+                rest = _sampleCmap(_getCmap(CONTINUOUS_CMAP),_spreadPositions(nrest))
+            else:
+                rest = np.empty((0,4))
+            table = np.concatenate([table,rest])
+        else:
+            table = _sampleCmap(cmap,np.linspace(0,1,ngroups))
+    table = np.asarray(table,dtype=float)
+    table.flags.writeable = False
+    return table
+
+def toHex(table):
+    """hex colors('#rrggbb') of an RGBA array."""
+    rgb = np.rint(np.asarray(table)[:,:3] * 255).astype(np.int64)
+    return np.char.mod('#%06x',(rgb[:,0] << 16) | (rgb[:,1] << 8) | rgb[:,2]).tolist()
+
 def setColorConf(ngroups,colors="tab20",alternative="grey")->list:
     """
     Parameters:
@@ -14,46 +123,19 @@ def setColorConf(ngroups,colors="tab20",alternative="grey")->list:
     
     alternative:
         If <ngroups> is greater than the maximum number of colorPalette, the rest tags would be colored with <alternative>.
+        If None, the rest tags are spread over a continuous colormap, see colorTable().
     
     Returns:
     --------
     colors_list:list
         a list of colors(hex).
     """ 
-    if colors == "hcl":
-        try:
-            from colorspace import sequential_hcl
-            color_repo = sequential_hcl(h=[15,375],l=65,c=70)
-            colors_list =  color_repo.colors(ngroups + 1)
-        except ImportError:
-            print('hcl colorspace package has not being installed.')
-            print('please try the following command:')
-            print('pip install git+https://github.com/retostauffer/python-colorspace') 
-    else:
-        colors = list(plt.get_cmap(colors).colors)
-        colors_list = [to_hex(color) for color in colors]
-        colors_list = colors_list[:ngroups]
-
-        # if len of colors_list less than ngroups, use grey to fullfill.
-        if len(colors_list) < ngroups:
-            for i in range(ngroups - len(colors_list)):
-                colors_list.append(to_hex(alternative))
-    return colors_list
+    return toHex(colorTable(ngroups,colors,alternative))
 
 def listRemoveNAN(list_):
     """
-    Remove NaN in the list.
+    Remove NaN(and other missing values, e.g. None) in the list.
     list_:list-like object.
     """
-    list_new = []
-    for i,val in enumerate(list(list_)):
-        # float/nan
-        if isinstance(val,float): 
-            if math.isnan(val):
-                continue
-            else:
-                list_new.append(val)
-        # int,str,etc.
-        else:
-            list_new.append(val)
-    return list_new
\ No newline at end of file
+    values = pd.Series(list(list_),dtype=object)
+    return values[values.notna()].tolist()
@@ -20,8 +20,6 @@ INSTALL_REQUIRES =  [x.strip() for x in require]
 PACKAGES=['pysankey2','pysankey2.test']
 
 CLASSIFIERS = [
-    'Programming Language :: Python :: 3.6',
-    'Programming Language :: Python :: 3.7',
     'Programming Language :: Python :: 3.8',
     'License :: OSI Approved :: GNU Lesser General Public License v3 (LGPLv3)',
     'Topic :: Scientific/Engineering :: Visualization',
@@ -42,6 +40,7 @@ if __name__ == "__main__":
         author_email=AUTHOR_EMAIL,
         url=URL,
         install_requires=INSTALL_REQUIRES,
+        python_requires='>=3.8',
         include_package_data=True,
         packages=PACKAGES,
         classifiers=CLASSIFIERS